@@ -1,6 +1,5 @@
 import json
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from functools import wraps
 from sqlalchemy import MetaData
 
@@ -9,9 +8,10 @@ from dmutils.flask_init import init_app, api_error_handlers
 from dmutils.flask import DMGzipMiddleware
 
 from config import configs
+from . import read_replicas
 
 
-db = SQLAlchemy(metadata=MetaData(naming_convention={
+db = read_replicas.RoutingSQLAlchemy(metadata=MetaData(naming_convention={
     "ix": 'ix_%(column_0_label)s',
     "uq": "uq_%(table_name)s_%(column_0_name)s",
     "ck": "%(constraint_name)s",
@@ -41,6 +41,11 @@ def create_app(config_name):
         application.config['SQLALCHEMY_DATABASE_URI'] = (cf_services['postgres'][0]['credentials']['uri']
                                                          .replace('postgres://', "postgresql://", 1))
 
+    read_replicas.init_app(application)
+
+    from . import query_timeouts
+    query_timeouts.init_app(application)
+
     from .metrics import metrics as metrics_blueprint, gds_metrics
     from .main import main as main_blueprint
     from .status import status as status_blueprint
@@ -57,6 +62,10 @@ def create_app(config_name):
 
     DMGzipMiddleware(application, compress_by_default=False)
 
+    if application.config['DM_API_PRELOAD']:
+        from .preload import preload
+        preload(application)
+
     return application
 
 
@@ -1,8 +1,7 @@
 from flask import abort
 
-from .models import Service
+from .models import Service, SupplierBriefEligibility
 from .validation import get_validation_errors
-from .service_utils import filter_services
 from .utils import index_object
 
 
@@ -26,17 +25,24 @@ def validate_brief_data(brief, enforce_required=True, required_fields=None):
         abort(400, errs)
 
 
+def get_supplier_services_eligible_for_brief(supplier, brief):
+    eligible_service_ids = SupplierBriefEligibility.query.for_brief(brief).filter(
+        SupplierBriefEligibility.supplier_id == supplier.supplier_id
+    ).with_entities(SupplierBriefEligibility.service_id)
+
+    return Service.query.filter(Service.id.in_(eligible_service_ids.scalar_subquery()))
+
+
 def get_supplier_service_eligible_for_brief(supplier, brief):
-    services = filter_services(
-        framework_slugs=[brief.framework.slug],
-        statuses=["published"],
-        lot_slug=brief.lot.slug,
-        role=brief.data["specialistRole"] if brief.lot.slug == "digital-specialists" else None
-    )
+    return get_supplier_services_eligible_for_brief(supplier, brief).first()
 
-    services = services.filter(Service.supplier_id == supplier.supplier_id)
 
-    return services.first()
+def get_supplier_ids_eligible_for_brief(brief, location=None):
+    return [
+        supplier_id for supplier_id, in SupplierBriefEligibility.query.for_brief(brief, location).with_entities(
+            SupplierBriefEligibility.supplier_id
+        ).distinct().order_by(SupplierBriefEligibility.supplier_id)
+    ]
 
 
 def index_brief(brief):
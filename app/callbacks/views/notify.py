@@ -1,11 +1,11 @@
-from flask import jsonify, current_app
+from flask import abort, jsonify, current_app
 
 from dmapiclient.audit import AuditTypes
 from dmutils.email.helpers import hash_string
 
 from app import db
 from app.callbacks import callbacks
-from app.utils import get_json_from_request
+from app.utils import get_json_from_request, json_has_required_keys
 from app.models import User, AuditEvent
 
 
@@ -17,51 +17,77 @@ def callbacks_root():
 
 @callbacks.route('/notify', methods=['POST'])
 def notify_callback():
+    """Handle a Notify delivery receipt, or a list of them (so that a burst of receipts can be sent together)"""
     notify_data = get_json_from_request()
 
-    email_address = notify_data["to"]
-    hashed_email = hash_string(email_address)
-    reference = notify_data["reference"]
-    status = notify_data["status"]
-
-    # remove PII from response for logging
-    # according to docs only "to" has PII
-    # https://docs.notifications.service.gov.uk/rest-api.html#delivery-receipts
-    clean_notify_data = notify_data.copy()
-    del clean_notify_data["to"]
-
-    current_app.logger.info(
-        f"Notify callback: {status}: {reference} to {hashed_email}",
-        extra={"notify_delivery_receipt": clean_notify_data},
-    )
-
-    if status == "permanent-failure":
-        user = User.query.filter(
-            User.email_address == email_address
-        ).first()
-
-        if user and user.active:
-            user.active = False
-            db.session.add(user)
-
-            audit_event = AuditEvent(
-                audit_type=AuditTypes.update_user,
-                user='Notify callback',
-                data={"user": {"active": False}, "notify_callback_data": notify_data},
-                db_object=user,
-            )
-            db.session.add(audit_event)
+    receipts = notify_data if isinstance(notify_data, list) else [notify_data]
+    for receipt in receipts:
+        if not isinstance(receipt, dict):
+            abort(400, "Invalid JSON must be a delivery receipt or a list of them")
+        json_has_required_keys(receipt, ["to", "reference", "status"])
+
+    process_delivery_receipts(receipts)
+
+    return jsonify(status='ok'), 200
+
+
+def process_delivery_receipts(receipts):
+    """
+    Log delivery receipts and deactivate the users whose email addresses have permanently failed, looking all of them
+    up at once and auditing them in a single transaction
+    """
+    permanent_failures = {}
+
+    for receipt in receipts:
+        hashed_email = hash_string(receipt["to"])
+        reference = receipt["reference"]
+        status = receipt["status"]
+
+        # remove PII from response for logging
+        # according to docs only "to" has PII
+        # https://docs.notifications.service.gov.uk/rest-api.html#delivery-receipts
+        clean_notify_data = receipt.copy()
+        del clean_notify_data["to"]
 
-            db.session.commit()
+        current_app.logger.info(
+            f"Notify callback: {status}: {reference} to {hashed_email}",
+            extra={"notify_delivery_receipt": clean_notify_data},
+        )
+
+        if status == "permanent-failure":
+            # the first receipt for each address is the one that's audited
+            permanent_failures.setdefault(receipt["to"], receipt)
 
-            current_app.logger.info(
-                f"User account disabled for {hashed_email} after Notify reported permanent delivery "
-                "failure."
+        elif status.endswith("failure"):
+            current_app.logger.warning(
+                f"Notify failed to deliver {reference} to {hashed_email}"
             )
 
-    elif status.endswith("failure"):
-        current_app.logger.warning(
-            f"Notify failed to deliver {reference} to {hashed_email}"
+    if not permanent_failures:
+        return
+
+    users = User.query.filter(
+        User.email_address.in_(permanent_failures.keys()),
+        User.active.is_(True),
+    ).all()
+
+    deactivated_email_addresses = [user.email_address for user in users]
+    for user in users:
+        user.active = False
+        db.session.add(user)
+
+        audit_event = AuditEvent(
+            audit_type=AuditTypes.update_user,
+            user='Notify callback',
+            data={"user": {"active": False}, "notify_callback_data": permanent_failures[user.email_address]},
+            db_object=user,
         )
+        db.session.add(audit_event)
 
-    return jsonify(status='ok'), 200
+    db.session.commit()
+
+    for email_address in deactivated_email_addresses:
+        current_app.logger.info(
+            f"User account disabled for {hash_string(email_address)} after Notify reported permanent delivery "
+            "failure."
+        )
@@ -1,10 +1,18 @@
 from flask import Blueprint
 
 from ..authentication import requires_authentication
+from ..models import load_json_read_only, reset_user_resolver
+from ..query_timeouts import set_default_query_timeouts
+from ..read_replicas import add_primary_lsn_header, route_reads_to_replica
 
 main = Blueprint('main', __name__)
 
 main.before_request(requires_authentication)
+main.before_request(route_reads_to_replica)
+main.before_request(reset_user_resolver)
+main.before_request(load_json_read_only)
+main.before_request(set_default_query_timeouts)
+main.after_request(add_primary_lsn_header)
 
 
 @main.after_request
@@ -19,6 +27,7 @@ from .views import (
     brief_responses,
     briefs,
     buyer_domains,
+    changes,
     direct_award,
     drafts,
     frameworks,
@@ -31,7 +31,7 @@ def create_framework_agreement():
 
     supplier_framework = SupplierFramework.find_by_supplier_and_framework(
         update_json['supplierId'], update_json['frameworkSlug']
-    ).first()
+    )
 
     if not supplier_framework or not supplier_framework.on_framework:
         abort(
@@ -41,9 +41,9 @@ def create_framework_agreement():
             )
         )
 
-    framework = Framework.query.filter(
-        Framework.slug == update_json['frameworkSlug']
-    ).first_or_404()
+    framework = Framework.find_by_slug(update_json['frameworkSlug'])
+    if framework is None:
+        abort(404)
 
     framework_agreement = FrameworkAgreement(
         supplier_id=update_json['supplierId'],
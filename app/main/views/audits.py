@@ -9,7 +9,7 @@ from dmutils.config import convert_to_boolean
 
 from .. import main
 from ... import db, models
-from ...models import AuditEvent
+from ...models import AuditEvent, AuditReviewQueueEntry
 from ...validation import is_valid_acknowledged_state
 from ...utils import (
     get_json_from_request,
@@ -45,6 +45,19 @@ AUDIT_OBJECT_ID_FIELDS = {
     "users": models.User.id,
 }
 
+# filters that can't be applied to an object's earliest event from the audit review queue, as they change which of its
+# events is the earliest
+REVIEW_QUEUE_INCOMPATIBLE_FILTERS = frozenset(('audit-date', 'user', 'data-supplier-id', 'data-draft-service-id'))
+
+
+def _can_use_review_queue(args):
+    return (
+        args.get('audit-type') in AuditReviewQueueEntry.REVIEWED_AUDIT_TYPES and
+        'acknowledged' in args and
+        convert_to_boolean(args['acknowledged']) is False and
+        not REVIEW_QUEUE_INCOMPATIBLE_FILTERS.intersection(args)
+    )
+
 
 @main.route('/audit-events', methods=['GET'])
 def list_audits():
@@ -55,8 +68,18 @@ def list_audits():
         abort(400, 'invalid page size supplied')
 
     earliest_for_each_object = convert_to_boolean(request.args.get('earliest_for_each_object'))
-
-    if earliest_for_each_object:
+    use_review_queue = earliest_for_each_object and _can_use_review_queue(request.args)
+
+    if use_review_queue:
+        # the queue already holds each object's earliest unacknowledged event, so the rest of the filters are only
+        # narrowing down which objects we want
+        audits = AuditEvent.query.join(
+            AuditReviewQueueEntry,
+            AuditReviewQueueEntry.earliest_audit_event_id == AuditEvent.id,
+        ).filter(
+            AuditReviewQueueEntry.audit_type == request.args['audit-type'],
+        )
+    elif earliest_for_each_object:
         # the rest of the filters we add will be added against a subquery which we will join back onto the main table
         # to retrieve the rest of the row. this allows the potentially expensive DISTINCT ON pass to be performed
         # against an absolutely minimal subset of rows which can probably be pulled straight from an index
@@ -155,18 +178,12 @@ def list_audits():
     elif object_id:
         abort(400, 'object-id cannot be provided without object-type')
 
-    if earliest_for_each_object:
-        if not (
-            acknowledged and
-            convert_to_boolean(acknowledged) is False and
-            audit_type == "update_service" and
-            object_type == "services"
-        ):
-            current_app.logger.warning(
-                "earliest_for_each_object option currently intended for use on acknowledged update_service events. "
-                "If use with any other events is to be regular, the scope of the corresponding partial index "
-                "should be expanded to cover it."
-            )
+    if earliest_for_each_object and not use_review_queue:
+        current_app.logger.warning(
+            "earliest_for_each_object option only served from the audit review queue for unacknowledged events of "
+            "reviewed audit types. If use with any other events is to be regular, the audit types reviewed should be "
+            "expanded to cover it."
+        )
         # we need to join the built-up subquery back onto the AuditEvent table to retrieve the rest of the row
         audits_subquery = audits.order_by(
             AuditEvent.object_type,
@@ -182,7 +199,14 @@ def list_audits():
 
     sort_order = db.desc if convert_to_boolean(request.args.get('latest_first')) else db.asc
     sort_by = getattr(AuditEvent, request.args.get('sort_by', 'created_at'))
-    audits = audits.order_by(sort_order(sort_by), sort_order(AuditEvent.id))
+    if use_review_queue and sort_by is AuditEvent.created_at:
+        # the same order, but one the queue's index can give us
+        audits = audits.order_by(
+            sort_order(AuditReviewQueueEntry.earliest_created_at),
+            sort_order(AuditReviewQueueEntry.earliest_audit_event_id),
+        )
+    else:
+        audits = audits.order_by(sort_order(sort_by), sort_order(AuditEvent.id))
 
     return paginated_result_response(
         result_name=RESOURCE_NAME,
@@ -190,7 +214,8 @@ def list_audits():
         page=page,
         per_page=per_page,
         endpoint='.list_audits',
-        request_args=request.args
+        request_args=request.args,
+        serialize_kwargs={"include_user": convert_to_boolean(request.args.get('include_user'))},
     ), 200
 
 
@@ -90,6 +90,7 @@ def create_brief_response():
             'supplierId': supplier.supplier_id,
         },
         db_object=brief_response,
+        payload_keys=('briefResponseJson',),
     )
 
     db.session.add(audit)
@@ -139,6 +140,7 @@ def update_brief_response(brief_response_id):
             'supplierId': supplier.supplier_id,
         },
         db_object=brief_response,
+        payload_keys=('briefResponseData',),
     )
 
     db.session.add(brief_response)
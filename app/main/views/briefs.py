@@ -5,7 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from dmapiclient.audit import AuditTypes
 from .. import main
 from ... import db
-from ...models import User, Brief, BriefResponse, AuditEvent, Framework, Lot, Supplier, Service
+from ...models import User, Brief, BriefResponse, AuditEvent, Framework, Lot, Supplier
 from ...utils import (
     get_int_or_400,
     get_json_from_request,
@@ -18,12 +18,30 @@ from ...utils import (
     purge_nulls_from_data,
     validate_and_return_updater_request,
 )
-from ...service_utils import validate_and_return_lot, filter_services
-from ...brief_utils import index_brief, validate_brief_data
+from ...response_cache import add_response_cache_tags, cached_response
+from ...service_utils import validate_and_return_lot
+from ...brief_utils import (
+    get_supplier_ids_eligible_for_brief,
+    get_supplier_services_eligible_for_brief,
+    index_brief,
+    validate_brief_data,
+)
 from ...validation import get_validation_errors
 
 RESOURCE_NAME = "briefs"
 
+# briefs close by themselves at their deadline, without anything changing to invalidate the cached list
+LIVE_BRIEFS_CACHE_TIMEOUT = 60
+
+
+def _is_live_briefs_listing():
+    """Whether a `GET /briefs` request lists only live briefs, without anything about their users"""
+    return (
+        request.args.get("status") == "live"
+        and not request.args.get("user_id")
+        and request.args.get("with_users", "false").lower() != "true"
+    )
+
 
 @main.route('/briefs', methods=['POST'])
 def create_brief():
@@ -127,7 +145,9 @@ def get_brief(brief_id):
 
 
 @main.route('/briefs', methods=['GET'])
+@cached_response(timeout=LIVE_BRIEFS_CACHE_TIMEOUT, when=_is_live_briefs_listing)
 def list_briefs():
+    add_response_cache_tags("brief", "framework", "lot", "brief_clarification_question")
     if request.args.get('human'):
         briefs = Brief.query.order_by(Brief.status_order, Brief.published_at.desc(), Brief.id)
     else:
@@ -537,17 +557,21 @@ def list_brief_services(brief_id):
         Supplier.supplier_id == supplier_id
     ).first_or_404()
 
-    services = filter_services(
-        framework_slugs=[brief.framework.slug],
-        statuses=["published"],
-        lot_slug=brief.lot.slug,
-        role=brief.data["specialistRole"] if brief.lot.slug == "digital-specialists" else None
-    )
-
-    services = services.filter(Service.supplier_id == supplier.supplier_id)
+    services = get_supplier_services_eligible_for_brief(supplier, brief)
     return list_result_response("services", services), 200
 
 
+@main.route("/briefs/<int:brief_id>/eligible-suppliers", methods=["GET"])
+def list_brief_eligible_suppliers(brief_id):
+    brief = Brief.query.filter(
+        Brief.id == brief_id
+    ).filter(
+        Brief.status != "draft"
+    ).first_or_404()
+
+    return jsonify(eligibleSuppliers=get_supplier_ids_eligible_for_brief(brief, request.args.get('location'))), 200
+
+
 @main.route('/briefs/<int:brief_id>/move-unsuccessful-brief-to-closed', methods=['POST'])
 def move_unsuccessful_brief_to_closed(brief_id):
     """
@@ -0,0 +1,39 @@
+from flask import abort, current_app, jsonify, request
+
+from .. import main
+from ...models import Change
+from ...utils import get_int_or_400, serialize_results, url_for
+
+
+@main.route('/changes', methods=['GET'])
+def list_changes():
+    """
+    Changes to services, suppliers, briefs, brief responses and frameworks after the change with id `since` (or from
+    the start), oldest first. Consumers should keep following `links.next`: it continues from the last change
+    returned, or stays put if there wasn't one.
+    """
+    since = get_int_or_400(request.args, 'since')
+    limit = get_int_or_400(request.args, 'limit')
+    page_size = current_app.config['DM_API_CHANGES_PAGE_SIZE']
+
+    if limit is None:
+        limit = page_size
+    elif not 1 <= limit <= page_size:
+        abort(400, "Invalid limit: must be between 1 and {}".format(page_size))
+
+    since_change = None if since is None else Change.query.get(since)
+    if since is not None and since_change is None:
+        # this database (e.g. a lagging read replica) doesn't have that change yet, so can't have any following it
+        changes = []
+    else:
+        changes = Change.query.following(since_change).limit(limit).all()
+
+    next_args = dict(request.args.items())
+    if changes:
+        next_args['since'] = changes[-1].id
+    links = {
+        'self': url_for('.list_changes', **request.args),
+        'next': url_for('.list_changes', **next_args),
+    }
+
+    return jsonify(changes=serialize_results(changes), links=links)
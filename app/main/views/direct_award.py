@@ -3,7 +3,6 @@ import datetime
 from flask import jsonify, abort, current_app, request
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import asc, desc
-from app import search_api_client
 from dmapiclient.audit import AuditTypes
 from dmutils.config import convert_to_boolean
 
@@ -11,6 +10,7 @@ from .. import main
 from ... import db
 from ...models import User, AuditEvent, ArchivedService, Outcome
 from ...models.direct_award import DirectAwardProject, DirectAwardSearch
+from ...search_utils import iter_search_result_pages
 from ...utils import (
     drop_all_other_fields,
     get_int_or_400,
@@ -356,18 +356,23 @@ def lock_project(project_external_id):
 
     now = datetime.datetime.utcnow()
 
-    service_ids = [service['id'] for service in search_api_client.search_services_from_url_iter(search.search_url,
-                                                                                                id_only=True)]
-
-    # We want the most recent ArchivedService for each service_id
-    archived_services = ArchivedService.query.\
-        filter(ArchivedService.service_id.in_(service_ids)).\
-        group_by(ArchivedService.id).\
-        order_by(ArchivedService.service_id, desc(ArchivedService.id)).\
-        distinct(ArchivedService.service_id).all()
+    # We want the most recent ArchivedService for each service_id, and look them up a page of search results at a time
+    # while the rest of the pages are still being fetched
+    archived_services = {}
+    for services in iter_search_result_pages(search.search_url, id_only=True):
+        archived_services.update(
+            (archived_service.service_id, archived_service)
+            for archived_service in ArchivedService.query.filter(
+                ArchivedService.service_id.in_([service['id'] for service in services])
+            ).order_by(
+                ArchivedService.service_id, desc(ArchivedService.id)
+            ).distinct(
+                ArchivedService.service_id
+            )
+        )
 
     search.searched_at = now
-    search.archived_services = archived_services
+    search.archived_services = [archived_services[service_id] for service_id in sorted(archived_services)]
     db.session.add(search)
 
     project.locked_at = now
@@ -26,6 +26,7 @@ from ...service_utils import (
     create_service_from_draft,
     get_service_validation_errors,
     index_service,
+    publish_submitted_drafts,
     update_and_validate_service,
     validate_and_return_related_objects,
     validate_service_data,
@@ -61,14 +62,14 @@ def copy_draft_service_from_existing_service(service_id):
         if questions_to_exclude and not isinstance(questions_to_exclude, (set, list, tuple)):
             raise TypeError("'questionsToExclude' must be a list, set or tuple")
 
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
 
     if target_framework_slug:
-        target_framework = Framework.query.filter(
-            Framework.slug == target_framework_slug
-        ).first_or_404()
+        target_framework = Framework.find_by_slug(target_framework_slug)
+        if target_framework is None:
+            abort(404)
         if not target_framework.status == 'open':
             abort(400, "Target framework is not open")
         target_framework_id = target_framework.id
@@ -148,9 +149,9 @@ def copy_published_from_framework(framework_slug, lot_slug):
     if questions_to_exclude and not isinstance(questions_to_exclude, list):
         abort(400, "Data error: 'questionsToExclude' must be a list")
 
-    target_framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    target_framework = Framework.find_by_slug(framework_slug)
+    if target_framework is None:
+        abort(404)
 
     if target_framework.status != 'open':
         abort(400, "Target framework is not open")
@@ -237,7 +238,13 @@ def edit_draft_service(draft_id):
     ).first_or_404()
 
     draft.update_from_json(update_json)
-    validate_service_data(draft, enforce_required=(draft.status == 'submitted'), required_fields=page_questions)
+    # an unsubmitted draft only needs the questions on this page and the ones being changed checking
+    validate_service_data(
+        draft,
+        enforce_required=(draft.status == 'submitted'),
+        required_fields=page_questions,
+        fields=set(update_json) | set(page_questions),
+    )
 
     audit = AuditEvent(
         audit_type=AuditTypes.update_draft_service,
@@ -248,7 +255,8 @@ def edit_draft_service(draft_id):
             "updateJson": update_json,
             "supplierId": draft.supplier_id,
         },
-        db_object=draft
+        db_object=draft,
+        payload_keys=("updateJson",),
     )
 
     db.session.add(draft)
@@ -285,9 +293,7 @@ def list_draft_services_by_supplier():
         services = services.filter(DraftService.service_id == service_id)
 
     if framework_slug:
-        framework = Framework.query.filter(
-            Framework.slug == framework_slug
-        ).first()
+        framework = Framework.find_by_slug(framework_slug)
         if not framework:
             abort(404, "framework '{}' not found".format(framework_slug))
         services = services.filter(DraftService.framework_id == framework.id)
@@ -308,9 +314,7 @@ def find_draft_services_by_framework(framework_slug):
     supplier_id = get_int_or_400(request.args, 'supplier_id')
     lot_slug = request.args.get('lot')
 
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first()
+    framework = Framework.find_by_slug(framework_slug)
     if not framework:
         abort(404, "Framework '{}' not found".format(framework_slug))
 
@@ -465,9 +469,9 @@ def publish_draft_service(draft_id):
         This was an alternative editing model proposed by @minglis way way back.
         We're not actually doing this anywhere, but it's tested and it looks like it works.
         """
-        service = Service.query.filter(
-            Service.service_id == draft.service_id
-        ).first_or_404()
+        service = Service.find_by_service_id(draft.service_id)
+        if service is None:
+            abort(404)
 
         service_from_draft = update_and_validate_service(service, draft.data)
     else:
@@ -495,6 +499,32 @@ def publish_draft_service(draft_id):
     return single_result_response(RESOURCE_NAME, service_from_draft), 200
 
 
+@main.route('/draft-services/<framework_slug>/<lot_slug>/publish', methods=['POST'])
+def publish_submitted_draft_services(framework_slug, lot_slug):
+    """
+    Publish all the submitted drafts on a framework's lot that haven't been published yet, as at framework go-live
+    :param framework_slug: The slug of the framework to publish drafts on
+    :param lot_slug: The slug of the lot to publish drafts on
+    :return: The count of published drafts, and the validation errors of any drafts which couldn't be
+    """
+    updater_json = validate_and_return_updater_request()
+
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404, "Framework '{}' does not exist".format(framework_slug))
+
+    lot = framework.get_lot(lot_slug)
+    if lot is None:
+        abort(404, "Incorrect lot '{}' for framework '{}'".format(lot_slug, framework_slug))
+
+    published, failures = publish_submitted_drafts(framework, lot, updater_json['updated_by'])
+
+    return jsonify(
+        publishedCount=published,
+        failedDrafts=[{"draftId": draft_id, "errors": errors} for draft_id, errors in failures.items()],
+    ), 200
+
+
 @main.route('/draft-services', methods=['POST'])
 def create_new_draft_service():
     """
@@ -16,18 +16,23 @@ from ...models import (
     Lot,
     Supplier,
     SupplierFramework,
+    SupplierFrameworkApplication,
     User,
     Brief,
 )
+from ...query_timeouts import EXPORT_STATEMENT_TIMEOUT_MS, query_timeouts
+from ...response_cache import add_response_cache_tags, cached_response
 from ...utils import (
     get_json_from_request,
     json_has_required_keys,
     json_only_has_required_keys,
     list_result_response,
+    result_meta,
     single_result_response,
     validate_and_return_updater_request,
 )
 from ...framework_utils import validate_framework_agreement_details_data, format_framework_integrity_error_message
+from ...supplier_utils import get_declaration_fields_or_400
 
 RESOURCE_NAME = "frameworks"
 FRAMEWORK_UPDATE_WHITELISTED_ATTRIBUTES_MAP = {
@@ -47,7 +52,9 @@ FRAMEWORK_UPDATE_WHITELISTED_ATTRIBUTES_MAP = {
 
 
 @main.route('/frameworks', methods=['GET'])
+@cached_response()
 def list_frameworks():
+    add_response_cache_tags("framework", "lot")
     return list_result_response(RESOURCE_NAME, Framework.query), 200
 
 
@@ -107,20 +114,22 @@ def create_framework():
 
 
 @main.route('/frameworks/<string:framework_slug>', methods=['GET'])
+@cached_response()
 def get_framework(framework_slug):
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
+    add_response_cache_tags(f"framework:{framework.id}", "lot")
     return single_result_response(RESOURCE_NAME, framework), 200
 
 
 @main.route('/frameworks/<string:framework_slug>', methods=['POST'])
 def update_framework(framework_slug):
     updater_json = validate_and_return_updater_request()
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     json_payload = get_json_from_request()
     json_has_required_keys(json_payload, ['frameworks'])
@@ -184,9 +193,9 @@ def update_framework(framework_slug):
 
 @main.route('/frameworks/<string:framework_slug>/stats', methods=['GET'])
 def get_framework_stats(framework_slug):
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     seven_days_ago = datetime.datetime.utcnow() + datetime.timedelta(-7)
 
@@ -255,15 +264,27 @@ def get_framework_stats(framework_slug):
             ).group_by(
                 SupplierFramework.declaration['status'].astext, drafts_alias.supplier_id.isnot(None)
             ).all()
-        )
+        ),
+        'applications': label_columns(
+            ['application_status', 'application_result', 'count'],
+            db.session.query(
+                SupplierFrameworkApplication.application_status,
+                SupplierFrameworkApplication.application_result,
+                func.count(),
+            ).filter(
+                SupplierFrameworkApplication.framework_id == framework.id
+            ).group_by(
+                SupplierFrameworkApplication.application_status, SupplierFrameworkApplication.application_result
+            ).all()
+        ),
     }), 200
 
 
 @main.route('/frameworks/<string:framework_slug>/suppliers', methods=['GET'])
 def get_framework_suppliers(framework_slug):
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     # we're going to need an "alias" for the current_framework_agreement join
     # so that we can refer to it in later clauses
@@ -308,6 +329,23 @@ def get_framework_suppliers(framework_slug):
             cfa.status.in_(status.split(","))
         )
 
+    declaration_fields = get_declaration_fields_or_400(request.args)
+    if declaration_fields is not None:
+        # only the declaration fields asked for are fetched from the database
+        supplier_frameworks = supplier_frameworks.options(
+            orm.defer(SupplierFramework.declaration)
+        ).add_columns(
+            SupplierFramework.declaration_fields_expression(declaration_fields)
+        ).all()
+
+        return jsonify(
+            meta=result_meta(len(supplier_frameworks)),
+            supplierFrameworks=[
+                supplier_framework.serialize(with_declaration=False, data={"declaration": declaration})
+                for supplier_framework, declaration in supplier_frameworks
+            ],
+        ), 200
+
     with_declarations = convert_to_boolean(request.args.get("with_declarations", "true"))
 
     return list_result_response(
@@ -318,23 +356,64 @@ def get_framework_suppliers(framework_slug):
 
 
 @main.route('/frameworks/<string:framework_slug>/interest', methods=['GET'])
+@query_timeouts(statement_timeout=EXPORT_STATEMENT_TIMEOUT_MS)
 def get_framework_interest(framework_slug):
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
-    supplier_frameworks = SupplierFramework.query.filter(
+    supplier_frameworks = db.session.query(
+        SupplierFramework.supplier_id
+    ).filter(
         SupplierFramework.framework_id == framework.id
-    ).options(
-        db.defaultload(SupplierFramework.framework).lazyload("*"),
-        db.defaultload(SupplierFramework.supplier).lazyload("*"),
-        db.defaultload(SupplierFramework.prefill_declaration_from_framework).lazyload("*"),
-        db.lazyload(SupplierFramework.framework_agreements),
-    ).order_by(SupplierFramework.supplier_id).all()
+    ).order_by(SupplierFramework.supplier_id)
 
-    supplier_ids = [supplier_framework.supplier_id for supplier_framework in supplier_frameworks]
+    declaration_fields = get_declaration_fields_or_400(request.args)
+    if declaration_fields is not None:
+        supplier_frameworks = supplier_frameworks.add_columns(
+            SupplierFramework.declaration_fields_expression(declaration_fields)
+        ).all()
+
+        return jsonify(
+            interestedSuppliers=[supplier_id for supplier_id, _ in supplier_frameworks],
+            declarations={str(supplier_id): declaration for supplier_id, declaration in supplier_frameworks},
+        ), 200
+
+    return jsonify(interestedSuppliers=[supplier_id for supplier_id, in supplier_frameworks]), 200
+
+
+@main.route('/frameworks/<string:framework_slug>/applications', methods=['GET'])
+@query_timeouts(statement_timeout=EXPORT_STATEMENT_TIMEOUT_MS)
+def get_framework_applications(framework_slug):
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
+
+    applications = SupplierFrameworkApplication.query.filter(
+        SupplierFrameworkApplication.framework_id == framework.id
+    ).options(
+        db.defaultload(SupplierFrameworkApplication.supplier).lazyload("*"),
+        db.defaultload(SupplierFrameworkApplication.framework).lazyload("*"),
+    ).order_by(
+        SupplierFrameworkApplication.supplier_id
+    )
 
-    return jsonify(interestedSuppliers=supplier_ids), 200
+    for arg, column in (
+        ('declaration_status', SupplierFrameworkApplication.declaration_status),
+        ('application_status', SupplierFrameworkApplication.application_status),
+        ('application_result', SupplierFrameworkApplication.application_result),
+    ):
+        values = request.args.get(arg)
+        if values is not None:
+            applications = applications.filter(column.in_(values.split(",")))
+
+    if request.args.get('framework_agreement') is not None:
+        framework_agreement = convert_to_boolean(request.args['framework_agreement'])
+        if not isinstance(framework_agreement, bool):
+            abort(400, "'framework_agreement' must be a boolean")
+        applications = applications.filter(SupplierFrameworkApplication.framework_agreement.is_(framework_agreement))
+
+    return list_result_response("applications", applications), 200
 
 
 @main.route('/frameworks/transition-dos/<string:framework_slug>', methods=['POST'])
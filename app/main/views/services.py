@@ -31,6 +31,7 @@ from ...service_utils import (
     validate_and_return_service_request,
     validate_service_data,
 )
+from ...response_cache import add_response_cache_tags, cached_response
 from .audits import acknowledge_including_previous
 
 RESOURCE_NAME = "services"
@@ -146,9 +147,9 @@ def update_service(service_id):
 
     is_valid_service_id_or_400(service_id)
 
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
 
     update_details = validate_and_return_updater_request()
     update = validate_and_return_service_request(service_id)
@@ -185,9 +186,9 @@ def revert_service(service_id):
         Revert a service's `data` to that of a previous, supplied archivedServiceId
     """
 
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
 
     update_details = validate_and_return_updater_request()
     payload_json = get_json_from_request()
@@ -230,9 +231,7 @@ def import_service(service_id):
     """
     is_valid_service_id_or_400(service_id)
 
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first()
+    service = Service.find_by_service_id(service_id)
 
     if service is not None:
         abort(400, "Cannot update service by PUT")
@@ -262,10 +261,18 @@ def import_service(service_id):
 
 
 @main.route('/services/<string:service_id>', methods=['GET'])
+@cached_response()
 def get_service(service_id):
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
+
+    add_response_cache_tags(
+        f"service:{service.service_id}",
+        f"supplier:{service.supplier_id}",
+        f"framework:{service.framework_id}",
+        "lot",
+    )
 
     service_made_unavailable_audit_event = None
     service_is_unavailable = False
@@ -331,9 +338,9 @@ def update_service_status(service_id, status):
 
     is_valid_service_id_or_400(service_id)
 
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
 
     if status not in valid_statuses:
         valid_statuses_single_quotes = display_list(
@@ -366,9 +373,9 @@ def update_service_status(service_id, status):
 
 @main.route('/services/<service_id>/updates/acknowledge', methods=['POST'])
 def acknowledge_update_events(service_id):
-    service = Service.query.filter(
-        Service.service_id == service_id
-    ).first_or_404()
+    service = Service.find_by_service_id(service_id)
+    if service is None:
+        abort(404)
 
     payload_json = get_json_from_request()
     json_only_has_required_keys(payload_json, ("updated_by", "latestAuditEventId",))
@@ -1,8 +1,9 @@
+from collections import defaultdict
 from datetime import datetime
 
 from flask import jsonify, abort, request, current_app
 from itertools import groupby
-from sqlalchemy import func
+from sqlalchemy import func, text
 from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy.sql.expression import or_ as sql_or
 from sqlalchemy.orm import lazyload
@@ -13,15 +14,26 @@ from dmutils.formats import DATETIME_FORMAT
 from .. import main
 from ... import db
 from ...supplier_utils import (
-    company_details_confirmed_if_required_for_framework,
+    get_declaration_fields_or_400,
     update_open_declarations_with_company_details,
 )
-from ...models import Supplier, ContactInformation, AuditEvent, Service, SupplierFramework, Framework, User
+from ...models import (
+    AuditEvent,
+    ContactInformation,
+    Framework,
+    Service,
+    Supplier,
+    SupplierFramework,
+    SupplierFrameworkApplication,
+    SupplierLiveServiceCount,
+    User,
+)
 from ...validation import (
     is_valid_string_or_400,
     validate_contact_information_json_or_400,
     validate_supplier_json_or_400,
 )
+from ...query_timeouts import EXPORT_STATEMENT_TIMEOUT_MS, query_timeouts
 from ...utils import (
     drop_foreign_fields,
     get_json_from_request,
@@ -47,12 +59,16 @@ def list_suppliers():
 
     name = request.args.get('name', '')
 
+    search = request.args.get('search', '')
+
     framework = request.args.get('framework')
 
     duns_number = request.args.get('duns_number')
 
     company_registration_number = request.args.get('company_registration_number')
 
+    suppliers = Supplier.query
+
     if framework:
         is_valid_string_or_400(framework)
 
@@ -60,15 +76,11 @@ def list_suppliers():
         if framework == 'gcloud':
             framework = 'g-cloud'
 
-        suppliers = Supplier.query.join(
-            Service.supplier, Service.framework
+        suppliers = suppliers.join(
+            SupplierLiveServiceCount, SupplierLiveServiceCount.supplier_id == Supplier.supplier_id
         ).filter(
-            Framework.status == 'live',
-            Framework.framework == framework,
-            Service.status == 'published'
-        ).order_by(Supplier.name, Supplier.supplier_id)
-    else:
-        suppliers = Supplier.query.order_by(Supplier.name, Supplier.supplier_id)
+            SupplierLiveServiceCount.framework_family == framework
+        )
 
     # Can search by either DUNS or Company Registration number but not both
     if duns_number:
@@ -83,6 +95,7 @@ def list_suppliers():
             Supplier.companies_house_number == company_registration_number
         )
 
+    # the prefix, name and search filters below are all served by the suppliers' pg_trgm indexes
     if prefix:
         if prefix == 'other':
             suppliers = suppliers.filter(
@@ -100,7 +113,26 @@ def list_suppliers():
             )
         )
 
-    suppliers = suppliers.distinct(Supplier.name, Supplier.supplier_id)
+    if search:
+        # typo-tolerant search, ranking suppliers by how closely `search` matches a word sequence in their name or
+        # registered name. the `%>` operator only uses the index with a threshold set through this setting.
+        db.session.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {'threshold': str(current_app.config['DM_API_SUPPLIER_SEARCH_SIMILARITY_THRESHOLD'])},
+        )
+        suppliers = suppliers.filter(
+            sql_or(
+                Supplier.name.op('%>')(search),
+                Supplier.registered_name.op('%>')(search)
+            )
+        ).order_by(
+            func.greatest(
+                func.word_similarity(search, Supplier.name),
+                func.word_similarity(search, Supplier.registered_name),
+            ).desc()
+        )
+
+    suppliers = suppliers.order_by(Supplier.name, Supplier.supplier_id)
 
     try:
         return paginated_result_response(
@@ -116,9 +148,10 @@ def list_suppliers():
 
 
 @main.route('/suppliers/export/<framework_slug>', methods=['GET'])
+@query_timeouts(statement_timeout=EXPORT_STATEMENT_TIMEOUT_MS)
 def export_suppliers_for_framework(framework_slug):
     # 400 if framework slug is invalid
-    framework = Framework.query.filter(Framework.slug == framework_slug).first()
+    framework = Framework.find_by_slug(framework_slug)
     if not framework:
         abort(400, 'invalid framework')
 
@@ -151,48 +184,36 @@ def export_suppliers_for_framework(framework_slug):
         )
     }
 
+    declaration_fields = get_declaration_fields_or_400(request.args)
+    declaration_columns = []
+    if declaration_fields is not None:
+        declaration_columns.append(SupplierFramework.declaration_fields_expression(declaration_fields))
+
+    # the declarations themselves aren't needed, only any fields asked for - the rest of each application is worked
+    # out by the database
     suppliers_and_framework = db.session.query(
-        SupplierFramework, Supplier, ContactInformation
+        SupplierFrameworkApplication, Supplier, ContactInformation, *declaration_columns
     ).filter(
-        SupplierFramework.supplier_id == Supplier.supplier_id
+        SupplierFrameworkApplication.supplier_id == Supplier.supplier_id
     ).filter(
-        SupplierFramework.framework_id == framework.id
+        SupplierFrameworkApplication.framework_id == framework.id
     ).filter(
         ContactInformation.supplier_id == Supplier.supplier_id
     ).options(
-        lazyload(SupplierFramework.framework),
-        lazyload(SupplierFramework.prefill_declaration_from_framework),
-        lazyload(SupplierFramework.framework_agreements),
+        lazyload(SupplierFrameworkApplication.supplier),
+        lazyload(SupplierFrameworkApplication.framework),
     ).order_by(
         Supplier.supplier_id
-    ).all()
+    )
+    if declaration_fields is not None:
+        suppliers_and_framework = suppliers_and_framework.filter(
+            SupplierFramework.supplier_id == SupplierFrameworkApplication.supplier_id,
+            SupplierFramework.framework_id == SupplierFrameworkApplication.framework_id,
+        )
 
     supplier_rows = []
 
-    suppliers_with_a_complete_service = frozenset(framework.get_supplier_ids_for_completed_service())
-
-    for sf, supplier, ci in suppliers_and_framework:
-        declaration_status = sf.declaration.get('status') if sf.declaration else 'unstarted'
-
-        # This `application_status` logic also exists in users.export_users_for_framework
-        application_status = 'application' if (
-            declaration_status == 'complete' and
-            supplier.supplier_id in suppliers_with_a_complete_service and
-            company_details_confirmed_if_required_for_framework(framework_slug, sf)
-        ) else 'no_application'
-
-        application_result = ''
-        framework_agreement = False
-        variations_agreed = ''
-
-        if framework.status != 'open':
-            if sf.on_framework is None:
-                application_result = 'no result'
-            else:
-                application_result = 'pass' if sf.on_framework else 'fail'
-            framework_agreement = bool(getattr(sf.current_framework_agreement, 'signed_agreement_returned_at', None))
-            variations_agreed = ', '.join(sf.agreed_variations.keys()) if sf.agreed_variations else ''
-
+    for application, supplier, ci, *declaration in suppliers_and_framework.all():
         supplier_rows.append({
             "supplier_id": supplier.supplier_id,
             "supplier_name": supplier.name,
@@ -201,11 +222,11 @@ def export_suppliers_for_framework(framework_slug):
             "registered_name": supplier.registered_name,
             "companies_house_number": supplier.companies_house_number,
             "other_company_registration_number": supplier.other_company_registration_number,
-            'application_result': application_result,
-            'application_status': application_status,
-            'declaration_status': declaration_status,
-            'framework_agreement': framework_agreement,
-            'variations_agreed': variations_agreed,
+            'application_result': application.application_result,
+            'application_status': application.application_status,
+            'declaration_status': application.declaration_status,
+            'framework_agreement': application.framework_agreement,
+            'variations_agreed': application.variations_agreed,
             "published_services_count": {
                 lot_slugs_by_id[lot_id]: service_counts_by_lot_by_supplier.get(
                     supplier.supplier_id, {}
@@ -222,6 +243,8 @@ def export_suppliers_for_framework(framework_slug):
                 'address_country': supplier.registration_country,
             }
         })
+        if declaration_fields is not None:
+            supplier_rows[-1]["declaration"] = declaration[0]
 
     return jsonify(suppliers=supplier_rows), 200
 
@@ -453,10 +476,8 @@ def remove_contact_information_personal_data(supplier_id, contact_id):
 @main.route('/suppliers/<int:supplier_id>/frameworks/<framework_slug>/declaration', methods=["PUT", "PATCH"])
 def set_a_declaration(supplier_id, framework_slug):
     supplier_framework = SupplierFramework.find_by_supplier_and_framework(
-        supplier_id, framework_slug
-    ).options(
-        lazyload('*')
-    ).with_for_update().first()
+        supplier_id, framework_slug, for_update=True
+    )
 
     if supplier_framework is not None:
         status_code = 200 if supplier_framework.declaration else 201
@@ -506,6 +527,7 @@ def set_a_declaration(supplier_id, framework_slug):
                 "update": request_data["declaration"],
                 "supplierId": supplier_id,
             },
+            payload_keys=("update",),
         )
     )
 
@@ -531,9 +553,9 @@ def remove_a_declaration(framework_slug, supplier_id):
     :rtype: Response
     """
     updater_json = validate_and_return_updater_request()
-    supplier_framework = SupplierFramework.find_by_supplier_and_framework(
-        supplier_id, framework_slug
-    ).first_or_404()
+    supplier_framework = SupplierFramework.find_by_supplier_and_framework(supplier_id, framework_slug)
+    if supplier_framework is None:
+        abort(404)
 
     supplier_framework.declaration = {}
 
@@ -557,17 +579,13 @@ def remove_a_declaration(framework_slug, supplier_id):
 
 @main.route('/suppliers/<int:supplier_id>/frameworks/interest', methods=['GET'])
 def get_registered_frameworks(supplier_id):
-    supplier_frameworks = SupplierFramework.query.filter(
+    slugs = db.session.query(Framework.slug).join(
+        SupplierFramework, SupplierFramework.framework_id == Framework.id
+    ).filter(
         SupplierFramework.supplier_id == supplier_id
     ).all()
-    slugs = []
-    for framework in supplier_frameworks:
-        framework = Framework.query.filter(
-            Framework.id == framework.framework_id
-        ).first()
-        slugs.append(framework.slug)
 
-    return jsonify(frameworks=slugs), 200
+    return jsonify(frameworks=[slug for slug, in slugs]), 200
 
 
 @main.route('/suppliers/<int:supplier_id>/frameworks', methods=['GET'])
@@ -592,13 +610,48 @@ def get_supplier_frameworks_info(supplier_id):
     ), 200
 
 
+@main.route('/suppliers/<int:supplier_id>/dashboard', methods=['GET'])
+def get_supplier_dashboard(supplier_id):
+    """
+    Everything the supplier dashboard shows - the supplier, its framework interests with their service counts and
+    the slugs of those frameworks - in a fixed number of queries however many frameworks the supplier is on.
+    """
+    supplier = Supplier.query.filter(
+        Supplier.supplier_id == supplier_id
+    ).first_or_404()
+
+    counts, live_service_counts = {}, defaultdict(int)
+    for framework_id, framework_name, framework_status, kind, status, count in \
+            SupplierFramework.get_framework_service_counts(supplier_id):
+        counts[(framework_id, kind, status)] = count
+        if (kind, status, framework_status) == ("services", "published", "live"):
+            live_service_counts[framework_name] += count
+
+    supplier_frameworks = SupplierFramework.query.filter(
+        SupplierFramework.supplier_id == supplier_id
+    ).order_by(
+        SupplierFramework.framework_id
+    ).all()
+
+    return jsonify(
+        suppliers=supplier.serialize({"service_counts": live_service_counts}),
+        frameworkInterest=[
+            supplier_framework.serialize({
+                'drafts_count': counts.get((supplier_framework.framework_id, "drafts", 'not-submitted'), 0),
+                'complete_drafts_count': counts.get((supplier_framework.framework_id, "drafts", 'submitted'), 0),
+                'services_count': counts.get((supplier_framework.framework_id, "services", 'published'), 0),
+            })
+            for supplier_framework in supplier_frameworks
+        ],
+        frameworks=[supplier_framework.framework.slug for supplier_framework in supplier_frameworks],
+    ), 200
+
+
 @main.route('/suppliers/<int:supplier_id>/frameworks/<framework_slug>', methods=['GET'])
 def get_supplier_framework_info(supplier_id, framework_slug):
     supplier_framework = SupplierFramework.find_by_supplier_and_framework(
-        supplier_id, framework_slug
-    ).options(
-        lazyload('*')
-    ).first()
+        supplier_id, framework_slug, lazyload_relationships=True
+    )
 
     if supplier_framework is None:
         abort(404)
@@ -613,9 +666,9 @@ def get_supplier_framework_info(supplier_id, framework_slug):
 @main.route('/suppliers/<int:supplier_id>/frameworks/<framework_slug>', methods=['PUT'])
 def register_framework_interest(supplier_id, framework_slug):
 
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     supplier = Supplier.query.filter(
         Supplier.supplier_id == supplier_id
@@ -662,9 +715,9 @@ def register_framework_interest(supplier_id, framework_slug):
 
 @main.route('/suppliers/<int:supplier_id>/frameworks/<framework_slug>', methods=['POST'])
 def update_supplier_framework(supplier_id, framework_slug):
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     supplier = Supplier.query.filter(
         Supplier.supplier_id == supplier_id
@@ -760,9 +813,9 @@ def update_supplier_framework(supplier_id, framework_slug):
 @main.route('/suppliers/<int:supplier_id>/frameworks/<framework_slug>/variation/<variation_slug>', methods=['PUT'])
 def agree_framework_variation(supplier_id, framework_slug, variation_slug):
 
-    framework = Framework.query.filter(
-        Framework.slug == framework_slug
-    ).first_or_404()
+    framework = Framework.find_by_slug(framework_slug)
+    if framework is None:
+        abort(404)
 
     supplier = Supplier.query.filter(
         Supplier.supplier_id == supplier_id
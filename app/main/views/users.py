@@ -9,14 +9,22 @@ from flask import abort, current_app, jsonify, request
 
 from dmutils.config import convert_to_boolean
 from dmutils.email.helpers import hash_string
+from dmutils.formats import DATE_FORMAT
 
 from .. import main
 from ... import db, encryption
-from ...models import AuditEvent, BuyerEmailDomain, Framework, Service, Supplier, SupplierFramework, User
-from ...supplier_utils import (
-    check_supplier_role,
-    company_details_confirmed_if_required_for_framework,
+from ...models import (
+    AuditEvent,
+    BuyerEmailDomain,
+    Framework,
+    Service,
+    Supplier,
+    SupplierFrameworkApplication,
+    User,
 )
+from ...supplier_utils import check_supplier_role
+from ...query_timeouts import EXPORT_STATEMENT_TIMEOUT_MS, query_timeouts
+from ...user_utils import create_users, remove_dormant_personal_data
 from ...utils import (
     get_json_from_request,
     get_valid_page_or_1,
@@ -46,14 +54,9 @@ def auth_user():
     json_payload = json_payload["authUsers"]
     validate_user_auth_json_or_400(json_payload)
 
-    user = User.query.filter(
-        User.email_address == json_payload['emailAddress'].lower()
-    ).options(
-        # specifying a lazyload here to satisfy the FOR UPDATE OF's limitations, but inevitably the supplier
-        # will be fetched on-demand when the result comes to be serialized.
-        # the FOR UPDATE lock is required to prevent a race condition when incrementing user.failed_login_count
-        lazyload(User.supplier),
-    ).with_for_update(of=User).first()
+    # the FOR UPDATE lock is required to prevent a race condition when incrementing user.failed_login_count. the
+    # supplier is left to be fetched on-demand when the result comes to be serialized.
+    user = User.find_by_email_address(json_payload['emailAddress'].lower(), for_update=True)
 
     if user is None:
         # 'Authenticate' an inactive, unlocked user and ignore the result, to mitigate against timing attacks.
@@ -119,9 +122,9 @@ def list_users():
     if email_address:
         if not is_valid_email_address(email_address):
             abort(400, "email_address must be a valid email address")
-        single_user = user_query.filter(
-            User.email_address == email_address.lower()
-        ).first_or_404()
+        single_user = User.find_by_email_address(email_address.lower())
+        if single_user is None:
+            abort(404)
         return jsonify(
             users=[single_user.serialize()]
         )
@@ -178,8 +181,7 @@ def create_user():
     json_payload = json_payload["users"]
     validate_user_json_or_400(json_payload)
 
-    user = User.query.filter(
-        User.email_address == json_payload['emailAddress'].lower()).first()
+    user = User.find_by_email_address(json_payload['emailAddress'].lower())
 
     if user:
         abort(409, "User already exists")
@@ -241,6 +243,29 @@ def create_user():
     return single_result_response(RESOURCE_NAME, user), 201
 
 
+@main.route('/users/bulk', methods=['POST'])
+def create_users_in_bulk():
+    json_payload = get_json_from_request()
+    json_has_required_keys(json_payload, ["users"])
+    users_json = json_payload["users"]
+    if not isinstance(users_json, list):
+        abort(400, "'users' must be a list")
+
+    limit = current_app.config['DM_API_BULK_CREATE_USERS_LIMIT']
+    if len(users_json) > limit:
+        abort(400, "Too many users: at most {} can be created at once".format(limit))
+
+    created, failures = create_users(users_json)
+
+    return jsonify(
+        createdUsers=[
+            {"index": index, "id": user_id, "emailAddress": email_address}
+            for index, user_id, email_address in created
+        ],
+        failedUsers=[{"index": index, "error": error} for index, error in sorted(failures.items())],
+    ), 200
+
+
 @main.route('/users/<int:user_id>', methods=['POST'])
 def update_user(user_id):
     """
@@ -349,19 +374,50 @@ def remove_user_personal_data(user_id):
     return single_result_response(RESOURCE_NAME, user), 200
 
 
+@main.route('/users/remove-dormant-personal-data', methods=['POST'])
+def remove_dormant_users_personal_data():
+    """ Remove personal data from every user who hasn't logged in since a date, and then from the contact information
+    of suppliers left with no users who have any. See `app.user_utils.remove_dormant_personal_data`.
+
+    This is for our retention strategy (3 years). With `dryRun` nothing is changed, and the response just says how
+    many users and contact information entries would have been.
+    """
+    updater_json = validate_and_return_updater_request()
+    json_payload = get_json_from_request()
+    json_has_required_keys(json_payload, ["loggedInBefore"])
+
+    try:
+        logged_in_before = datetime.strptime(json_payload["loggedInBefore"], DATE_FORMAT)
+    except (TypeError, ValueError):
+        abort(400, "'loggedInBefore' must be a date like YYYY-MM-DD")
+
+    active = json_payload.get("active")
+    dry_run = json_payload.get("dryRun", False)
+    if active not in (None, True, False) or dry_run not in (True, False):
+        abort(400, "'active' and 'dryRun' must be booleans")
+
+    users_count, contact_information_count = remove_dormant_personal_data(
+        logged_in_before, updater_json["updated_by"], active=active, dry_run=dry_run
+    )
+
+    return jsonify(
+        dryRun=dry_run,
+        personalDataRemoved={"users": users_count, "contactInformation": contact_information_count},
+    ), 200
+
+
 @main.route('/users/export/<framework_slug>', methods=['GET'])
+@query_timeouts(statement_timeout=EXPORT_STATEMENT_TIMEOUT_MS)
 def export_users_for_framework(framework_slug):
 
     # 400 if framework slug is invalid
-    framework = Framework.query.filter(Framework.slug == framework_slug).first()
+    framework = Framework.find_by_slug(framework_slug)
     if not framework:
         abort(400, 'invalid framework')
 
     if framework.status == 'coming':
         abort(400, 'framework not yet open')
 
-    suppliers_with_a_complete_service = frozenset(framework.get_supplier_ids_for_completed_service())
-
     supplier_id_published_service_count = dict(db.session.query(
         Service.supplier_id,
         func.count(Service.id)
@@ -372,63 +428,38 @@ def export_users_for_framework(framework_slug):
         Service.supplier_id
     ).all())
 
-    supplier_frameworks_and_users = db.session.query(
-        SupplierFramework, User
+    applications_and_users = db.session.query(
+        SupplierFrameworkApplication, User
     ).filter(
-        SupplierFramework.supplier_id == User.supplier_id
+        SupplierFrameworkApplication.supplier_id == User.supplier_id
     ).filter(
-        SupplierFramework.framework_id == framework.id
+        SupplierFrameworkApplication.framework_id == framework.id
     ).filter(
         User.active.is_(True)
     ).options(
         lazyload(User.supplier),
-        lazyload(SupplierFramework.supplier),
-        lazyload(SupplierFramework.framework),
-        lazyload(SupplierFramework.prefill_declaration_from_framework),
-        lazyload(SupplierFramework.framework_agreements),
+        lazyload(SupplierFrameworkApplication.supplier),
+        lazyload(SupplierFrameworkApplication.framework),
     ).order_by(
-        SupplierFramework.supplier_id,
+        SupplierFrameworkApplication.supplier_id,
         User.id,
     ).all()
 
     user_rows = []
 
-    for sf, u in supplier_frameworks_and_users:
-
-        # always get the declaration status
-        declaration_status = sf.declaration.get('status') if sf.declaration else 'unstarted'
-
-        # This `application_status` logic also exists in suppliers.export_suppliers_for_framework
-        application_status = 'application' if (
-            declaration_status == 'complete' and
-            sf.supplier_id in suppliers_with_a_complete_service and
-            company_details_confirmed_if_required_for_framework(framework_slug, sf)
-        ) else 'no_application'
-
-        application_result = ''
-        framework_agreement = ''
-        variations_agreed = ''
-
-        # if framework is pending, live, or expired
-        if framework.status != 'open':
-            if sf.on_framework is None:
-                application_result = 'no result'
-            else:
-                application_result = 'pass' if sf.on_framework else 'fail'
-            framework_agreement = bool(getattr(sf.current_framework_agreement, 'signed_agreement_returned_at', None))
-            variations_agreed = ', '.join(sf.agreed_variations.keys()) if sf.agreed_variations else ''
-
+    for application, u in applications_and_users:
         user_rows.append({
             'email address': u.email_address,
             'user_name': u.name,
             'user_research_opted_in': u.user_research_opted_in,
-            'supplier_id': sf.supplier_id,
-            'declaration_status': declaration_status,
-            'application_status': application_status,
-            'framework_agreement': framework_agreement,
-            'application_result': application_result,
-            'variations_agreed': variations_agreed,
-            'published_service_count': supplier_id_published_service_count.get(sf.supplier_id, 0)
+            'supplier_id': application.supplier_id,
+            'declaration_status': application.declaration_status,
+            'application_status': application.application_status,
+            # blank rather than false until the framework has stopped taking applications
+            'framework_agreement': application.framework_agreement if framework.status != 'open' else '',
+            'application_result': application.application_result,
+            'variations_agreed': application.variations_agreed,
+            'published_service_count': supplier_id_published_service_count.get(application.supplier_id, 0)
         })
 
     return jsonify(users=user_rows), 200
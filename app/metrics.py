@@ -1,9 +1,85 @@
+from collections import Counter
+
 from flask import Blueprint
 from dmutils.metrics import DMGDSMetrics
+from prometheus_client import Counter as PrometheusCounter, Gauge
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from . import db
 
 
 metrics = Blueprint('metrics', __name__)
 
 gds_metrics = DMGDSMetrics()
 
-metrics.add_url_rule(gds_metrics.metrics_path, 'metrics', gds_metrics.metrics_endpoint)
+
+def metrics_endpoint():
+    # sampled here rather than as statements are compiled, so that executing them doesn't pay for it
+    get_statement_cache_stats(db.engine)
+    return gds_metrics.metrics_endpoint()
+
+
+metrics.add_url_rule(gds_metrics.metrics_path, 'metrics', metrics_endpoint)
+
+
+SQL_STATEMENT_CACHE_LOOKUPS_TOTAL = PrometheusCounter(
+    'sql_statement_cache_lookups_total',
+    "Statements executed, by whether their compiled SQL was found in SQLAlchemy's statement cache",
+    ['result'],
+)
+SQL_STATEMENT_CACHE_SIZE = Gauge(
+    'sql_statement_cache_size',
+    "Compiled statements in each process's SQLAlchemy statement cache",
+    multiprocess_mode='liveall',
+)
+SQL_QUERY_TIMEOUTS_TOTAL = PrometheusCounter(
+    'sql_query_timeouts_total',
+    "Requests whose database queries ran, or waited for a lock, for longer than allowed (see app.query_timeouts)",
+    ['endpoint', 'timeout'],
+)
+RESPONSE_CACHE_LOOKUPS_TOTAL = PrometheusCounter(
+    'response_cache_lookups_total',
+    "Requests to cached views, by whether a fresh response was found in the response cache (see app.response_cache)",
+    ['endpoint', 'result'],
+)
+
+# this process's own lookups, for `get_statement_cache_stats`
+_statement_cache_lookups = Counter()
+
+
+def _get_statement_cache_result(context):
+    if context.cache_hit is CACHE_HIT:
+        return 'hit'
+    elif context.cache_hit is CACHE_MISS:
+        return 'miss'
+    # textual SQL and statements that can't be cached
+    return 'uncached'
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_statement_cache_lookup(conn, cursor, statement, parameters, context, executemany):
+    result = _get_statement_cache_result(context)
+    _statement_cache_lookups[result] += 1
+    SQL_STATEMENT_CACHE_LOOKUPS_TOTAL.labels(result).inc()
+
+
+def get_statement_cache_stats(engine):
+    """
+    The size of an engine's statement cache, and how often this process's statements have been found in it. The size is
+    also recorded for the `sql_statement_cache_size` metric.
+    """
+    # `_compiled_cache` isn't public, so an engine without one is treated like one with caching turned off
+    cache = getattr(engine, '_compiled_cache', None)
+    if cache is not None:
+        SQL_STATEMENT_CACHE_SIZE.set(len(cache))
+    hits, misses = _statement_cache_lookups['hit'], _statement_cache_lookups['miss']
+    return {
+        'size': len(cache) if cache is not None else 0,
+        'capacity': cache.capacity if cache is not None else 0,
+        'hits': hits,
+        'misses': misses,
+        'uncached': _statement_cache_lookups['uncached'],
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
@@ -1,22 +1,25 @@
 # TODO split this file into per-functional-area modules
 
+import hashlib
+import json
 import re
+import zlib
 from abc import ABCMeta, abstractmethod
 from datetime import datetime
 from uuid import uuid4
 
-from flask import current_app
+from flask import current_app, g, has_app_context, request
 from flask_sqlalchemy import BaseQuery
 
 import sqlalchemy.dialects.postgresql
 from sqlalchemy import Sequence
 from sqlalchemy import asc, desc, exists
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import func, lambda_stmt
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.event import listen
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import validates, backref, mapper, foreign, remote
+from sqlalchemy.orm import validates, backref, mapper, foreign, remote, lazyload
 from sqlalchemy.orm.session import Session, object_session
 from sqlalchemy.sql.expression import (
     case as sql_case,
@@ -27,6 +30,9 @@ from sqlalchemy.sql.expression import (
     null as sql_null,
     and_ as sql_and,
     or_ as sql_or,
+    literal as sql_literal,
+    union_all as sql_union_all,
+    tuple_ as sql_tuple,
 )
 from sqlalchemy.sql.sqltypes import Interval
 from sqlalchemy.types import String
@@ -57,6 +63,15 @@ from app.draft_utils import get_copiable_service_data
 from app import models
 
 
+def _first_from_cached_statement(statement):
+    """
+        The first model instance selected by `statement`, a `lambda_stmt` - whose construction, as well as its
+        compilation, SQLAlchemy caches for the hot lookups that use this
+    """
+    # joined eager loads of collections repeat the instance for each of their rows
+    return db.session.execute(statement).unique().scalars().first()
+
+
 class JSON(sqlalchemy.dialects.postgresql.JSON):
     """
     Override SQLAlchemy JSON class to enforce None=>SQL-NULL mapping.
@@ -67,8 +82,69 @@ class JSON(sqlalchemy.dialects.postgresql.JSON):
         super(JSON, self).__init__(none_as_null=True, astext_type=astext_type)
 
 
+class JSONMutable(NestedMutable):
+    """
+    Nested change tracking for JSON columns, except when loading them for a read-only request.
+
+    Wrapping every nested dict and list of a large JSON document in a change-tracking proxy makes loading it several
+    times slower, which is wasted on requests that never write anything. So while `load_json_read_only` is in effect
+    loaded values are shallow `ReadOnlyJSONDict`s instead. Assigning a new value to the attribute still gives it full
+    nested tracking.
+    """
+
+    @classmethod
+    def _listen_on_attribute(cls, attribute, coerce, parent_cls):
+        if parent_cls is attribute.class_:
+            key = attribute.key
+
+            def load(state, *args):
+                # runs before the `Mutable` load listener, which leaves values that are already `cls` as they are
+                value = state.dict.get(key)
+                if type(value) is dict and has_app_context() and g.get("read_only_json"):
+                    state.dict[key] = ReadOnlyJSONDict(value)
+
+            def load_attrs(state, context, attrs):
+                if not attrs or key in attrs:
+                    load(state)
+
+            listen(parent_cls, "load", load, raw=True, propagate=True)
+            listen(parent_cls, "refresh", load_attrs, raw=True, propagate=True)
+
+        super()._listen_on_attribute(attribute, coerce, parent_cls)
+
+
+class ReadOnlyJSONDict(dict, JSONMutable):
+    """
+    A JSON column value loaded for a read-only request: a plain dict of plain values rather than a tree of proxies.
+
+    Changes to its top-level keys are still tracked, but changes to values nested inside it are not.
+    """
+
+    def _changed(method):
+        def changed_method(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self.changed()
+            return result
+        return changed_method
+
+    __setitem__ = _changed(dict.__setitem__)
+    __delitem__ = _changed(dict.__delitem__)
+    clear = _changed(dict.clear)
+    pop = _changed(dict.pop)
+    popitem = _changed(dict.popitem)
+    setdefault = _changed(dict.setdefault)
+    update = _changed(dict.update)
+
+    del _changed
+
+
+def load_json_read_only():
+    """Blueprint `before_request` hook, loading JSON columns without nested change tracking for GET requests"""
+    g.read_only_json = request.method in ("GET", "HEAD")
+
+
 # Enable tracking of updates/ changes on nested attributes for all usages of the JSON class in this file
-NestedMutable.associate_with(JSON)
+JSONMutable.associate_with(JSON)
 
 
 class RemovePersonalDataModelMixin:
@@ -281,6 +357,12 @@ class Framework(db.Model):
             raise ValidationError("Invalid framework value '{}'".format(framework))
         return framework
 
+    @staticmethod
+    def find_by_slug(framework_slug):
+        return _first_from_cached_statement(
+            lambda_stmt(lambda: sql_select(Framework).where(Framework.slug == framework_slug))
+        )
+
     slug_pattern = re.compile(r"^[\w-]+$")
 
     @validates('slug')
@@ -439,6 +521,17 @@ class Supplier(db.Model):
     # This flag indicates if a supplier is no longer providing any services.
     active = db.Column(db.Boolean, default=True, server_default=sql_true(), nullable=False)
 
+    __table_args__ = (
+        # pg_trgm indexes serving the substring, prefix and similarity searches of `list_suppliers`
+        db.Index(
+            'ix_suppliers_name_trgm', name, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        db.Index(
+            'ix_suppliers_registered_name_trgm', registered_name,
+            postgresql_using='gin', postgresql_ops={'registered_name': 'gin_trgm_ops'},
+        ),
+    )
+
     @validates('trading_status')
     def validates_trading_status(self, key, value):
         if value not in self.TRADING_STATUSES:
@@ -607,13 +700,46 @@ class SupplierFramework(db.Model):
         return value
 
     @staticmethod
-    def find_by_supplier_and_framework(supplier_id, framework_slug):
-        return SupplierFramework.query.filter(
-            SupplierFramework.framework.has(
-                Framework.slug == framework_slug
+    def _declaration_is_null():
+        # a declaration of None is usually stored as JSON null rather than SQL NULL
+        return sql_or(
+            SupplierFramework.declaration.is_(None),
+            func.json_typeof(SupplierFramework.declaration) == 'null',
+        )
+
+    @staticmethod
+    def declaration_fields_expression(fields):
+        """
+            A SQL expression for just the given `fields` of the declaration (null for any it doesn't have), so that the
+            rest of it needn't be sent from the database - select it instead of deferred `declaration`.
+        """
+        return sql_case(
+            (SupplierFramework._declaration_is_null(), sql_null()),
+            else_=func.json_build_object(
+                *(argument for field in fields for argument in (field, SupplierFramework.declaration[field]))
             ),
-            SupplierFramework.supplier_id == supplier_id,
+        ).label("declaration")
+
+    @staticmethod
+    def find_by_supplier_and_framework(supplier_id, framework_slug, for_update=False, lazyload_relationships=False):
+        """
+            The supplier's SupplierFramework for the framework (or None) - with all its relationships left to load
+            lazily if `lazyload_relationships` or `for_update`
+        """
+        statement = lambda_stmt(
+            lambda: sql_select(SupplierFramework).where(
+                SupplierFramework.supplier_id == supplier_id,
+                SupplierFramework.framework_id == sql_select(Framework.id).where(
+                    Framework.slug == framework_slug
+                ).scalar_subquery(),
+            )
         )
+        if lazyload_relationships or for_update:
+            # besides, FOR UPDATE can't lock the outer joins (and DISTINCT subquery) of the relationships' eager loads
+            statement += lambda s: s.options(lazyload('*'))
+        if for_update:
+            statement += lambda s: s.with_for_update()
+        return _first_from_cached_statement(statement)
 
     @staticmethod
     def get_service_counts(supplier_id):
@@ -641,14 +767,54 @@ class SupplierFramework(db.Model):
             for row in count_services_query + count_drafts_query
         }
 
+    @staticmethod
+    def get_framework_service_counts(supplier_id):
+        """
+        Count a supplier's services and drafts in a single query, returning a list of
+        (framework id, framework name, framework status, "services" or "drafts", service status, count) rows
+        """
+        services_and_drafts = sql_union_all(
+            sql_select([
+                sql_literal("services").label("kind"), Service.framework_id, Service.status,
+            ]).where(Service.supplier_id == supplier_id),
+            sql_select([
+                sql_literal("drafts").label("kind"), DraftService.framework_id, DraftService.status,
+            ]).where(DraftService.supplier_id == supplier_id),
+        ).subquery()
+
+        return db.session.query(
+            Framework.id,
+            Framework.name,
+            Framework.status,
+            services_and_drafts.c.kind,
+            services_and_drafts.c.status,
+            func.count(),
+        ).join(
+            services_and_drafts, services_and_drafts.c.framework_id == Framework.id
+        ).group_by(
+            Framework.id,
+            services_and_drafts.c.kind,
+            services_and_drafts.c.status,
+        ).all()
+
+    def add_referenced_users(self):
+        """Tell this request's `UserResolver` about the users `serialize(with_users=True)` would look up"""
+        user_ids = [
+            agreed_variation.get("agreedUserId") for agreed_variation in (self.agreed_variations or {}).values()
+        ]
+        agreement = self.current_framework_agreement
+        if agreement:
+            user_ids.append((agreement.signed_agreement_details or {}).get("uploaderUserId"))
+            user_ids.append((agreement.countersigned_agreement_details or {}).get("approvedByUserId"))
+
+        get_user_resolver().add(user_ids=user_ids)
+
     @staticmethod
     def serialize_agreed_variation(agreed_variation, with_users=False):
         if not (with_users and agreed_variation.get("agreedUserId")):
             return agreed_variation
 
-        user = User.query.filter(
-            User.id == agreed_variation["agreedUserId"]
-        ).first()
+        user = get_user_resolver().get_by_id(agreed_variation["agreedUserId"])
         if not user:
             return agreed_variation
 
@@ -658,6 +824,10 @@ class SupplierFramework(db.Model):
         })
 
     def serialize(self, data=None, with_users=False, with_declaration=True):
+        if with_users:
+            # look up every user we need at once, unless we're part of a batch which has already done so
+            self.add_referenced_users()
+
         agreed_variations = {
             k: self.serialize_agreed_variation(v, with_users=with_users)
             for k, v in self.agreed_variations.items()
@@ -720,18 +890,14 @@ class SupplierFramework(db.Model):
 
         if with_users:
             if (supplier_framework.get("agreementDetails") or {}).get("uploaderUserId"):
-                user = User.query.filter(
-                    User.id == supplier_framework['agreementDetails']['uploaderUserId']
-                ).first()
+                user = get_user_resolver().get_by_id(supplier_framework['agreementDetails']['uploaderUserId'])
 
                 if user:
                     supplier_framework['agreementDetails']['uploaderUserName'] = user.name
                     supplier_framework['agreementDetails']['uploaderUserEmail'] = user.email_address
 
             if (supplier_framework.get("countersignedDetails") or {}).get("approvedByUserId"):
-                user = User.query.filter(
-                    User.id == supplier_framework['countersignedDetails']['approvedByUserId']
-                ).first()
+                user = get_user_resolver().get_by_id(supplier_framework['countersignedDetails']['approvedByUserId'])
 
                 if user:
                     supplier_framework['countersignedDetails']['approvedByUserName'] = user.name
@@ -869,6 +1035,57 @@ SupplierFramework.current_framework_agreement = db.relationship(
 )
 
 
+class SupplierFrameworkApplication(db.Model):
+    """
+        The declaration status, application status and result, whether the framework agreement has been returned and
+        which variations have been agreed of each SupplierFramework, as used by the supplier and user exports.
+
+        Rows come from the `supplier_framework_applications` database view (see migration 1530), so this model is
+        read-only, and its table is kept out of `db.metadata` so that nothing tries to create or empty it.
+    """
+    __table__ = db.Table(
+        'supplier_framework_applications',
+        db.MetaData(),
+        db.Column('supplier_id', db.BigInteger, primary_key=True),
+        db.Column('framework_id', db.Integer, primary_key=True),
+        db.Column('declaration_status', db.String),
+        db.Column('application_status', db.String, nullable=False),
+        db.Column('application_result', db.String, nullable=False),
+        db.Column('framework_agreement', db.Boolean, nullable=False),
+        db.Column('variations_agreed', db.String, nullable=False),
+    )
+
+    APPLICATION_STATUSES = ('application', 'no_application')
+    APPLICATION_RESULTS = ('pass', 'fail', 'no result', '')
+
+    supplier = db.relationship(
+        Supplier,
+        primaryjoin=lambda: foreign(SupplierFrameworkApplication.supplier_id) == remote(Supplier.supplier_id),
+        lazy='joined',
+        innerjoin=True,
+        viewonly=True,
+    )
+    framework = db.relationship(
+        Framework,
+        primaryjoin=lambda: foreign(SupplierFrameworkApplication.framework_id) == remote(Framework.id),
+        lazy='joined',
+        innerjoin=True,
+        viewonly=True,
+    )
+
+    def serialize(self):
+        return {
+            'supplierId': self.supplier_id,
+            'supplierName': self.supplier.name,
+            'frameworkSlug': self.framework.slug,
+            'declarationStatus': self.declaration_status,
+            'applicationStatus': self.application_status,
+            'applicationResult': self.application_result,
+            'frameworkAgreement': self.framework_agreement,
+            'variationsAgreed': self.variations_agreed,
+        }
+
+
 class User(db.Model, RemovePersonalDataModelMixin):
     __tablename__ = 'users'
 
@@ -1011,6 +1228,14 @@ class User(db.Model, RemovePersonalDataModelMixin):
         self.password = encryption.hashpw(str(uuid4()))
         self.user_research_opted_in = False
 
+    @staticmethod
+    def find_by_email_address(email_address, for_update=False):
+        statement = lambda_stmt(lambda: sql_select(User).where(User.email_address == email_address))
+        if for_update:
+            # FOR UPDATE OF can't lock the nullable side of the joined eager load of the supplier
+            statement += lambda s: s.options(lazyload(User.supplier)).with_for_update(of=User)
+        return _first_from_cached_statement(statement)
+
     @staticmethod
     def validate_personal_data_removed(mapper, connection, instance):
         """The only time we should be able to update an object with """
@@ -1027,6 +1252,81 @@ listen(
 )
 
 
+class UserResolver:
+    """
+        Looks up users referenced (by id or email address) from objects being serialized. References are collected with
+        `add` - typically for a whole page of results at once - and all outstanding references are then loaded in a
+        single query the first time one of them is asked for.
+    """
+    def __init__(self):
+        self._users_by_id = {}
+        self._users_by_email_address = {}
+        self._pending_ids = set()
+        self._pending_email_addresses = set()
+
+    @staticmethod
+    def _as_user_id(user_id):
+        # ids found in JSON documents aren't always integers
+        try:
+            return int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+    def add(self, user_ids=(), email_addresses=()):
+        self._pending_ids.update(
+            user_id for user_id in map(self._as_user_id, user_ids)
+            if user_id is not None and user_id not in self._users_by_id
+        )
+        self._pending_email_addresses.update(
+            email_address for email_address in email_addresses
+            if email_address and email_address not in self._users_by_email_address
+        )
+
+    def _load_pending(self):
+        if not (self._pending_ids or self._pending_email_addresses):
+            return
+
+        users = User.query.filter(sql_or(
+            User.id.in_(self._pending_ids),
+            User.email_address.in_(self._pending_email_addresses),
+        )).all()
+
+        # remember references to users that don't exist too, so we don't go looking for them again
+        self._users_by_id.update(dict.fromkeys(self._pending_ids))
+        self._users_by_email_address.update(dict.fromkeys(self._pending_email_addresses))
+        for user in users:
+            self._users_by_id[user.id] = user
+            self._users_by_email_address[user.email_address] = user
+
+        self._pending_ids.clear()
+        self._pending_email_addresses.clear()
+
+    def get_by_id(self, user_id):
+        user_id = self._as_user_id(user_id)
+        self.add(user_ids=(user_id,))
+        self._load_pending()
+        return self._users_by_id.get(user_id)
+
+    def get_by_email_address(self, email_address):
+        self.add(email_addresses=(email_address,))
+        self._load_pending()
+        return self._users_by_email_address.get(email_address)
+
+
+def get_user_resolver():
+    """Return the `UserResolver` for the current request (or app context)"""
+    if not has_app_context():
+        return UserResolver()
+    if "user_resolver" not in g:
+        g.user_resolver = UserResolver()
+    return g.user_resolver
+
+
+def reset_user_resolver():
+    """Blueprint `before_request` hook, so users resolved for one request are never reused by another"""
+    g.pop("user_resolver", None)
+
+
 class ServiceTableMixin(object):
 
     STATUSES = ('disabled', 'enabled', 'published', 'deleted',)
@@ -1194,6 +1494,12 @@ class Service(db.Model, ServiceTableMixin):
             status=status
         )
 
+    @staticmethod
+    def find_by_service_id(service_id):
+        return _first_from_cached_statement(
+            lambda_stmt(lambda: sql_select(Service).where(Service.service_id == service_id))
+        )
+
     class query_class(BaseQuery):
         def framework_is_live(self):
             return self.filter(
@@ -1229,6 +1535,68 @@ class Service(db.Model, ServiceTableMixin):
         return url_for("main.get_service", service_id=self.service_id)
 
 
+class SupplierLiveServiceCount(db.Model):
+    """
+        The number of published services each supplier has on the live frameworks of each framework family (e.g.
+        'g-cloud'). Suppliers with no such services have no row.
+
+        Rows are maintained by database triggers on the `services` and `frameworks` tables (see migration 1480), so
+        this model should be treated as read-only.
+    """
+    __tablename__ = 'supplier_live_service_counts'
+
+    supplier_id = db.Column(db.BigInteger, db.ForeignKey('suppliers.supplier_id'), primary_key=True)
+    framework_family = db.Column(db.String, primary_key=True, index=True)
+    published_service_count = db.Column(db.Integer, nullable=False)
+
+
+class SupplierBriefEligibility(db.Model):
+    """
+        What each published service on a lot that allows briefs makes its supplier eligible to respond to: every
+        service has a row with no role or location, plus one for each specialist role and/or location it offers.
+
+        Rows are maintained by database triggers on the `services` table (see migration 1500), so this model should be
+        treated as read-only.
+    """
+    __tablename__ = 'supplier_brief_eligibility'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    service_id = db.Column(
+        db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), index=True, nullable=False
+    )
+    supplier_id = db.Column(db.BigInteger, nullable=False)
+    framework_id = db.Column(db.Integer, nullable=False)
+    lot_id = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String, nullable=True)
+    location = db.Column(db.String, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_supplier_brief_eligibility_framework_lot_role', framework_id, lot_id, role, supplier_id),
+    )
+
+    class query_class(BaseQuery):
+        def for_brief(self, brief, location=None):
+            """
+                Eligibility for `brief`'s framework, lot and (for digital specialists) role, as `filter_services`
+                would find it - optionally also limited to services offering `location`.
+            """
+            eligibility = self.filter(
+                SupplierBriefEligibility.framework_id == brief.framework_id,
+                SupplierBriefEligibility.lot_id == brief.lot_id,
+            )
+            if brief.lot.slug == 'digital-specialists':
+                eligibility = eligibility.filter(SupplierBriefEligibility.role == brief.data['specialistRole'])
+            else:
+                eligibility = eligibility.filter(SupplierBriefEligibility.role.is_(None))
+
+            if location is not None:
+                return eligibility.filter(SupplierBriefEligibility.location == location)
+            if brief.lot.slug == 'digital-specialists':
+                return eligibility
+            # every service has a row with neither role nor location
+            return eligibility.filter(SupplierBriefEligibility.location.is_(None))
+
+
 class ArchivedService(db.Model, ServiceTableMixin):
     """
         A record of a Service's past state
@@ -1352,9 +1720,50 @@ class DraftService(db.Model, ServiceTableMixin):
             return self.filter(DraftService.lot.has(Lot.slug == lot_slug))
 
 
+class AuditEventPayload(db.Model):
+    """
+        A large part of some audit events' data (e.g. the JSON of an update), stored just once however many events have
+        it, compressed and keyed by the SHA-256 of its JSON
+    """
+    __tablename__ = 'audit_event_payloads'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def store(payload):
+        """Store `payload` (unless it already is) in the current transaction, returning its hash"""
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+        payload_hash = hashlib.sha256(encoded).hexdigest()
+        db.session.execute(
+            pg_insert(AuditEventPayload).values(
+                hash=payload_hash, data=zlib.compress(encoded), created_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=[AuditEventPayload.hash])
+        )
+
+        return payload_hash
+
+    @staticmethod
+    def load(payload_hashes):
+        """A dict of the payloads with each of `payload_hashes`"""
+        if not payload_hashes:
+            return {}
+
+        return {
+            payload_hash: json.loads(zlib.decompress(data))
+            for payload_hash, data in db.session.query(AuditEventPayload.hash, AuditEventPayload.data).filter(
+                AuditEventPayload.hash.in_(set(payload_hashes))
+            )
+        }
+
+
 class AuditEvent(db.Model):
     __tablename__ = 'audit_events'
 
+    # where `payload_keys` have been moved to AuditEventPayload, `data` has their hashes under this key instead
+    PAYLOAD_HASHES_KEY = 'payloadHashes'
+
     id = db.Column(db.Integer, primary_key=True)
     type = db.Column(db.String, index=True, nullable=False)
     created_at = db.Column(db.DateTime, index=True, nullable=False, default=datetime.utcnow)
@@ -1379,13 +1788,64 @@ class AuditEvent(db.Model):
         db.DateTime,
         nullable=True)
 
-    def __init__(self, audit_type, user, data, db_object):
+    def __init__(self, audit_type, user, data, db_object, payload_keys=()):
+        """
+            :param payload_keys: keys of `data` whose values are stored as AuditEventPayloads instead, if they're at
+            least `DM_API_AUDIT_PAYLOAD_MIN_BYTES` of JSON (and that's set)
+        """
         self.type = audit_type.value
-        self.data = data
+        self.data = self._store_payloads(data, payload_keys)
         self.object = db_object
         self.user = user
         self.acknowledged = False
 
+    @classmethod
+    def _store_payloads(cls, data, payload_keys):
+        min_bytes = current_app.config['DM_API_AUDIT_PAYLOAD_MIN_BYTES'] if has_app_context() else 0
+        if not min_bytes:
+            return data
+
+        payload_hashes = {
+            key: AuditEventPayload.store(data[key])
+            for key in payload_keys
+            if data.get(key) is not None and len(json.dumps(data[key], separators=(',', ':'))) >= min_bytes
+        }
+        if not payload_hashes:
+            return data
+
+        return {
+            **{key: value for key, value in data.items() if key not in payload_hashes},
+            cls.PAYLOAD_HASHES_KEY: payload_hashes,
+        }
+
+    def get_data(self, payloads=None):
+        """
+            `data` with any payloads stored as AuditEventPayloads put back
+
+            :param payloads: payloads already loaded by hash (see `prepare_to_serialize`), otherwise they're looked up
+        """
+        payload_hashes = self.data.get(self.PAYLOAD_HASHES_KEY)
+        if not payload_hashes:
+            return self.data
+
+        if payloads is None:
+            payloads = AuditEventPayload.load(payload_hashes.values())
+        data = {key: value for key, value in self.data.items() if key != self.PAYLOAD_HASHES_KEY}
+        data.update((key, payloads[payload_hash]) for key, payload_hash in payload_hashes.items())
+
+        return data
+
+    @classmethod
+    def prepare_to_serialize(cls, audit_events):
+        """Look up the stored payloads of a list of audit events together"""
+        payloads = AuditEventPayload.load([
+            payload_hash
+            for audit_event in audit_events
+            for payload_hash in (audit_event.data.get(cls.PAYLOAD_HASHES_KEY) or {}).values()
+        ])
+        for audit_event in audit_events:
+            audit_event._payloads = payloads
+
     class query_class(BaseQuery):
         def last_for_object(self, object, types=None):
             events = self.filter(AuditEvent.object == object)
@@ -1394,6 +1854,10 @@ class AuditEvent(db.Model):
 
             return events.order_by(desc(AuditEvent.created_at)).first()
 
+    def add_referenced_users(self):
+        """Tell this request's `UserResolver` about the user `serialize(include_user=True)` would look up"""
+        get_user_resolver().add(email_addresses=(self.user,))
+
     def serialize(self, include_user=False):
         """
         :return: dictionary representation of an audit event
@@ -1404,7 +1868,8 @@ class AuditEvent(db.Model):
             'type': self.type,
             'acknowledged': self.acknowledged,
             'user': self.user,
-            'data': self.data,
+            # payloads from `prepare_to_serialize` are only used once, so can't go stale
+            'data': self.get_data(payloads=self.__dict__.pop('_payloads', None)),
             'objectType': self.object_type,
             'objectId': self.object_id,
             'createdAt': self.created_at.strftime(DATETIME_FORMAT),
@@ -1428,9 +1893,7 @@ class AuditEvent(db.Model):
             })
 
         if include_user:
-            user = User.query.filter(
-                User.email_address == self.user
-            ).first()
+            user = get_user_resolver().get_by_email_address(self.user)
 
             if user:
                 data['userName'] = user.name
@@ -1438,6 +1901,91 @@ class AuditEvent(db.Model):
         return data
 
 
+class AuditReviewQueueEntry(db.Model):
+    """
+        The earliest unacknowledged audit event of each reviewed audit type (see `REVIEWED_AUDIT_TYPES`) for each
+        object, and how many of its events are waiting to be acknowledged. Objects with nothing waiting have no row.
+
+        Rows are maintained by database triggers on the `audit_events` table (see migration 1520), so this model should
+        be treated as read-only.
+    """
+    __tablename__ = 'audit_review_queue'
+
+    # reviewing another audit type's events needs a migration adding it to the triggers, and a backfill
+    REVIEWED_AUDIT_TYPES = ('update_service',)
+
+    audit_type = db.Column(db.String, primary_key=True)
+    object_type = db.Column(db.String, primary_key=True)
+    object_id = db.Column(db.BigInteger, primary_key=True)
+    earliest_audit_event_id = db.Column(
+        db.Integer, db.ForeignKey('audit_events.id', ondelete='CASCADE'), nullable=False
+    )
+    earliest_created_at = db.Column(db.DateTime, nullable=False)
+    pending_count = db.Column(db.Integer, nullable=False)
+
+    earliest_audit_event = db.relationship(AuditEvent, lazy='joined', innerjoin=True)
+
+    __table_args__ = (
+        db.Index(
+            'idx_audit_review_queue_audit_type_earliest',
+            audit_type,
+            earliest_created_at,
+            earliest_audit_event_id,
+        ),
+    )
+
+
+class Change(db.Model):
+    """
+        A record of a service, supplier, brief, brief response or framework having been inserted, updated or deleted,
+        for downstream consumers to follow with `GET /changes`.
+
+        Rows are written by database triggers in the same transaction as the change itself (see migration 1490), so
+        this model should be treated as read-only.
+    """
+    __tablename__ = 'changes'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    transaction_id = db.Column(db.BigInteger, nullable=False)
+    object_type = db.Column(db.String, nullable=False)
+    object_id = db.Column(db.String, nullable=False)
+    operation = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_changes_transaction_id_id', transaction_id, id),
+    )
+
+    class query_class(BaseQuery):
+        def following(self, change):
+            """
+            Changes after `change` (or all of them, if it's None) in the order their transactions were assigned ids,
+            leaving out any from transactions that might still be in progress.
+
+            Ids are assigned as rows are written rather than when their transaction commits, so a consumer paging
+            through changes by id alone could pass over a change whose transaction commits later. Only following the
+            changes of transactions older than every transaction still running means that can't happen.
+            """
+            changes = self.filter(
+                Change.transaction_id < func.txid_snapshot_xmin(func.txid_current_snapshot())
+            )
+            if change is not None:
+                changes = changes.filter(
+                    sql_tuple(Change.transaction_id, Change.id) > sql_tuple(change.transaction_id, change.id)
+                )
+
+            return changes.order_by(Change.transaction_id, Change.id)
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'objectType': self.object_type,
+            'objectId': self.object_id,
+            'operation': self.operation,
+            'createdAt': self.created_at.strftime(DATETIME_FORMAT),
+        }
+
+
 class Brief(db.Model):
     __tablename__ = 'briefs'
 
@@ -1530,9 +2078,8 @@ class Brief(db.Model):
     def applications_closed_at(self):
         if self.published_at is None:
             return None
-        brief_publishing_date_and_length = self._build_date_and_length_data()
 
-        return get_publishing_dates(brief_publishing_date_and_length)['closing_date']
+        return self._get_publishing_dates()['closing_date']
 
     @applications_closed_at.expression
     def applications_closed_at(cls):
@@ -1551,17 +2098,15 @@ class Brief(db.Model):
     def clarification_questions_closed_at(self_or_cls):
         if self_or_cls.published_at is None:
             return None
-        brief_publishing_date_and_length = self_or_cls._build_date_and_length_data()
 
-        return get_publishing_dates(brief_publishing_date_and_length)['questions_close']
+        return self_or_cls._get_publishing_dates()['questions_close']
 
     @property
     def clarification_questions_published_by(self_or_cls):
         if self_or_cls.published_at is None:
             return None
-        brief_publishing_date_and_length = self_or_cls._build_date_and_length_data()
 
-        return get_publishing_dates(brief_publishing_date_and_length)['answers_close']
+        return self_or_cls._get_publishing_dates()['answers_close']
 
     @hybrid_property
     def clarification_questions_are_closed(self_or_cls):
@@ -1734,6 +2279,59 @@ class Brief(db.Model):
             'requirementsLength': requirements_length
         }
 
+    def _get_publishing_dates(self):
+        """
+        The brief's publishing timeline, worked out the first time it's needed and again only once `published_at` or
+        `requirementsLength` has changed.
+        """
+        date_and_length_data = self._build_date_and_length_data()
+        key = tuple(date_and_length_data.values())
+        cached_key, publishing_dates = self.__dict__.get('_publishing_dates', (None, None))
+        if cached_key != key:
+            publishing_dates = get_publishing_dates(date_and_length_data)
+            self._publishing_dates = key, publishing_dates
+
+        return publishing_dates
+
+    @staticmethod
+    def load_publishing_dates(briefs):
+        """
+        Work out the publishing timelines of several briefs (e.g. a page of them) together, once for each distinct
+        publishing day and requirements length among them.
+        """
+        publishing_dates_by_key = {}
+        for brief in briefs:
+            if brief.published_at is None:
+                continue
+            date_and_length_data = brief._build_date_and_length_data()
+            key = tuple(date_and_length_data.values())
+            if key not in publishing_dates_by_key:
+                publishing_dates_by_key[key] = get_publishing_dates(date_and_length_data)
+            brief._publishing_dates = key, publishing_dates_by_key[key]
+
+    @classmethod
+    def prepare_to_serialize(cls, briefs):
+        cls.load_publishing_dates(briefs)
+
+    def serialize_summary(self):
+        """The few fields of `serialize` that brief responses include about their brief"""
+        summary = {
+            'id': self.id,
+            'status': self.status,
+            'framework': {
+                'family': self.framework.framework,
+                'name': self.framework.name,
+                'slug': self.framework.slug,
+                'status': self.framework.status,
+            },
+        }
+        if 'title' in self.data:
+            summary['title'] = self.data['title']
+        if self.published_at:
+            summary['applicationsClosedAt'] = self.applications_closed_at.strftime(DATETIME_FORMAT)
+
+        return summary
+
     def serialize(self, with_users=False, with_clarification_questions=False):
         data = dict(self.data.items())
 
@@ -1923,6 +2521,23 @@ class BriefResponse(db.Model):
         if errs:
             raise ValidationError(errs)
 
+    @classmethod
+    def prepare_to_serialize(cls, brief_responses):
+        """Summarise each brief once for all of its responses (e.g. on a page of them)"""
+        briefs = list({id(brief_response.brief): brief_response.brief for brief_response in brief_responses}.values())
+        Brief.load_publishing_dates(briefs)
+        summaries = {id(brief): brief.serialize_summary() for brief in briefs}
+        for brief_response in brief_responses:
+            brief_response._brief_summary = brief_response.brief, summaries[id(brief_response.brief)]
+
+    def _get_brief_summary(self):
+        # a summary from `prepare_to_serialize` is only used once, so it can't go stale
+        brief, summary = self.__dict__.pop('_brief_summary', (None, None))
+        if brief is not self.brief:
+            summary = self.brief.serialize_summary()
+
+        return summary
+
     def serialize(self, with_data: bool = True):
         """
             :param with_data: allows serialization to be produced while omitting the majority of the content
@@ -1932,13 +2547,9 @@ class BriefResponse(db.Model):
             is referenced in some important listing views.
         """
         data = {k: v for k, v in self.data.items() if with_data or k == "essentialRequirementsMet"}
-        parent_brief = self.brief.serialize()
-        parent_brief_fields = ['id', 'title', 'status', 'applicationsClosedAt', 'framework']
         data.update({
             'id': self.id,
-            'brief': {
-                **{key: parent_brief[key] for key in parent_brief_fields if key in parent_brief},
-            },
+            'brief': dict(self._get_brief_summary()),
             'briefId': self.brief_id,
             'supplierId': self.supplier_id,
             'supplierName': self.supplier.name,
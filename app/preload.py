@@ -0,0 +1,62 @@
+"""Optional warming up of the application before a pre-forking server (like uWSGI) starts its workers.
+
+With ``DM_API_PRELOAD`` set, ``create_app`` does the work each worker would otherwise repeat for itself on its first
+requests: configuring the SQLAlchemy mappers, building (and caching) every JSON schema's validator and rules, and
+compiling the statements behind the most common lookups (of frameworks, supplier frameworks, users and services) by
+running each once for a key that matches nothing. It then moves everything allocated so far out of the garbage
+collector's reach, so that collections in the workers don't write to (and so un-share) the pages they inherited.
+
+Connections can't be shared between processes, so the database pools are emptied before forking and each worker
+starts with pools of its own. The engines themselves are kept, along with their compiled statement caches.
+"""
+import gc
+import os
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+
+_forked_engines = []
+
+
+def preload(application):
+    from . import db
+    from .models import Framework, Service, SupplierFramework, User
+    from .validation import _SCHEMAS, _get_question_rules, get_validator
+
+    configure_mappers()
+
+    for schema_name in _SCHEMAS:
+        get_validator(schema_name)
+        _get_question_rules(schema_name)
+
+    with application.app_context():
+        try:
+            Framework.find_by_slug('')
+            SupplierFramework.find_by_supplier_and_framework(0, '')
+            User.find_by_email_address('')
+            Service.find_by_service_id('')
+        except SQLAlchemyError as e:
+            # the workers can still compile these themselves, so a database that isn't up yet shouldn't stop us
+            current_app.logger.warning("Couldn't prime the statement cache before forking: {error}", extra={"error": e})
+        finally:
+            db.session.remove()
+
+        binds = [None, *(application.config["SQLALCHEMY_BINDS"] or {})]
+        engines = [db.get_engine(application, bind=bind) for bind in binds]
+
+    for engine in engines:
+        engine.dispose()
+    if not _forked_engines:
+        os.register_at_fork(after_in_child=_reopen_database_pools)
+    _forked_engines[:] = engines
+
+    gc.collect()
+    gc.freeze()
+
+
+def _reopen_database_pools():
+    for engine in _forked_engines:
+        # `close=False` leaves any connections checked in to the parent's pool for the parent to close
+        engine.dispose(close=False)
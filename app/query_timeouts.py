@@ -0,0 +1,105 @@
+"""Limits on how long a request's database queries may run, or wait for locks.
+
+Every ``GET`` request handled by the ``main`` blueprint gets ``DM_API_GET_STATEMENT_TIMEOUT_MS`` by default, and a
+view can set its own limits with the ``query_timeouts`` decorator. They're applied with ``SET LOCAL`` to each
+transaction the request begins, so they never outlive it.
+
+A request whose query is cancelled for running too long gets a ``504``, and one that gave up waiting for a lock a
+``503``, both with a ``Retry-After`` header. Each is counted per endpoint in ``sql_query_timeouts_total``.
+"""
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from werkzeug.exceptions import GatewayTimeout, ServiceUnavailable
+
+from dmutils.errors.api import json_error_handler
+
+from . import db
+
+
+# postgres error codes, and what each means for the client
+QUERY_CANCELED = "57014"
+LOCK_NOT_AVAILABLE = "55P03"
+TIMEOUT_ERRORS = {
+    QUERY_CANCELED: ("statement", GatewayTimeout, "The request's database queries took too long."),
+    LOCK_NOT_AVAILABLE: ("lock", ServiceUnavailable, "The request waited too long for a database lock."),
+}
+
+# exports read everything on a framework in one go, so are given longer than other GET requests
+EXPORT_STATEMENT_TIMEOUT_MS = 120000
+
+_set_query_timeouts_sql = text(
+    "SELECT set_config('statement_timeout', COALESCE(:statement_timeout, current_setting('statement_timeout')), true), "
+    "set_config('lock_timeout', COALESCE(:lock_timeout, current_setting('lock_timeout')), true)"
+)
+
+
+def _set_query_timeouts(connection, timeouts):
+    connection.execute(_set_query_timeouts_sql, {
+        name: None if timeouts.get(name) is None else str(timeouts[name])
+        for name in ("statement_timeout", "lock_timeout")
+    })
+
+
+@event.listens_for(SignallingSession, "after_begin")
+def _set_transaction_query_timeouts(session, transaction, connection):
+    timeouts = g.get("query_timeouts") if has_app_context() else None
+    if timeouts:
+        _set_query_timeouts(connection, timeouts)
+
+
+def query_timeouts(statement_timeout=None, lock_timeout=None):
+    """Return a Flask view decorator limiting (in milliseconds) how long its queries run, and wait for locks
+
+    Usage::
+        @view("/thingy/<id>", methods=["GET"])
+        @query_timeouts(statement_timeout=120000)
+        def export_things(id):
+            ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def view_wrapper(*args, **kwargs):
+            g.query_timeouts = {
+                **g.get("query_timeouts", {}),
+                **{
+                    name: value
+                    for name, value in (("statement_timeout", statement_timeout), ("lock_timeout", lock_timeout))
+                    if value is not None
+                },
+            }
+            if db.session().in_transaction():
+                _set_query_timeouts(db.session.connection(), g.query_timeouts)
+
+            return view(*args, **kwargs)
+        return view_wrapper
+    return decorator
+
+
+def set_default_query_timeouts():
+    if request.method == "GET" and current_app.config["DM_API_GET_STATEMENT_TIMEOUT_MS"]:
+        g.query_timeouts = {"statement_timeout": current_app.config["DM_API_GET_STATEMENT_TIMEOUT_MS"]}
+    else:
+        g.pop("query_timeouts", None)
+
+
+def handle_query_timeout(error):
+    if getattr(error.orig, "pgcode", None) not in TIMEOUT_ERRORS:
+        raise error
+
+    # like create_app, imported here so app.main can be imported before the metrics path is configured
+    from .metrics import SQL_QUERY_TIMEOUTS_TOTAL
+
+    timeout, exception_class, description = TIMEOUT_ERRORS[error.orig.pgcode]
+    SQL_QUERY_TIMEOUTS_TOTAL.labels(request.endpoint, timeout).inc()
+
+    response = json_error_handler(exception_class(description=description))
+    response.headers["Retry-After"] = current_app.config["DM_API_QUERY_TIMEOUT_RETRY_AFTER_SECONDS"]
+    return response
+
+
+def init_app(application):
+    application.register_error_handler(OperationalError, handle_query_timeout)
@@ -0,0 +1,119 @@
+"""Optional routing of read-only traffic to database read replicas.
+
+Replicas are configured with ``DM_API_READ_REPLICA_URIS``, a comma-separated list of database URIs. When it is set,
+``GET`` requests handled by the ``main`` blueprint run their queries against one of the replicas, while every other
+request (and anything happening outside of a request) uses the primary ``SQLALCHEMY_DATABASE_URI``.
+
+So that a client can read its own writes, successful writes to the ``main`` blueprint report the primary's WAL
+position in a ``DM-Primary-LSN`` response header. A client sending that value back as a ``DM-Min-LSN`` request header
+is only routed to a replica once the replica has replayed at least that far, and otherwise reads from the primary.
+Sending ``DM-Read-Primary: true`` always reads from the primary.
+"""
+import random
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from dmutils.config import convert_to_boolean
+
+
+REPLICA_BIND_PREFIX = "replica-"
+
+_replica_replay_lsn_sql = text(
+    "SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"
+)
+_replica_lag_sql = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float END"
+)
+
+
+class RoutingSession(SignallingSession):
+    """A session which sends its queries to the read replica chosen for the current request, if there is one"""
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica_bind = g.get("read_replica_bind") if has_app_context() else None
+        # never risk a write reaching a replica, even if a read-only view unexpectedly flushes
+        if replica_bind is not None and not self._flushing:
+            return self.db.get_engine(self.app, bind=replica_bind)
+
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+def init_app(application):
+    """Register each configured read replica as a Flask-SQLAlchemy bind"""
+    replica_uris = [
+        uri.strip() for uri in (application.config["DM_API_READ_REPLICA_URIS"] or "").split(",") if uri.strip()
+    ]
+    if replica_uris:
+        application.config["SQLALCHEMY_BINDS"] = {
+            **(application.config.get("SQLALCHEMY_BINDS") or {}),
+            **{f"{REPLICA_BIND_PREFIX}{i}": uri for i, uri in enumerate(replica_uris)},
+        }
+
+
+def get_replica_binds(application):
+    return sorted(
+        bind for bind in (application.config.get("SQLALCHEMY_BINDS") or {}) if bind.startswith(REPLICA_BIND_PREFIX)
+    )
+
+
+def _get_db():
+    return current_app.extensions["sqlalchemy"].db
+
+
+def replica_has_replayed(replica_bind, lsn):
+    try:
+        return bool(_get_db().get_engine(current_app, bind=replica_bind).execute(
+            _replica_replay_lsn_sql, lsn=lsn
+        ).scalar())
+    except SQLAlchemyError:
+        # an unparseable LSN or an unreachable replica - either way the primary is the safe choice
+        return False
+
+
+def route_reads_to_replica():
+    """Blueprint `before_request` hook choosing a read replica for this request's queries, if appropriate"""
+    if request.method not in ("GET", "HEAD"):
+        return
+
+    replica_binds = get_replica_binds(current_app)
+    if not replica_binds or convert_to_boolean(request.headers.get("DM-Read-Primary")) is True:
+        return
+
+    replica_bind = random.choice(replica_binds)
+
+    min_lsn = request.headers.get("DM-Min-LSN")
+    if min_lsn and not replica_has_replayed(replica_bind, min_lsn):
+        return
+
+    g.read_replica_bind = replica_bind
+
+
+def add_primary_lsn_header(response):
+    """Blueprint `after_request` hook reporting the primary's WAL position after a successful write"""
+    if request.method in ("GET", "HEAD") or response.status_code >= 400 or not get_replica_binds(current_app):
+        return response
+
+    response.headers["DM-Primary-LSN"] = _get_db().engine.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+    return response
+
+
+def get_replication_lag():
+    """Return the replication lag in seconds of each configured read replica, keyed by bind name"""
+    db = _get_db()
+    return {
+        replica_bind: db.get_engine(current_app, bind=replica_bind).execute(_replica_lag_sql).scalar()
+        for replica_bind in get_replica_binds(current_app)
+    }
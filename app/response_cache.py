@@ -0,0 +1,223 @@
+"""A cache of the responses to hot, public ``GET`` requests, shared between the app's instances.
+
+It's switched on by ``DM_API_RESPONSE_CACHE_TYPE``: ``"redis"`` shares it through the Redis at
+``DM_API_RESPONSE_CACHE_REDIS_URL``, and ``"simple"`` keeps it in the process, which is only really useful for tests
+and local development. Views opt in with the ``cached_response`` decorator.
+
+Each cached response is tagged, by its view, with the objects it was built from (see ``add_response_cache_tags``).
+When a transaction changing one of the models in ``TAGGED_MODELS`` commits, the time is recorded against its tags, and
+any response begun before then is treated as a miss. Responses begun within ``DM_API_RESPONSE_CACHE_GRACE_SECONDS``
+after it are too, to allow for clocks that disagree a little between instances and read replicas that lag behind.
+
+Responses the view has marked ``X-Compression-Safe`` are stored gzipped, once, and served that way to clients that
+accept it. Lookups are counted per endpoint in ``response_cache_lookups_total``.
+"""
+from functools import wraps
+import gzip
+import hashlib
+import json
+import time
+
+from cachelib import RedisCache, SimpleCache
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SignallingSession
+import redis
+from sqlalchemy import event
+
+from . import db
+from .models import Brief, BriefClarificationQuestion, Framework, FrameworkLot, Lot, Service, Supplier
+
+
+# the tags each change to these models invalidates: one for every response built from any of its objects, and one
+# for those built from the object itself
+TAGGED_MODELS = {
+    Framework: lambda framework: ("framework", f"framework:{framework.id}"),
+    FrameworkLot: lambda framework_lot: ("framework", f"framework:{framework_lot.framework_id}"),
+    Lot: lambda lot: ("lot",),
+    Service: lambda service: ("service", f"service:{service.service_id}"),
+    Supplier: lambda supplier: ("supplier", f"supplier:{supplier.supplier_id}"),
+    Brief: lambda brief: ("brief",),
+    BriefClarificationQuestion: lambda question: ("brief_clarification_question",),
+}
+
+# as DMGzipMiddleware, which doesn't bother compressing anything smaller
+COMPRESSION_MINIMUM_SIZE = 8192
+
+_SESSION_INFO_KEY = "response_cache_tags"
+
+
+def get_response_cache():
+    """The app's response cache, or ``None`` if it's switched off"""
+    if "response_cache" not in current_app.extensions:
+        config = current_app.config
+        cache_type = config["DM_API_RESPONSE_CACHE_TYPE"]
+        if cache_type == "redis":
+            cache = RedisCache(
+                redis.Redis.from_url(config["DM_API_RESPONSE_CACHE_REDIS_URL"]),
+                default_timeout=config["DM_API_RESPONSE_CACHE_TIMEOUT"],
+                key_prefix="dm-api:",
+            )
+        elif cache_type == "simple":
+            cache = SimpleCache(default_timeout=config["DM_API_RESPONSE_CACHE_TIMEOUT"])
+        elif not cache_type:
+            cache = None
+        else:
+            raise ValueError(f"Unknown DM_API_RESPONSE_CACHE_TYPE {cache_type!r}")
+
+        current_app.extensions["response_cache"] = cache
+
+    return current_app.extensions["response_cache"]
+
+
+def _tag_key(tag):
+    return f"response-tag:{tag}"
+
+
+def _response_key():
+    arguments = json.dumps([request.view_args, sorted(request.args.items(multi=True))], sort_keys=True)
+    return f"response:{request.endpoint}:{hashlib.sha1(arguments.encode()).hexdigest()}"
+
+
+def add_response_cache_tags(*tags):
+    """Tag the response being built by a ``cached_response`` view with objects it depends on"""
+    if "response_cache_tags" in g:
+        g.response_cache_tags.update(tags)
+
+
+def _is_fresh(cache, entry):
+    if not entry["tags"]:
+        return True
+
+    invalidated_at = [timestamp for timestamp in cache.get_many(*map(_tag_key, entry["tags"])) if timestamp]
+    return (
+        not invalidated_at
+        or max(invalidated_at) < entry["started_at"] - current_app.config["DM_API_RESPONSE_CACHE_GRACE_SECONDS"]
+    )
+
+
+def _make_entry(response, started_at):
+    body = response.get_data()
+    entry = {
+        "body": body,
+        "gzipped": False,
+        "headers": [
+            (name, value) for name, value in response.headers
+            if name not in ("Content-Length", "Content-Encoding", "X-Compression-Safe")
+        ],
+        "tags": sorted(g.response_cache_tags),
+        "started_at": started_at,
+    }
+    if response.headers.get("X-Compression-Safe") == "1" and len(body) >= COMPRESSION_MINIMUM_SIZE:
+        entry.update(body=gzip.compress(body), gzipped=True)
+
+    return entry
+
+
+def _make_response(entry):
+    response = current_app.response_class(entry["body"], status=200, headers=entry["headers"])
+    if entry["gzipped"]:
+        if "gzip" in request.headers.get("Accept-Encoding", "").lower():
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response.set_data(gzip.decompress(entry["body"]))
+
+    return response
+
+
+def cached_response(timeout=None, when=None):
+    """Return a Flask view decorator caching its successful responses for up to ``timeout`` seconds
+
+    If given, ``when`` is called before the view to decide whether this request's response can be cached at all.
+
+    Usage::
+        @main.route("/thingy/<id>", methods=["GET"])
+        @cached_response(timeout=60, when=lambda: not request.args.get("user_id"))
+        def get_thingy(id):
+            thingy = Thingy.query.get(id)
+            add_response_cache_tags(f"thingy:{thingy.id}")
+            ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def view_wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None or (when is not None and not when()):
+                return view(*args, **kwargs)
+
+            # like create_app, imported here so app.main can be imported before the metrics path is configured
+            from .metrics import RESPONSE_CACHE_LOOKUPS_TOTAL
+
+            key = _response_key()
+            try:
+                entry = cache.get(key)
+                result = "miss" if entry is None else "hit" if _is_fresh(cache, entry) else "stale"
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Failed to read response cache: {e}", extra={"key": key})
+                return view(*args, **kwargs)
+
+            RESPONSE_CACHE_LOOKUPS_TOTAL.labels(request.endpoint, result).inc()
+            if result == "hit":
+                return _make_response(entry)
+
+            started_at = time.time()
+            g.response_cache_tags = set()
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            entry = _make_entry(response, started_at)
+            try:
+                cache.set(key, entry, timeout=min(
+                    timeout or current_app.config["DM_API_RESPONSE_CACHE_TIMEOUT"],
+                    current_app.config["DM_API_RESPONSE_CACHE_TIMEOUT"],
+                ))
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Failed to write response cache: {e}", extra={"key": key})
+
+            return _make_response(entry)
+        return view_wrapper
+    return decorator
+
+
+def invalidate_response_cache(*tags, session=None):
+    """Invalidate the cached responses with any of ``tags`` once the session's transaction commits
+
+    Changes made through the ORM to ``TAGGED_MODELS`` are picked up by themselves, so this is only needed for those
+    made with core statements.
+    """
+    (session or db.session()).info.setdefault(_SESSION_INFO_KEY, set()).update(tags)
+
+
+@event.listens_for(SignallingSession, "after_flush")
+def _collect_changed_tags(session, flush_context):
+    tags = set()
+    for obj in (*session.new, *session.deleted, *filter(session.is_modified, session.dirty)):
+        if type(obj) in TAGGED_MODELS:
+            tags.update(TAGGED_MODELS[type(obj)](obj))
+
+    if tags:
+        invalidate_response_cache(*tags, session=session)
+
+
+@event.listens_for(SignallingSession, "after_commit")
+def _invalidate_changed_tags(session):
+    tags = session.info.pop(_SESSION_INFO_KEY, None)
+    if not tags or not has_app_context():
+        return
+
+    cache = get_response_cache()
+    if cache is None:
+        return
+
+    try:
+        cache.set_many(
+            {_tag_key(tag): time.time() for tag in tags},
+            timeout=current_app.config["DM_API_RESPONSE_CACHE_TIMEOUT"],
+        )
+    except redis.RedisError as e:
+        current_app.logger.error(f"Failed to invalidate response cache: {e}", extra={"tags": sorted(tags)})
+
+
+@event.listens_for(SignallingSession, "after_rollback")
+def _discard_changed_tags(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from math import ceil
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from flask import copy_current_request_context, current_app, has_request_context
+
+from . import search_api_client
+
+
+def _with_query_params(url, **params):
+    scheme, netloc, path, url_params, query, fragment = urlparse(url)
+    query_params = [(key, value) for key, value in parse_qsl(query) if key not in params] + list(params.items())
+    return urlunparse((scheme, netloc, path, url_params, urlencode(query_params), fragment))
+
+
+def _get_services(result):
+    # the same models, in the same order of preference, as `search_services_from_url_iter`
+    return next((result[model_name] for model_name in ('documents', 'services') if model_name in result), [])
+
+
+def iter_search_result_pages(search_api_url, id_only=False):
+    """
+    Yield the services found by a search API search, a page (list of services) at a time - the same services
+    `search_api_client.search_services_from_url_iter` would, but with every page after the first fetched at once by a
+    pool of up to `DM_API_SEARCH_API_FETCH_THREADS` threads, and each yielded as soon as it arrives rather than in
+    order.
+
+    The number of pages is worked out from the first page's size and the total it reports. If the last of them links to
+    a next page (the results having grown in the meantime) the rest are fetched one at a time, as before.
+    """
+    result = search_api_client._get(_with_query_params(search_api_url, idOnly=True) if id_only else search_api_url)
+    services = _get_services(result)
+    yield services
+
+    next_url = result.get('links', {}).get('next')
+    page_count = ceil(result.get('meta', {}).get('total', 0) / len(services)) if services else 0
+    if next_url and page_count > 1:
+        def get_page(page):
+            return search_api_client._get(_with_query_params(next_url, page=page))
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(current_app.config['DM_API_SEARCH_API_FETCH_THREADS'], page_count - 1),
+            thread_name_prefix='search-api-fetch',
+        )
+        try:
+            futures = {
+                # a copy of the request context per page, so that each is sent with this request's id
+                executor.submit(copy_current_request_context(get_page) if has_request_context() else get_page, page):
+                page
+                for page in range(2, page_count + 1)
+            }
+            for future in as_completed(futures):
+                page_result = future.result()
+                if futures[future] == page_count:
+                    result = page_result
+                yield _get_services(page_result)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        next_url = result.get('links', {}).get('next')
+
+    while next_url:
+        result = search_api_client._get(next_url)
+        yield _get_services(result)
+        next_url = result.get('links', {}).get('next')
@@ -1,15 +1,26 @@
+import os
+from datetime import datetime
+
 from flask import current_app, abort
+from sqlalchemy import case
 from sqlalchemy.exc import IntegrityError, DataError
 
-from .utils import get_json_from_request, index_object, json_has_matching_id, json_has_required_keys
-from .validation import get_validation_errors
+from .utils import (
+    get_json_from_request,
+    index_object,
+    json_has_matching_id,
+    json_has_required_keys,
+    process_pool_map,
+    random_positive_external_id,
+)
+from .validation import get_field_validation_errors, get_validation_errors
 from . import search_api_client, dmapiclient
 from . import db
 
 from dmapiclient.audit import AuditTypes
 from dmutils.errors.api import ValidationError
 
-from .models import ArchivedService, AuditEvent, Framework, Service, Supplier
+from .models import ArchivedService, AuditEvent, DraftService, Framework, Service, Supplier
 
 
 def validate_and_return_service_request(service_id):
@@ -23,9 +34,7 @@ def validate_and_return_service_request(service_id):
 def validate_and_return_lot(json_payload):
     json_has_required_keys(json_payload, ['frameworkSlug', 'lot'])
 
-    framework = Framework.query.filter(
-        Framework.slug == json_payload['frameworkSlug']
-    ).first()
+    framework = Framework.find_by_slug(json_payload['frameworkSlug'])
 
     if not framework:
         abort(400, "Framework '{}' does not exist".format(json_payload['frameworkSlug']))
@@ -69,26 +78,42 @@ def update_and_validate_service(service, service_payload):
 
 
 def _get_validator_name(service):
-    if service.framework.slug in ['g-cloud-4', 'g-cloud-5']:
-        return 'services-{}'.format(service.framework.slug)
+    return _get_lot_validator_name(service.framework, service.lot)
+
+
+def _get_lot_validator_name(framework, lot):
+    if framework.slug in ['g-cloud-4', 'g-cloud-5']:
+        return 'services-{}'.format(framework.slug)
     else:
-        return 'services-{}-{}'.format(service.framework.slug, service.lot.slug)
+        return 'services-{}-{}'.format(framework.slug, lot.slug)
 
 
-def validate_service_data(service, enforce_required=True, required_fields=None):
+def validate_service_data(service, enforce_required=True, required_fields=None, fields=None):
     errs = get_service_validation_errors(
-        service, enforce_required, required_fields)
+        service, enforce_required, required_fields, fields)
 
     if errs:
         abort(400, errs)
 
 
-def get_service_validation_errors(service, enforce_required=True, required_fields=None):
+def get_service_validation_errors(service, enforce_required=True, required_fields=None, fields=None):
+    """
+    If `fields` are given (and required fields aren't being enforced) only those fields and the ones they share
+    cross-field rules with are validated, assuming the rest of `service.data` was valid when it was saved.
+    """
     # TODO: remove this when draft.data['copiedFromServiceId'] is converted to a foreign key field
     data_to_validate = service.data.copy()
     if 'copiedFromServiceId' in data_to_validate:
         data_to_validate.pop('copiedFromServiceId')
 
+    if fields is not None and not enforce_required:
+        return get_field_validation_errors(
+            _get_validator_name(service),
+            data_to_validate,
+            fields=set(fields) - {'copiedFromServiceId'},
+            required_fields=required_fields,
+        )
+
     return get_validation_errors(
         _get_validator_name(service),
         data_to_validate,
@@ -210,6 +235,170 @@ def create_service_from_draft(draft, status):
                 raise
 
 
+def allocate_service_ids(count):
+    """Return `count` new random service ids that no service has yet"""
+    service_ids = set()
+    while len(service_ids) < count:
+        candidates = {str(random_positive_external_id()) for _ in range(count - len(service_ids))} - service_ids
+        taken = {
+            service_id for service_id, in db.session.query(Service.service_id).filter(
+                Service.service_id.in_(candidates)
+            )
+        }
+        service_ids |= candidates - taken
+
+    return list(service_ids)
+
+
+def _get_draft_validation_errors(validator_name_and_data):
+    validator_name, data = validator_name_and_data
+    # as in get_service_validation_errors, which validates a copy without `copiedFromServiceId` but still publishes it
+    data = {key: value for key, value in data.items() if key != 'copiedFromServiceId'}
+
+    return get_validation_errors(validator_name, data, enforce_required=True)
+
+
+def publish_submitted_drafts(framework, lot, updated_by):
+    """
+    Publish every submitted draft on a lot that hasn't been published yet, as a new service - as publishing each one
+    with `POST /draft-services/<id>/publish` would, but a chunk of `DM_API_BULK_PUBLISH_CHUNK_SIZE` drafts at a time,
+    each chunk's services, archived services and audit events inserted with a statement apiece and committed together.
+
+    Drafts are validated by a pool of `DM_API_BULK_PUBLISH_VALIDATION_PROCESSES` processes (or one per CPU if that's
+    0), and any that fail are left unpublished.
+
+    :return: the number of drafts published, and a dict of the validation errors of each draft that wasn't
+    """
+    chunk_size = current_app.config['DM_API_BULK_PUBLISH_CHUNK_SIZE']
+    processes = current_app.config['DM_API_BULK_PUBLISH_VALIDATION_PROCESSES'] or os.cpu_count()
+    validator_name = _get_lot_validator_name(framework, lot)
+
+    drafts_query = db.session.query(
+        DraftService.id,
+        DraftService.supplier_id,
+        Supplier.name.label('supplier_name'),
+        DraftService.data,
+    ).join(
+        Supplier, Supplier.supplier_id == DraftService.supplier_id,
+    ).filter(
+        DraftService.framework_id == framework.id,
+        DraftService.lot_id == lot.id,
+        DraftService.status == 'submitted',
+        DraftService.service_id.is_(None),
+    ).order_by(DraftService.id)
+    total = drafts_query.count()
+
+    published, failures, last_draft_id = 0, {}, 0
+    with process_pool_map(processes) as map_:
+        while True:
+            drafts = drafts_query.filter(DraftService.id > last_draft_id).limit(chunk_size).all()
+            if not drafts:
+                break
+            last_draft_id = drafts[-1].id
+
+            valid_drafts = []
+            for draft, errors in zip(
+                drafts, map_(_get_draft_validation_errors, [(validator_name, draft.data) for draft in drafts])
+            ):
+                if errors:
+                    failures[draft.id] = errors
+                else:
+                    valid_drafts.append(draft)
+
+            if valid_drafts:
+                published += _publish_drafts(framework, lot, valid_drafts, updated_by)
+
+            current_app.logger.info(
+                f"Published {published} of {total} submitted {framework.slug} {lot.slug} drafts, "
+                f"{len(failures)} failed validation",
+                extra={"framework": framework.slug, "lot": lot.slug, "published": published, "total": total},
+            )
+
+    return published, failures
+
+
+def _publish_drafts(framework, lot, drafts, updated_by):
+    attempts = 0
+    while True:
+        try:
+            service_pks = _insert_services_from_drafts(
+                framework, lot, drafts, updated_by, allocate_service_ids(len(drafts))
+            )
+            db.session.commit()
+            break
+        except IntegrityError:
+            # someone else has published a service with one of our ids since we allocated them
+            current_app.logger.warning("Service ID collision publishing {} drafts".format(len(drafts)))
+            attempts += 1
+            db.session.rollback()
+            if attempts >= 5:
+                raise
+
+    if framework.status == 'live' and framework.framework == 'g-cloud':
+        for service in Service.query.filter(Service.id.in_(service_pks)):
+            index_service(service, wait_for_response=False)
+
+    return len(drafts)
+
+
+def _insert_services_from_drafts(framework, lot, drafts, updated_by, service_ids):
+    now = datetime.utcnow()
+    service_rows = [
+        {
+            'service_id': service_id,
+            'supplier_id': draft.supplier_id,
+            'framework_id': framework.id,
+            'lot_id': lot.id,
+            'data': draft.data,
+            'status': 'published',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for draft, service_id in zip(drafts, service_ids)
+    ]
+
+    service_pks = dict(db.session.execute(
+        Service.__table__.insert().values(service_rows).returning(Service.service_id, Service.id)
+    ).all())
+    archived_service_pks = dict(db.session.execute(
+        ArchivedService.__table__.insert().values(service_rows).returning(
+            ArchivedService.service_id, ArchivedService.id
+        )
+    ).all())
+
+    db.session.execute(AuditEvent.__table__.insert().values([
+        {
+            'type': AuditTypes.publish_draft_service.value,
+            'user': updated_by,
+            'data': {
+                'draftId': draft.id,
+                'serviceId': service_id,
+                'oldArchivedServiceId': None,
+                'newArchivedServiceId': archived_service_pks[service_id],
+                'supplierName': draft.supplier_name,
+                'supplierId': draft.supplier_id,
+            },
+            'object_type': Service.__name__,
+            'object_id': service_pks[service_id],
+            'acknowledged': False,
+            'created_at': now,
+        }
+        for draft, service_id in zip(drafts, service_ids)
+    ]))
+
+    draft_service_ids = {draft.id: service_id for draft, service_id in zip(drafts, service_ids)}
+    db.session.execute(
+        DraftService.__table__.update().where(
+            DraftService.__table__.c.id.in_(draft_service_ids)
+        ).values(
+            service_id=case(draft_service_ids, value=DraftService.__table__.c.id),
+            updated_at=now,
+        )
+    )
+
+    return list(service_pks.values())
+
+
 def filter_services(framework_slugs=None, statuses=None, lot_slug=None, location=None, role=None):
     if framework_slugs:
         services = Service.query.has_frameworks(*framework_slugs)
@@ -1,23 +1,35 @@
-from flask import request
+from flask import current_app, request
 from sqlalchemy.exc import SQLAlchemyError
 
 from . import status
 from . import utils
+from .. import db
+from ..metrics import get_statement_cache_stats
 from ..models import Framework
+from ..read_replicas import get_replica_binds, get_replication_lag
 from dmutils.status import get_app_status, StatusError
 from app import search_api_client
 
 
 def get_db_status():
     try:
-        return {
+        db_status = {
             'frameworks': {f.slug: f.status for f in Framework.query.all()},
             'db_version': utils.get_db_version(),
+            'statement_cache': get_statement_cache_stats(db.engine),
         }
 
     except SQLAlchemyError:
         raise StatusError('Error connecting to database')
 
+    if get_replica_binds(current_app):
+        try:
+            db_status['replication_lag_seconds'] = get_replication_lag()
+        except SQLAlchemyError:
+            raise StatusError('Error connecting to read replica')
+
+    return db_status
+
 
 @status.route('/_status')
 def status():
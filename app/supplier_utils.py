@@ -41,19 +41,32 @@ def validate_agreement_details_data(agreement_details, enforce_required=True, re
         abort(400, errs)
 
 
-def check_supplier_role(role, supplier_id):
+def get_declaration_fields_or_400(args):
+    """
+    The declaration fields asked for with a comma-separated `declaration_fields` argument, or None if there isn't one
+    """
+    if 'declaration_fields' not in args:
+        return None
+
+    fields = list(dict.fromkeys(field.strip() for field in args['declaration_fields'].split(',') if field.strip()))
+    # each field is two arguments to json_build_object, which can have at most 100
+    if not 1 <= len(fields) <= 50:
+        abort(400, "Invalid declaration_fields: give between 1 and 50 comma-separated field names")
+
+    return fields
+
+
+def get_supplier_role_error(role, supplier_id):
     if role == 'supplier' and not supplier_id:
-        abort(400, "'supplierId' is required for users with 'supplier' role")
+        return "'supplierId' is required for users with 'supplier' role"
     elif role != 'supplier' and supplier_id:
-        abort(400, "'supplierId' is only valid for users with 'supplier' role, not '{}'".format(role))
+        return "'supplierId' is only valid for users with 'supplier' role, not '{}'".format(role)
 
 
-def company_details_confirmed_if_required_for_framework(framework_slug, supplier_framework):
-    return (
-        supplier_framework.supplier.company_details_confirmed
-        if framework_slug == 'g-cloud-10' else
-        supplier_framework.application_company_details_confirmed
-    )
+def check_supplier_role(role, supplier_id):
+    error = get_supplier_role_error(role, supplier_id)
+    if error:
+        abort(400, error)
 
 
 def update_open_declarations_with_company_details(db, supplier_id, updater_json, specific_framework_slug=None):
@@ -0,0 +1,306 @@
+import os
+from datetime import datetime
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import String, and_, case, cast, exists, func, update
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.sql.expression import false as sql_false
+
+from dmapiclient.audit import AuditTypes
+
+from . import db, encryption
+from .models import AuditEvent, BuyerEmailDomain, ContactInformation, Supplier, User
+from .supplier_utils import get_supplier_role_error
+from .utils import process_pool_map
+from .validation import (
+    admin_email_address_has_approved_domain,
+    buyer_email_address_first_approved_domain,
+    get_user_json_error,
+)
+
+
+def _get_user_error(user_json, buyer_domains, supplier_ids, taken_email_addresses):
+    # the same checks, in the same order, as `POST /users`
+    email_address = user_json['emailAddress'].lower()
+    if email_address in taken_email_addresses:
+        return "User already exists"
+
+    role = user_json['role']
+    if role == 'buyer' and buyer_email_address_first_approved_domain(buyer_domains, email_address) is None:
+        return "invalid_buyer_domain"
+    if role in User.ADMIN_ROLES and not admin_email_address_has_approved_domain(email_address):
+        return "invalid_admin_domain"
+
+    supplier_role_error = get_supplier_role_error(role, user_json.get('supplierId'))
+    if supplier_role_error:
+        return supplier_role_error
+    if 'supplierId' in user_json and user_json['supplierId'] not in supplier_ids:
+        return "Invalid supplier id"
+
+
+def _hash_passwords(passwords):
+    processes = min(current_app.config['DM_API_BULK_USER_HASHING_PROCESSES'] or os.cpu_count(), len(passwords))
+    # each hash is a pickled string each way rather than a whole app
+    with process_pool_map(processes) as map_:
+        return map_(encryption.hashpw, passwords)
+
+
+def create_users(users_json):
+    """
+    Create a user for each of `users_json` - as `POST /users` would for each in turn, but validating them all up
+    front, hashing their passwords with a pool of `DM_API_BULK_USER_HASHING_PROCESSES` processes (or one per CPU if
+    that's 0) and inserting the users and their audit events with a statement apiece.
+
+    Any user that fails validation, or whose email address is already taken (including by one earlier in the list),
+    is left out.
+
+    :return: a list of the (index, id, email address) of each user created, and a dict of why each of the others
+             wasn't, by index
+    """
+    failures = {}
+    for index, user_json in enumerate(users_json):
+        error = get_user_json_error(user_json) if isinstance(user_json, dict) else "JSON was not a valid format."
+        if error:
+            failures[index] = error
+
+    candidates = [(index, user_json) for index, user_json in enumerate(users_json) if index not in failures]
+    email_addresses = {user_json['emailAddress'].lower() for _, user_json in candidates}
+    taken_email_addresses = {
+        email_address for email_address, in
+        db.session.query(User.email_address).filter(User.email_address.in_(email_addresses))
+    }
+    requested_supplier_ids = {user_json['supplierId'] for _, user_json in candidates if 'supplierId' in user_json}
+    supplier_ids = {
+        supplier_id for supplier_id, in
+        db.session.query(Supplier.supplier_id).filter(Supplier.supplier_id.in_(requested_supplier_ids))
+    }
+    buyer_domains = BuyerEmailDomain.query.all()
+
+    valid_users = []
+    for index, user_json in candidates:
+        error = _get_user_error(user_json, buyer_domains, supplier_ids, taken_email_addresses)
+        if error:
+            failures[index] = error
+        else:
+            taken_email_addresses.add(user_json['emailAddress'].lower())
+            valid_users.append((index, user_json))
+
+    if not valid_users:
+        return [], failures
+
+    to_hash = [index for index, user_json in valid_users if user_json.get('hashpw', True)]
+    hashed_passwords = dict(zip(to_hash, _hash_passwords([users_json[index]['password'] for index in to_hash])))
+
+    now = datetime.utcnow()
+    user_ids = dict(db.session.execute(
+        pg_insert(User.__table__).values([
+            {
+                'email_address': user_json['emailAddress'].lower(),
+                'phone_number': user_json.get('phoneNumber') or None,
+                'name': user_json['name'],
+                'role': user_json['role'],
+                'password': hashed_passwords.get(index, user_json['password']),
+                'active': True,
+                'created_at': now,
+                'updated_at': now,
+                'password_changed_at': now,
+                'user_research_opted_in': False,
+                'supplier_id': user_json.get('supplierId'),
+            }
+            for index, user_json in valid_users
+        ]).on_conflict_do_nothing(
+            # someone else has taken the email address since we looked
+            index_elements=[User.email_address]
+        ).returning(User.email_address, User.id)
+    ).all())
+
+    created, audit_events = [], []
+    for index, user_json in valid_users:
+        email_address = user_json['emailAddress'].lower()
+        if email_address not in user_ids:
+            failures[index] = "User already exists"
+            continue
+
+        audit_data = {}
+        if user_json['role'] == 'buyer':
+            audit_data['qualifyingBuyerEmailDomain'] = buyer_email_address_first_approved_domain(
+                buyer_domains, email_address
+            ).domain_name
+        if 'supplierId' in user_json:
+            audit_data['supplierId'] = user_json['supplierId']
+
+        created.append((index, user_ids[email_address], email_address))
+        audit_events.append({
+            'type': AuditTypes.create_user.value,
+            'user': email_address,
+            'data': audit_data,
+            'object_type': User.__name__,
+            'object_id': user_ids[email_address],
+            'acknowledged': False,
+            'created_at': now,
+        })
+
+    if audit_events:
+        db.session.execute(AuditEvent.__table__.insert().values(audit_events))
+    db.session.commit()
+
+    return created, failures
+
+
+def _dormant_users_criteria(logged_in_before, active=None):
+    # users who've never logged in are as old as their account, as in `User.serialize`
+    criteria = [
+        User.personal_data_removed == sql_false(),
+        func.coalesce(User.logged_in_at, User.created_at) < logged_in_before,
+    ]
+    if active is not None:
+        criteria.append(User.active == active)
+    return criteria
+
+
+def _removed_value(pk_column):
+    """A random, unique value (a UUID string) for each row an update removes personal data from"""
+    return cast(cast(func.md5(cast(func.random(), String) + cast(pk_column, String)), UUID), String)
+
+
+def _remove_users_personal_data(user_ids, dormant_users_criteria, updated_by):
+    uuid = _removed_value(User.id)
+    # nobody knows the password it's a hash of, as with `User.remove_personal_data`, but hashed once for the lot
+    password = encryption.hashpw(str(uuid4()))
+    now = datetime.utcnow()
+    removed_user_ids = [user_id for user_id, in db.session.execute(
+        update(User.__table__).where(
+            User.id.in_(user_ids), *dormant_users_criteria
+        ).values(
+            email_address=case(
+                (User.role == 'buyer', '<removed><' + uuid + '>@user.marketplace.team'),
+                (
+                    User.role.in_(User.ADMIN_ROLES),
+                    '<removed><' + uuid + '>@' + func.split_part(User.email_address, '@', 2),
+                ),
+                else_='<removed>@' + uuid + '.com',
+            ),
+            personal_data_removed=True,
+            active=False,
+            name='<removed>',
+            phone_number='<removed>',
+            failed_login_count=0,
+            password=password,
+            user_research_opted_in=False,
+            updated_at=now,
+        ).returning(User.id)
+    )]
+
+    if removed_user_ids:
+        db.session.execute(AuditEvent.__table__.insert().values([
+            {
+                'type': AuditTypes.update_user.value,
+                'user': updated_by,
+                'data': {},
+                'object_type': User.__name__,
+                'object_id': user_id,
+                'acknowledged': False,
+                'created_at': now,
+            }
+            for user_id in removed_user_ids
+        ]))
+    db.session.commit()
+
+    return len(removed_user_ids)
+
+
+def _remove_contacts_personal_data(contact_ids, orphaned_contacts_criteria, updated_by):
+    uuid = _removed_value(ContactInformation.id)
+    now = datetime.utcnow()
+    removed_contacts = db.session.execute(
+        update(ContactInformation.__table__).where(
+            ContactInformation.id.in_(contact_ids),
+            Supplier.supplier_id == ContactInformation.supplier_id,
+            *orphaned_contacts_criteria
+        ).values(
+            personal_data_removed=True,
+            contact_name='<removed>',
+            phone_number='<removed>',
+            email='<removed>@' + uuid + '.com',
+            address1='<removed>',
+            city='<removed>',
+            postcode='<removed>',
+        ).returning(Supplier.id)
+    ).all()
+
+    if removed_contacts:
+        db.session.execute(AuditEvent.__table__.insert().values([
+            {
+                'type': AuditTypes.contact_update.value,
+                'user': updated_by,
+                'data': {},
+                'object_type': Supplier.__name__,
+                'object_id': supplier_pk,
+                'acknowledged': False,
+                'created_at': now,
+            }
+            for supplier_pk, in removed_contacts
+        ]))
+    db.session.commit()
+
+    return len(removed_contacts)
+
+
+def remove_dormant_personal_data(logged_in_before, updated_by, active=None, dry_run=False):
+    """
+    Remove the personal data of every user who hasn't logged in since `logged_in_before` (optionally only those who
+    are, or aren't, `active`), and then of the contact information of every supplier all of whose users have had
+    theirs removed - as `POST /users/<id>/remove-personal-data` and its contact information equivalent would for each,
+    but `DM_API_PERSONAL_DATA_RETENTION_CHUNK_SIZE` at a time with an `UPDATE ... RETURNING` statement, their audit
+    events inserted with another, and committed together.
+
+    Objects whose data has already been removed are left alone, as is anyone who logs in while it's running.
+
+    :return: the number of users, and of contact information entries, whose personal data was (or, with `dry_run`,
+             would have been) removed
+    """
+    chunk_size = current_app.config['DM_API_PERSONAL_DATA_RETENTION_CHUNK_SIZE']
+    dormant_users_criteria = _dormant_users_criteria(logged_in_before, active)
+    # suppliers with users, none of whom still have personal data (or will once the dormant users' is removed)
+    orphaned_contacts_criteria = [
+        ContactInformation.personal_data_removed == sql_false(),
+        exists().where(User.supplier_id == ContactInformation.supplier_id),
+        ~exists().where(
+            User.supplier_id == ContactInformation.supplier_id,
+            User.personal_data_removed == sql_false(),
+            ~and_(*dormant_users_criteria),
+        ),
+    ]
+
+    user_ids = [
+        user_id for user_id, in
+        db.session.query(User.id).filter(*dormant_users_criteria).order_by(User.id)
+    ]
+    contact_ids = [
+        contact_id for contact_id, in
+        db.session.query(ContactInformation.id).filter(*orphaned_contacts_criteria).order_by(ContactInformation.id)
+    ]
+    if dry_run:
+        return len(user_ids), len(contact_ids)
+
+    removed_users = removed_contacts = 0
+    for start in range(0, len(user_ids), chunk_size):
+        removed_users += _remove_users_personal_data(
+            user_ids[start:start + chunk_size], dormant_users_criteria, updated_by
+        )
+        current_app.logger.info(
+            f"Removed personal data of {removed_users} of {len(user_ids)} dormant users",
+            extra={"removed": removed_users, "total": len(user_ids)},
+        )
+
+    for start in range(0, len(contact_ids), chunk_size):
+        removed_contacts += _remove_contacts_personal_data(
+            contact_ids[start:start + chunk_size], orphaned_contacts_criteria, updated_by
+        )
+        current_app.logger.info(
+            f"Removed personal data of {removed_contacts} of {len(contact_ids)} dormant contacts",
+            extra={"removed": removed_contacts, "total": len(contact_ids)},
+        )
+
+    return removed_users, removed_contacts
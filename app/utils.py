@@ -1,5 +1,7 @@
 import datetime
+import multiprocessing
 import random
+from contextlib import contextmanager
 
 from flask import url_for as base_url_for
 from flask import abort, current_app, request, jsonify
@@ -18,6 +20,22 @@ def random_positive_external_id() -> int:
     return random.SystemRandom().randint(10 ** 14, (10 ** 15) - 1)
 
 
+@contextmanager
+def process_pool_map(processes):
+    """
+    A `map` (returning a list) that's spread over a pool of `processes` processes for as long as the block lasts - or,
+    given only one process, the builtin one, without a pool.
+
+    The pool's processes are forked, so share whatever's already loaded (like the JSON schemas) with this one, but
+    the functions mapped and their arguments and results still have to be pickled.
+    """
+    if processes > 1:
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            yield pool.map
+    else:
+        yield lambda func, items: list(map(func, items))
+
+
 def validate_and_return_updater_request():
     json_payload = get_json_from_request()
 
@@ -74,6 +92,31 @@ def result_meta(total_count):
     return {"total": total_count}
 
 
+# the `serialize` arguments that ask for the users a result references to be looked up and included
+_WITH_USERS_SERIALIZE_KWARGS = ("with_users", "include_user")
+
+
+def serialize_results(results, serialize_kwargs=None):
+    """
+    Serialize a list of results, first letting any that reference users (via an `add_referenced_users` method) tell the
+    request's user resolver about them if `serialize_kwargs` asks for users, so the whole list's users can be looked up
+    together. Result classes with a `prepare_to_serialize` class method are given all of their results at once to do
+    any other such work together.
+    """
+    results = list(results)
+    serialize_kwargs = serialize_kwargs or {}
+    if any(serialize_kwargs.get(kwarg) for kwarg in _WITH_USERS_SERIALIZE_KWARGS):
+        for result in results:
+            if hasattr(result, "add_referenced_users"):
+                result.add_referenced_users()
+
+    for result_class in {type(result) for result in results}:
+        if hasattr(result_class, "prepare_to_serialize"):
+            result_class.prepare_to_serialize([result for result in results if type(result) is result_class])
+
+    return [result.serialize(**serialize_kwargs) for result in results]
+
+
 def single_result_response(result_name, result, serialize_kwargs=None):
     """Return a standardised JSON response for a single serialized SQLAlchemy result e.g. a single brief"""
     return jsonify(**{result_name: result.serialize(**(serialize_kwargs if serialize_kwargs else {}))})
@@ -85,9 +128,7 @@ def list_result_response(result_name, results_query, serialize_kwargs=None):
     The query should not be executed before being passed in as a argument. Results will be returned in a list and use
     the results `serialize` method for presentation.
     """
-    serialized_results = [
-        result.serialize(**(serialize_kwargs if serialize_kwargs else {})) for result in results_query
-    ]
+    serialized_results = serialize_results(results_query, serialize_kwargs)
     meta = result_meta(len(serialized_results))
     return jsonify(meta=meta, **{result_name: serialized_results})
 
@@ -101,9 +142,7 @@ def paginated_result_response(result_name, results_query, page, per_page, endpoi
     """
     pagination = results_query.paginate(page=page, per_page=per_page)
     meta = result_meta(pagination.total)
-    serialized_results = [
-        result.serialize(**(serialize_kwargs if serialize_kwargs else {})) for result in pagination.items
-    ]
+    serialized_results = serialize_results(pagination.items, serialize_kwargs)
     links = pagination_links(pagination, endpoint, request_args)
     return jsonify(meta=meta, links=links, **{result_name: serialized_results})
 
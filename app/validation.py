@@ -2,6 +2,7 @@ import json
 import re
 import os
 import copy
+from functools import lru_cache
 from decimal import Decimal
 from typing import Iterable, Optional, TYPE_CHECKING
 
@@ -39,23 +40,30 @@ def load_schemas(schema_paths):
 _SCHEMAS = load_schemas(SCHEMA_PATHS)
 
 
+@lru_cache(maxsize=None)
+def _get_enforcing_validator(schema_name):
+    """The validator for a whole schema, built once per schema (and once per process, given `app.preload`)"""
+    schema = _SCHEMAS[schema_name]
+    return validator_for(schema)(schema, format_checker=FORMAT_CHECKER)
+
+
 def get_validator(schema_name, enforce_required=True, required_fields=None):
     if required_fields is None:
         required_fields = []
     if enforce_required:
-        schema = _SCHEMAS[schema_name]
-    else:
-        schema = copy.deepcopy(_SCHEMAS[schema_name])
-        schema['required'] = [
-            field for field in schema.get('required', [])
-            if field in required_fields
-        ]
-        schema['dependencies'] = {
-            k: v
-            for k, v in schema.get('dependencies', {}).items()
-            if k in required_fields
-        }
-        schema.pop('anyOf', None)
+        return _get_enforcing_validator(schema_name)
+
+    schema = copy.deepcopy(_SCHEMAS[schema_name])
+    schema['required'] = [
+        field for field in schema.get('required', [])
+        if field in required_fields
+    ]
+    schema['dependencies'] = {
+        k: v
+        for k, v in schema.get('dependencies', {}).items()
+        if k in required_fields
+    }
+    schema.pop('anyOf', None)
     return validator_for(schema)(schema, format_checker=FORMAT_CHECKER)
 
 
@@ -66,14 +74,21 @@ def validate_updater_json_or_400(submitted_json):
         abort(400, "JSON validation error: {}".format(e1.message))
 
 
-def validate_user_json_or_400(submitted_json):
+def get_user_json_error(submitted_json):
+    """Why `validate_user_json_or_400` would reject `submitted_json`, or None if it wouldn't"""
     try:
         get_validator('users').validate(submitted_json)
     except ValidationError as e:
-        abort(400, "JSON was not a valid format. {}".format(e.message))
+        return "JSON was not a valid format. {}".format(e.message)
     if submitted_json['role'] == 'supplier' \
             and 'supplierId' not in submitted_json:
-        abort(400, "No supplier id provided for supplier user")
+        return "No supplier id provided for supplier user"
+
+
+def validate_user_json_or_400(submitted_json):
+    error = get_user_json_error(submitted_json)
+    if error:
+        abort(400, error)
 
 
 def validate_user_auth_json_or_400(submitted_json):
@@ -137,6 +152,96 @@ def get_validation_errors(validator_name, json_data,
     return translate_json_schema_errors(errors, json_data)
 
 
+def get_field_validation_errors(validator_name, json_data, fields, required_fields=None):
+    """
+    Validate only `fields` of `json_data` (and any other fields they share a cross-field rule with), as
+    `get_validation_errors` would with `enforce_required=False`.
+
+    The rest of the document is assumed to have passed validation when it was saved, in which case the errors are the
+    same as validating all of it - for a page of a draft that's a handful of questions rather than the whole schema.
+    """
+    validator = _get_field_validator(validator_name, frozenset(fields), frozenset(required_fields or ()))
+
+    return translate_json_schema_errors(validator.iter_errors(json_data), json_data)
+
+
+def _get_price_pair(key):
+    if key.lower().endswith('pricemin'):
+        return (key[:-8] + 'PriceMax') if key[:-8] else 'priceMax'
+    if key.lower().endswith('pricemax'):
+        return (key[:-8] + 'PriceMin') if key[:-8] else 'priceMin'
+
+
+def _get_rule_questions(rule):
+    """All the questions an `allOf` rule refers to, however deeply nested"""
+    if isinstance(rule, list):
+        return set().union(*(_get_rule_questions(item) for item in rule))
+    if not isinstance(rule, dict):
+        return set()
+
+    questions = set(rule.get('properties', {})) | set(rule.get('required', []))
+    for keyword in ('allOf', 'anyOf', 'oneOf', 'not'):
+        if keyword in rule:
+            questions |= _get_rule_questions(rule[keyword])
+    return questions
+
+
+@lru_cache(maxsize=None)
+def _get_question_rules(schema_name):
+    """Map each question in a schema to the indexes of the schema's `allOf` cross-field rules it takes part in"""
+    question_rules = {}
+    for index, rule in enumerate(_SCHEMAS[schema_name].get('allOf', [])):
+        for question in _get_rule_questions(rule):
+            question_rules.setdefault(question, set()).add(index)
+    return question_rules
+
+
+@lru_cache(maxsize=1024)
+def _get_field_validator(schema_name, fields, required_fields):
+    """
+    Build a validator for the part of a schema covering `fields`.
+
+    Besides the fields themselves, that's the questions of any cross-field rule they're part of: `allOf` rules,
+    `dependencies` (which, like `get_validator(enforce_required=False)`, only apply to `required_fields`) and min/max
+    price pairs. Every other property accepts anything, so that `additionalProperties` still applies to the whole
+    document, and keywords keep the schema's order so errors come out in the same order as full validation.
+    """
+    schema = _SCHEMAS[schema_name]
+    question_rules = _get_question_rules(schema_name)
+    dependencies = {
+        key: value for key, value in schema.get('dependencies', {}).items() if key in required_fields
+    }
+
+    questions, rule_indexes = set(), set()
+    related_questions = set(fields) | required_fields
+    while related_questions - questions:
+        questions |= related_questions
+        for question in questions:
+            rule_indexes |= question_rules.get(question, set())
+            if _get_price_pair(question):
+                related_questions.add(_get_price_pair(question))
+        for index in rule_indexes:
+            related_questions |= _get_rule_questions(schema['allOf'][index])
+        for key, value in dependencies.items():
+            if key in questions or questions.intersection(value):
+                related_questions |= {key, *value}
+
+    sub_schema = {}
+    for keyword, value in schema.items():
+        if keyword == 'properties':
+            sub_schema[keyword] = {key: value if key in questions else {} for key, value in value.items()}
+        elif keyword == 'required':
+            sub_schema[keyword] = [field for field in value if field in required_fields]
+        elif keyword == 'dependencies':
+            sub_schema[keyword] = {key: value for key, value in dependencies.items() if key in questions}
+        elif keyword == 'allOf':
+            sub_schema[keyword] = [rule for index, rule in enumerate(value) if index in rule_indexes]
+        elif keyword != 'anyOf':
+            sub_schema[keyword] = value
+
+    return validator_for(sub_schema)(sub_schema, format_checker=FORMAT_CHECKER)
+
+
 def translate_json_schema_errors(errors, json_data):
     error_map = {}
     form_errors = []
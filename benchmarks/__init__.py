@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the API's hot paths.
+
+`benchmarks.data` fills a freshly migrated database with a seeded, synthetic marketplace at roughly production volumes
+and `benchmarks.scenarios` times requests against it. Run them both with `benchmarks/run.py`.
+"""
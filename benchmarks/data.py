@@ -0,0 +1,464 @@
+"""
+Seeded generator of a synthetic marketplace for the benchmarks to run against.
+
+Full volumes are roughly those of production. Rows are bulk loaded with `COPY` into a freshly migrated database, using
+the frameworks and lots the migrations create. Service and draft data is copied from the real listings in
+`example_listings`. A given seed and scale always produce the same data, except that brief publishing dates are
+relative to when the data was generated, so there are always some live briefs.
+"""
+import csv
+import io
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import encryption
+
+
+FULL_VOLUMES = {
+    "suppliers": 10000,
+    "buyers": 5000,
+    "services": 200000,
+    "briefs": 50000,
+    "audit_events": 5000000,
+}
+
+# every active generated user can log in with this password
+PASSWORD = "Benchmark password 1"
+
+ADMIN_EMAIL_ADDRESS = "benchmark-admin@digital.cabinet-office.gov.uk"
+DEACTIVATED_EMAIL_ADDRESS = "benchmark-deactivated@digital.gov.uk"
+INACTIVE_SUPPLIER_USER_RATIO = 0.1
+
+EXAMPLE_LISTINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example_listings")
+
+# the G-Cloud 6 lots published services are spread over, how common each is and the listing its services copy
+G6_LOTS = (("saas", 5, "G6-SaaS"), ("paas", 1, "G6-PaaS"), ("iaas", 1, "G6-IaaS"), ("scs", 3, "G6-SCS"))
+G7_DRAFT_LOT, G7_DRAFT_LISTING = "scs", "G7-SCS"
+
+# fields of the example listings which are columns (or derived from them) rather than service data
+LISTING_METADATA_KEYS = ("id", "supplierId", "lot", "frameworkName", "frameworkSlug", "createdAt", "title")
+
+SERVICE_ID_BASE = 8000000000000000
+HISTORY_START = datetime(2015, 1, 1)
+COPY_CHUNK_SIZE = 50000
+
+NAME_WORDS = (
+    "Acme", "Agile", "Alpha", "Apex", "Arrow", "Atlas", "Beacon", "Blue", "Bright", "Bridge", "Cedar", "Cloud",
+    "Coastal", "Crown", "Data", "Delta", "Digital", "Dragon", "Eagle", "Echo", "Evergreen", "Falcon", "Forge",
+    "Granite", "Harbour", "Horizon", "Iron", "Kestrel", "Lighthouse", "Maple", "Meridian", "North", "Oak", "Orbit",
+    "Pennine", "Phoenix", "Pioneer", "Quantum", "Red", "River", "Sapphire", "Summit", "Thames", "Vector", "Willow",
+)
+NAME_NOUNS = (
+    "Analytics", "Associates", "Cloud", "Computing", "Consulting", "Data", "Digital", "Hosting", "Innovations",
+    "Labs", "Networks", "Partners", "Services", "Software", "Solutions", "Systems", "Technologies", "Works",
+)
+NAME_SUFFIXES = ("Ltd", "Limited", "LLP", "PLC", "Group", "UK")
+LOCATIONS = ("London", "Wales", "Scotland", "North East England", "South West England", "Yorkshire and the Humber")
+ROLES = ("developer", "designer", "deliveryManager", "businessAnalyst", "technicalArchitect", "userResearcher")
+
+BRIEF_DATA = {
+    "essentialRequirements": ["Python", "PostgreSQL", "Working in the open"],
+    "startDate": "31-12-2020",
+    "evaluationType": ["Reference", "Interview"],
+    "niceToHaveRequirements": ["Flask", "Elasticsearch"],
+    "existingTeam": "A multidisciplinary team of eight.",
+    "specialistWork": "Building and running the service's API.",
+    "workingArrangements": "Three days a week on site.",
+    "securityClearance": "Baseline personnel security standard.",
+    "priceWeighting": 20,
+    "technicalWeighting": 60,
+    "culturalWeighting": 20,
+    "contractLength": "6 months",
+    "culturalFitCriteria": ["Works well with others", "Shares knowledge"],
+    "numberOfSuppliers": 3,
+    "summary": "Help us build a better marketplace.",
+    "workplaceAddress": "Aviation House",
+    "requirementsLength": "2 weeks",
+}
+
+DECLARATION_ANSWERS = {
+    **{f"PR{i}": True for i in range(1, 6)},
+    **{f"SQ1-1{letter}": "Yes" for letter in "abcdefghijklmnop"},
+    **{f"SQ2-{i}": False for i in range(1, 12)},
+    "conspiracy": False, "corruptionBribery": False, "fraudAndTheft": False, "terrorism": False,
+    "organisedCrime": False, "taxEvasion": False, "environmentalSocialLabourLaw": False,
+    "unspentTaxConvictions": False, "GAAR": False, "confidentialInformation": False,
+    "misleadingInformation": False, "distortingCompetition": False, "distortedCompetition": False,
+    "witheldSupportingDocuments": False, "seriousMisrepresentation": False,
+    "significantOrPersistentDeficiencies": False,
+    "graveProfessionalMisconduct": False, "bankrupt": False, "canProvideFromDayOne": True,
+    "servicesHaveOrSupportCloudHostingCloudSoftware": "Yes",
+    "servicesHaveOrSupportCloudSupport": "Yes",
+}
+
+# audit event types, how common each is and the kind of object they're about
+AUDIT_EVENT_TYPES = (
+    ("update_service", 35, "Service"),
+    ("update_service_status", 10, "Service"),
+    ("supplier_update", 15, "Supplier"),
+    ("contact_update", 10, "Supplier"),
+    ("update_user", 10, "User"),
+    ("create_user", 5, "User"),
+    ("update_brief", 15, "Brief"),
+)
+
+
+def get_volumes(scale):
+    return {name: max(1, int(volume * scale)) for name, volume in FULL_VOLUMES.items()}
+
+
+def load_example_listing(name):
+    with open(os.path.join(EXAMPLE_LISTINGS_PATH, f"{name}.json")) as f:
+        listing = json.load(f)
+
+    return {key: value for key, value in listing.items() if key not in LISTING_METADATA_KEYS}
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def copy_rows(connection, table, columns, rows):
+    """Bulk load an iterable of rows into `table` with `COPY`, a chunk at a time"""
+    cursor = connection.connection.cursor()
+    statement = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        table, ", ".join(f'"{column}"' for column in columns)
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_csv_value(value) for value in row])
+        if i % COPY_CHUNK_SIZE == 0:
+            flush()
+    flush()
+
+
+class MarketplaceGenerator:
+    def __init__(self, connection, seed=1, scale=1.0):
+        self.connection = connection
+        self.rng = random.Random(seed)
+        self.volumes = get_volumes(scale)
+        self.now = datetime.utcnow()
+
+        self.framework_ids = dict(connection.execute(text("SELECT slug, id FROM frameworks")).fetchall())
+        self.lot_ids = dict(connection.execute(text("SELECT slug, id FROM lots")).fetchall())
+
+    def _next_value(self, table, column="id"):
+        return self.connection.execute(text(f"SELECT coalesce(max({column}), 0) + 1 FROM {table}")).scalar()
+
+    def _random_date(self, start=HISTORY_START, end=None):
+        end = end or self.now
+        return start + timedelta(seconds=self.rng.randrange(max(1, int((end - start).total_seconds()))))
+
+    def _company_name(self):
+        return "{} {} {}".format(
+            self.rng.choice(NAME_WORDS), self.rng.choice(NAME_NOUNS), self.rng.choice(NAME_SUFFIXES)
+        )
+
+    def generate(self):
+        for table in ("suppliers", "services", "briefs"):
+            if self.connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table})")).scalar():
+                raise ValueError(f"Refusing to generate benchmark data: the {table} table isn't empty")
+
+        self.generate_suppliers()
+        self.generate_users()
+        self.generate_services()
+        self.generate_framework_applications()
+        self.generate_briefs()
+        self.generate_audit_events()
+
+        for table in ("suppliers", "users", "services", "briefs"):
+            self.connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+        self.connection.execute(text(
+            "SELECT setval('suppliers_supplier_id_seq', (SELECT max(supplier_id) FROM suppliers))"
+        ))
+
+        return self.volumes
+
+    def generate_suppliers(self):
+        first_id = self._next_value("suppliers")
+        first_supplier_id = self._next_value("suppliers", "supplier_id")
+        self.suppliers = [
+            (first_id + i, first_supplier_id + i, self._company_name()) for i in range(self.volumes["suppliers"])
+        ]
+
+        copy_rows(
+            self.connection,
+            "suppliers",
+            (
+                "id", "supplier_id", "name", "registered_name", "description", "duns_number", "companies_house_number",
+                "registration_country", "organisation_size", "trading_status", "company_details_confirmed", "active",
+            ),
+            (
+                (
+                    id_, supplier_id, name, f"{name} Holdings", f"{name} provide digital services to government.",
+                    str(100000000 + supplier_id), f"{supplier_id:08d}", "country:GB",
+                    self.rng.choice(("micro", "small", "medium", "large")), "limited company (LTD)",
+                    self.rng.random() < 0.8, self.rng.random() < 0.95,
+                )
+                for id_, supplier_id, name in self.suppliers
+            ),
+        )
+        copy_rows(
+            self.connection,
+            "contact_information",
+            ("supplier_id", "contact_name", "email", "phone_number", "address1", "city", "postcode"),
+            (
+                (
+                    supplier_id, f"Contact for {name}", f"contact@supplier-{supplier_id}.example.com", "020 7946 0000",
+                    "1 Benchmark Street", self.rng.choice(LOCATIONS), "SW1A 1AA",
+                )
+                for _, supplier_id, name in self.suppliers
+            ),
+        )
+
+    def generate_users(self):
+        password = encryption.hashpw(PASSWORD)
+        first_id = self._next_value("users")
+
+        # the unknown-user branch of /users/auth times itself against an inactive user, so there's always one
+        users = [
+            ("Benchmark Admin", ADMIN_EMAIL_ADDRESS, "admin", None, True),
+            ("Deactivated Buyer", DEACTIVATED_EMAIL_ADDRESS, "buyer", None, False),
+        ]
+        for _, supplier_id, name in self.suppliers:
+            for i in range(self.rng.randint(1, 3)):
+                users.append((
+                    f"{name} user {i}", f"user-{i}@supplier-{supplier_id}.example.com", "supplier", supplier_id,
+                    i == 0 or self.rng.random() >= INACTIVE_SUPPLIER_USER_RATIO,
+                ))
+        for i in range(self.volumes["buyers"]):
+            users.append((f"Buyer {i}", f"buyer-{i}@digital.gov.uk", "buyer", None, True))
+
+        self.user_ids = list(range(first_id, first_id + len(users)))
+        self.user_email_addresses = [user[1] for user in users]
+        self.buyer_user_ids = [
+            user_id for user_id, user in zip(self.user_ids, users) if user[2] == "buyer" and user[4]
+        ]
+
+        def rows():
+            for user_id, (name, email_address, role, supplier_id, active) in zip(self.user_ids, users):
+                created_at = self._random_date()
+                yield (
+                    user_id, name, email_address, password, active, created_at, created_at, created_at, role,
+                    supplier_id, 0, self._random_date(created_at),
+                )
+
+        copy_rows(
+            self.connection,
+            "users",
+            (
+                "id", "name", "email_address", "password", "active", "created_at", "updated_at", "password_changed_at",
+                "role", "supplier_id", "failed_login_count", "logged_in_at",
+            ),
+            rows(),
+        )
+
+    def generate_services(self):
+        framework_id = self.framework_ids["g-cloud-6"]
+        lots = [(self.lot_ids[slug], load_example_listing(listing)) for slug, _, listing in G6_LOTS]
+        lot_weights = [weight for _, weight, _ in G6_LOTS]
+
+        first_id = self._next_value("services")
+        self.services = []  # (id, supplier_id)
+
+        def rows():
+            for i in range(self.volumes["services"]):
+                _, supplier_id, name = self.rng.choice(self.suppliers)
+                lot_id, listing = self.rng.choices(lots, lot_weights)[0]
+                created_at = self._random_date()
+                self.services.append((first_id + i, supplier_id))
+                yield (
+                    first_id + i, str(SERVICE_ID_BASE + first_id + i), supplier_id, framework_id, lot_id,
+                    self.rng.choices(("published", "enabled", "disabled"), (90, 7, 3))[0],
+                    dict(
+                        listing,
+                        serviceName=f"{self.rng.choice(NAME_WORDS)} {self.rng.choice(NAME_NOUNS)} by {name}",
+                        serviceSummary=f"{self.rng.choice(NAME_NOUNS)} for the public sector, from {name}.",
+                    ),
+                    created_at, self._random_date(created_at),
+                )
+
+        copy_rows(
+            self.connection,
+            "services",
+            ("id", "service_id", "supplier_id", "framework_id", "lot_id", "status", "data", "created_at", "updated_at"),
+            rows(),
+        )
+
+    def generate_framework_applications(self):
+        """Interest in, declarations for and draft services on G-Cloud 7 from most of the suppliers"""
+        framework_id = self.framework_ids["g-cloud-7"]
+        lot_id = self.lot_ids[G7_DRAFT_LOT]
+        listing = load_example_listing(G7_DRAFT_LISTING)
+
+        applicants = [supplier for supplier in self.suppliers if self.rng.random() < 0.6]
+
+        copy_rows(
+            self.connection,
+            "supplier_frameworks",
+            ("supplier_id", "framework_id", "declaration", "application_company_details_confirmed"),
+            (
+                (
+                    supplier_id,
+                    framework_id,
+                    dict(
+                        DECLARATION_ANSWERS,
+                        status=self.rng.choices(("complete", "started"), (7, 3))[0],
+                        nameOfOrganisation=name,
+                        primaryContactEmail=f"contact@supplier-{supplier_id}.example.com",
+                    ),
+                    self.rng.random() < 0.8,
+                )
+                for _, supplier_id, name in applicants
+            ),
+        )
+
+        def rows():
+            for _, supplier_id, name in applicants:
+                for _ in range(self.rng.randint(0, 4)):
+                    created_at = self._random_date()
+                    yield (
+                        supplier_id, framework_id, lot_id, False,
+                        self.rng.choices(("submitted", "not-submitted"), (6, 4))[0],
+                        dict(listing, serviceName=f"{self.rng.choice(NAME_NOUNS)} by {name}"),
+                        created_at, self._random_date(created_at),
+                    )
+
+        copy_rows(
+            self.connection,
+            "draft_services",
+            ("supplier_id", "framework_id", "lot_id", "lot_one_service_limit", "status", "data", "created_at",
+             "updated_at"),
+            rows(),
+        )
+
+    def _brief_dates(self):
+        """Return (created_at, published_at, withdrawn_at, cancelled_at, unsuccessful_at) for a random brief status"""
+        status = self.rng.choices(
+            ("draft", "live", "closed", "withdrawn", "cancelled", "unsuccessful"), (15, 10, 60, 5, 5, 5)
+        )[0]
+        if status == "draft":
+            return self._random_date(), None, None, None, None
+        if status == "live":
+            published_at = self.now - timedelta(days=self.rng.uniform(0, 13))
+        else:
+            published_at = self._random_date(end=self.now - timedelta(days=15))
+
+        created_at = published_at - timedelta(days=self.rng.uniform(0, 30))
+        closed_at = published_at + timedelta(days=self.rng.uniform(15, 60))
+        return (
+            created_at,
+            published_at,
+            closed_at if status == "withdrawn" else None,
+            closed_at if status == "cancelled" else None,
+            closed_at if status == "unsuccessful" else None,
+        )
+
+    def generate_briefs(self):
+        framework_id = self.framework_ids["digital-outcomes-and-specialists"]
+        lot_ids = [
+            self.lot_ids[slug] for slug in ("digital-specialists", "digital-outcomes", "user-research-participants")
+        ]
+
+        first_id = self._next_value("briefs")
+        self.brief_ids = list(range(first_id, first_id + self.volumes["briefs"]))
+
+        def rows():
+            for brief_id in self.brief_ids:
+                created_at, published_at, withdrawn_at, cancelled_at, unsuccessful_at = self._brief_dates()
+                yield (
+                    brief_id, framework_id, self.rng.choices(lot_ids, (6, 3, 1))[0],
+                    dict(
+                        BRIEF_DATA,
+                        title=f"{self.rng.choice(NAME_NOUNS)} {self.rng.choice(ROLES)} needed",
+                        organisation=f"{self.rng.choice(NAME_WORDS)} Council",
+                        location=self.rng.choice(LOCATIONS),
+                        specialistRole=self.rng.choice(ROLES),
+                    ),
+                    created_at, published_at or created_at, published_at, withdrawn_at, cancelled_at, unsuccessful_at,
+                )
+
+        copy_rows(
+            self.connection,
+            "briefs",
+            ("id", "framework_id", "lot_id", "data", "created_at", "updated_at", "published_at", "withdrawn_at",
+             "cancelled_at", "unsuccessful_at"),
+            rows(),
+        )
+        copy_rows(
+            self.connection,
+            "brief_users",
+            ("brief_id", "user_id"),
+            ((brief_id, self.rng.choice(self.buyer_user_ids)) for brief_id in self.brief_ids),
+        )
+
+    def _audit_object(self, object_type):
+        """Return (object id, audit data) for a random object of `object_type`"""
+        if object_type == "Service":
+            service_id, supplier_id = self.rng.choice(self.services)
+            return service_id, {"serviceId": str(SERVICE_ID_BASE + service_id), "supplierId": supplier_id}
+        if object_type == "Supplier":
+            id_, supplier_id, _ = self.rng.choice(self.suppliers)
+            return id_, {"supplierId": supplier_id, "update": {"description": "An updated description."}}
+        if object_type == "User":
+            user_id = self.rng.choice(self.user_ids)
+            return user_id, {"user": {"active": True}}
+        brief_id = self.rng.choice(self.brief_ids)
+        return brief_id, {"briefId": brief_id, "briefJson": {"title": "An updated title"}}
+
+    def generate_audit_events(self):
+        audit_types = [(audit_type, object_type) for audit_type, _, object_type in AUDIT_EVENT_TYPES]
+        weights = [weight for _, weight, _ in AUDIT_EVENT_TYPES]
+
+        total = self.volumes["audit_events"]
+        interval = (self.now - HISTORY_START) / total
+        recent = self.now - timedelta(days=365)
+
+        def rows():
+            for i in range(total):
+                audit_type, object_type = self.rng.choices(audit_types, weights)[0]
+                object_id, data = self._audit_object(object_type)
+                created_at = HISTORY_START + interval * i
+                # most older events have been looked at by an admin, most recent ones haven't
+                acknowledged = self.rng.random() < (0.3 if created_at > recent else 0.9)
+                yield (
+                    audit_type, created_at, self.rng.choice(self.user_email_addresses), data, object_type, object_id,
+                    acknowledged,
+                    ADMIN_EMAIL_ADDRESS if acknowledged else None,
+                    created_at + timedelta(days=self.rng.uniform(0, 10)) if acknowledged else None,
+                )
+
+        copy_rows(
+            self.connection,
+            "audit_events",
+            ("type", "created_at", "user", "data", "object_type", "object_id", "acknowledged", "acknowledged_by",
+             "acknowledged_at"),
+            rows(),
+        )
+
+
+def generate(connection, seed=1, scale=1.0):
+    """
+    Fill the (migrated, empty) database behind `connection` with a synthetic marketplace, `scale` times the size of
+    `FULL_VOLUMES`. Returns the volumes generated.
+    """
+    volumes = MarketplaceGenerator(connection, seed=seed, scale=scale).generate()
+    connection.execute(text("ANALYZE"))
+    return volumes
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Compare loading services with their JSON `data` wrapped in nested change-tracking proxies (as for writes) against
+loading it read-only (as for GET requests - see `app.models.main.JSONMutable`).
+
+Each mode runs in its own forked process, so that its memory high-water mark isn't affected by the other's. The
+database should already hold services, e.g. from `benchmarks/run.py --generate`.
+
+Usage:
+    benchmarks/json_loading.py [options]
+
+Options:
+    --database-uri=<uri>    Benchmark database [default: postgresql://localhost/digitalmarketplace_benchmark]
+    --page-size=<n>         Services loaded per timed iteration, as by a listing page [default: 100]
+    --iterations=<n>        Timed iterations per mode [default: 50]
+    --retained=<n>          Services loaded and kept to measure memory [default: 2000]
+    --output=<path>         Write results to this file
+    -h --help               Show this screen
+"""
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docopt import docopt  # noqa: E402
+from flask import json  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Service, load_json_read_only  # noqa: E402
+from benchmarks.run import get_git_commit  # noqa: E402
+
+
+def _load_services(limit):
+    return Service.query.order_by(Service.id).limit(limit).all()
+
+
+def measure(read_only, page_size, iterations, retained):
+    """Time loading and serializing pages of services, then measure the memory taken by `retained` of them"""
+    app = create_app("development")
+    # the JSON loading mode is chosen per request, so pretend to be handling a listing request
+    with app.test_request_context("/services", method="GET" if read_only else "POST"):
+        load_json_read_only()
+
+        load_durations, serialize_durations = [], []
+        for _ in range(iterations):
+            db.session.expunge_all()
+            start = time.perf_counter()
+            services = _load_services(page_size)
+            loaded = time.perf_counter()
+            [service.serialize() for service in services]
+            load_durations.append((loaded - start) * 1000)
+            serialize_durations.append((time.perf_counter() - loaded) * 1000)
+
+        db.session.expunge_all()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        services = _load_services(retained)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # tracing allocations has its own memory overhead, so count them separately from measuring RSS
+        del services
+        db.session.expunge_all()
+        tracemalloc.start()
+        services = _load_services(retained)
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "loadMs": {"median": statistics.median(load_durations), "mean": statistics.mean(load_durations)},
+            "serializeMs": {
+                "median": statistics.median(serialize_durations), "mean": statistics.mean(serialize_durations),
+            },
+            "retainedServices": len(services),
+            "retainedBytes": allocated,
+            # ru_maxrss is in kilobytes on Linux
+            "maxRssIncreaseKb": rss_after - rss_before,
+        }
+
+
+def main(arguments):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = arguments["--database-uri"]
+    os.environ.setdefault("DM_LOG_LEVEL", "ERROR")
+
+    measure_arguments = {
+        "page_size": int(arguments["--page-size"]),
+        "iterations": int(arguments["--iterations"]),
+        "retained": int(arguments["--retained"]),
+    }
+    context = multiprocessing.get_context("fork")
+    results = {"commit": get_git_commit(), **measure_arguments, "modes": {}}
+    for mode, read_only in (("tracked", False), ("readOnly", True)):
+        with context.Pool(1) as pool:
+            results["modes"][mode] = pool.apply(measure, (read_only,), measure_arguments)
+
+    if arguments["--output"]:
+        with open(arguments["--output"], "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    for mode, result in results["modes"].items():
+        print("{:10} load {:>8.1f}ms  serialize {:>8.1f}ms  {:>8.1f}MB allocated  {:>8.1f}MB max RSS increase".format(
+            mode, result["loadMs"]["median"], result["serializeMs"]["median"], result["retainedBytes"] / 2 ** 20,
+            result["maxRssIncreaseKb"] / 2 ** 10,
+        ), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(docopt(__doc__))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Run the API performance benchmarks against a dedicated database, optionally filling it with synthetic data first.
+
+The database must already be migrated to head (`flask db upgrade` with SQLALCHEMY_DATABASE_URI pointing at it).
+Results are written as JSON, to stdout unless --output is given, so that runs can be compared across commits.
+
+Usage:
+    benchmarks/run.py [options] [<scenario>...]
+
+Options:
+    --database-uri=<uri>    Benchmark database [default: postgresql://localhost/digitalmarketplace_benchmark]
+    --generate              Fill the (empty) database with synthetic data before running
+    --scale=<scale>         Fraction of full production-like volumes to generate [default: 1]
+    --seed=<seed>           Random seed for the generated data [default: 1]
+    --iterations=<n>        Timed requests per scenario [default: 20]
+    --warmup=<n>            Untimed requests per scenario before timing [default: 2]
+    --output=<path>         Write results to this file
+    -h --help               Show this screen
+
+Scenarios can be selected by name or by group (list, search, export, auth, validation).
+"""
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docopt import docopt  # noqa: E402
+from flask import json  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from benchmarks import data, scenarios  # noqa: E402
+
+COUNTED_TABLES = (
+    "suppliers", "users", "services", "draft_services", "supplier_frameworks", "briefs", "brief_users", "audit_events",
+)
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_row_counts(app):
+    with app.app_context():
+        return {
+            table: db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in COUNTED_TABLES
+        }
+
+
+def select_scenarios(names):
+    if not names:
+        return scenarios.SCENARIOS
+
+    selected = [scenario for scenario in scenarios.SCENARIOS if scenario.name in names or scenario.group in names]
+    if not selected:
+        raise ValueError("No scenarios match {}".format(", ".join(names)))
+    return selected
+
+
+def run_benchmarks(app, names=(), iterations=20, warmup=2, generate=False, scale=1.0, seed=1):
+    if generate:
+        with app.app_context():
+            with db.engine.begin() as connection:
+                data.generate(connection, seed=seed, scale=scale)
+
+    context = scenarios.get_context(app)
+    return {
+        "commit": get_git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "rowCounts": get_row_counts(app),
+        "scenarios": [
+            scenarios.run_scenario(app, scenario, context, iterations=iterations, warmup=warmup)
+            for scenario in select_scenarios(names)
+        ],
+    }
+
+
+def main(arguments):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = arguments["--database-uri"]
+    os.environ.setdefault("DM_LOG_LEVEL", "ERROR")
+    app = create_app("development")
+
+    results = run_benchmarks(
+        app,
+        names=arguments["<scenario>"],
+        iterations=int(arguments["--iterations"]),
+        warmup=int(arguments["--warmup"]),
+        generate=arguments["--generate"],
+        scale=float(arguments["--scale"]),
+        seed=int(arguments["--seed"]),
+    )
+
+    if arguments["--output"]:
+        with open(arguments["--output"], "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    for result in results["scenarios"]:
+        if "error" in result:
+            print("{name}: {error}".format(**result), file=sys.stderr)
+        else:
+            print("{:45} {:>10.1f}ms median {:>5} queries".format(
+                result["name"], result["timingsMs"]["median"], result["queries"]
+            ), file=sys.stderr)
+
+    return 1 if any("error" in result for result in results["scenarios"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(docopt(__doc__)))
@@ -0,0 +1,188 @@
+"""
+Timed scenarios exercising the API's hot paths, to be run against data from `benchmarks.data`.
+
+Each scenario is a single request, made through the Flask test client so that timings cover the application and
+database but not a web server. URLs and request bodies are templates, filled in from a context of real object ids
+looked up in the benchmark database (see `get_context`).
+"""
+import statistics
+import time
+
+from flask import json
+from sqlalchemy import event, text
+
+from app import db
+from benchmarks.data import PASSWORD, load_example_listing
+
+
+class Scenario:
+    def __init__(self, name, group, method, url, body=None, expected_status=200):
+        self.name = name
+        self.group = group
+        self.method = method
+        self.url = url
+        self.body = body
+        self.expected_status = expected_status
+
+    def request(self, client, headers, context):
+        url = self.url.format(**context)
+        if self.body is None:
+            return url, client.open(url, method=self.method, headers=headers)
+
+        return url, client.open(
+            url, method=self.method, headers=headers, data=json.dumps(self.body(context)),
+            content_type="application/json",
+        )
+
+
+SCENARIOS = (
+    # listings
+    Scenario("services-first-page", "list", "GET", "/services?framework=g-cloud-6"),
+    Scenario("services-middle-page", "list", "GET", "/services?framework=g-cloud-6&page={middle_services_page}"),
+    Scenario("services-for-supplier", "list", "GET", "/services?supplier_id={supplier_id}"),
+    Scenario("suppliers-first-page", "list", "GET", "/suppliers"),
+    Scenario("suppliers-on-framework", "list", "GET", "/suppliers?framework=g-cloud"),
+    Scenario("supplier-frameworks", "list", "GET", "/suppliers/{supplier_id}/frameworks"),
+    Scenario("supplier-dashboard", "list", "GET", "/suppliers/{supplier_id}/dashboard"),
+    Scenario("briefs-live", "list", "GET", "/briefs?status=live"),
+    Scenario("briefs-closed-with-users", "list", "GET", "/briefs?status=closed&with_users=true"),
+    Scenario("audit-events-first-page", "list", "GET", "/audit-events"),
+    Scenario("audit-events-unacknowledged-latest", "list", "GET", "/audit-events?acknowledged=false&latest_first=true"),
+    Scenario(
+        "audit-events-earliest-for-each-service", "list", "GET",
+        "/audit-events?earliest_for_each_object=true&audit-type=update_service&acknowledged=false",
+    ),
+    # searches
+    Scenario("suppliers-prefix", "search", "GET", "/suppliers?prefix={supplier_name_prefix}"),
+    Scenario("suppliers-name", "search", "GET", "/suppliers?name={supplier_name_fragment}"),
+    Scenario("suppliers-search", "search", "GET", "/suppliers?search={supplier_name_fragment}"),
+    Scenario("users-by-email-address", "search", "GET", "/users?email_address={buyer_email_address}"),
+    Scenario("audit-events-for-user", "search", "GET", "/audit-events?user={buyer_email_address}"),
+    # exports
+    Scenario("suppliers-export", "export", "GET", "/suppliers/export/g-cloud-7"),
+    Scenario("users-export", "export", "GET", "/users/export/g-cloud-7"),
+    Scenario("framework-suppliers", "export", "GET", "/frameworks/g-cloud-7/suppliers"),
+    Scenario(
+        "framework-suppliers-declaration-fields", "export", "GET",
+        "/frameworks/g-cloud-7/suppliers?declaration_fields=status,nameOfOrganisation",
+    ),
+    Scenario("framework-interest", "export", "GET", "/frameworks/g-cloud-7/interest"),
+    Scenario("framework-stats", "export", "GET", "/frameworks/g-cloud-7/stats"),
+    # authentication
+    Scenario(
+        "auth-valid-password", "auth", "POST", "/users/auth",
+        body=lambda context: {"authUsers": {"emailAddress": context["buyer_email_address"], "password": PASSWORD}},
+    ),
+    Scenario(
+        "auth-unknown-user", "auth", "POST", "/users/auth",
+        body=lambda context: {"authUsers": {"emailAddress": "nobody@example.com", "password": PASSWORD}},
+        expected_status=404,
+    ),
+    # validation
+    Scenario(
+        "draft-service-page-update", "validation", "POST", "/draft-services/{draft_id}",
+        body=lambda context: {
+            "updated_by": "benchmarks",
+            "services": context["draft_page"],
+            "page_questions": list(context["draft_page"].keys()),
+        },
+    ),
+    Scenario(
+        "service-import-invalid", "validation", "PUT", "/services/{unused_service_id}",
+        body=lambda context: {"updated_by": "benchmarks", "services": context["invalid_service"]},
+        expected_status=400,
+    ),
+)
+
+
+def get_context(app):
+    """Look up the ids and values the scenarios' URLs and bodies refer to in the benchmark database"""
+    with app.app_context():
+        supplier_id, supplier_name = db.session.execute(text(
+            "SELECT supplier_id, name FROM suppliers "
+            "WHERE supplier_id IN (SELECT supplier_id FROM supplier_frameworks) ORDER BY supplier_id LIMIT 1"
+        )).one()
+        draft_id, draft_data = db.session.execute(text(
+            "SELECT id, data FROM draft_services ORDER BY id LIMIT 1"
+        )).one()
+        services_count = db.session.execute(text("SELECT count(*) FROM services")).scalar()
+        buyer_email_address = db.session.execute(text(
+            "SELECT email_address FROM users WHERE role = 'buyer' AND active ORDER BY id LIMIT 1"
+        )).scalar()
+
+        page_questions = ("serviceName", "serviceSummary", "serviceBenefits", "serviceFeatures")
+        invalid_service = dict(
+            load_example_listing("G6-INVALID"),
+            supplierId=supplier_id, frameworkSlug="g-cloud-6", lot="paas",
+        )
+        return {
+            "supplier_id": supplier_id,
+            "supplier_name_prefix": supplier_name[0].lower(),
+            "supplier_name_fragment": supplier_name.split()[0].lower(),
+            "buyer_email_address": buyer_email_address,
+            "middle_services_page": max(1, services_count // app.config["DM_API_SERVICES_PAGE_SIZE"] // 2),
+            "draft_id": draft_id,
+            "draft_page": {key: draft_data[key] for key in page_questions if key in draft_data},
+            "unused_service_id": "1" * 16,
+            "invalid_service": invalid_service,
+        }
+
+
+def _summarise(durations):
+    durations = sorted(durations)
+    return {
+        "min": durations[0],
+        "median": statistics.median(durations),
+        "p95": durations[min(len(durations) - 1, int(round(0.95 * (len(durations) - 1))))],
+        "mean": statistics.mean(durations),
+        "max": durations[-1],
+    }
+
+
+def run_scenario(app, scenario, context, iterations=20, warmup=2):
+    """Make `scenario`'s request `warmup` times untimed and then `iterations` times timed, returning the results"""
+    client = app.test_client()
+    headers = {"Authorization": "Bearer {}".format(app.config["DM_API_AUTH_TOKENS"].split(":")[0])}
+
+    queries = []
+
+    def count_query(*args):
+        queries.append(None)
+
+    durations = []
+    with app.app_context():
+        engine = db.engine
+
+    for i in range(warmup + iterations):
+        queries.clear()
+        event.listen(engine, "before_cursor_execute", count_query)
+        try:
+            start = time.perf_counter()
+            url, response = scenario.request(client, headers, context)
+            duration = (time.perf_counter() - start) * 1000
+        finally:
+            event.remove(engine, "before_cursor_execute", count_query)
+
+        if response.status_code != scenario.expected_status:
+            return {
+                "name": scenario.name,
+                "group": scenario.group,
+                "url": url,
+                "error": "Expected status {} but got {}: {}".format(
+                    scenario.expected_status, response.status_code, response.get_data(as_text=True)[:500]
+                ),
+            }
+        if i >= warmup:
+            durations.append(duration)
+
+    return {
+        "name": scenario.name,
+        "group": scenario.group,
+        "method": scenario.method,
+        "url": url,
+        "status": response.status_code,
+        "iterations": iterations,
+        "queries": len(queries),
+        "responseBytes": len(response.get_data()),
+        "timingsMs": _summarise(durations),
+    }
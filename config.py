@@ -27,6 +27,10 @@ class Config:
     DM_API_BUYER_DOMAINS_PAGE_SIZE = 100
     DM_API_PROJECTS_PAGE_SIZE = 100
     DM_API_OUTCOMES_PAGE_SIZE = 100
+    DM_API_CHANGES_PAGE_SIZE = 1000
+
+    # Minimum pg_trgm word similarity (0-1) for a supplier to match a `GET /suppliers?search=` query
+    DM_API_SUPPLIER_SEARCH_SIMILARITY_THRESHOLD = 0.5
 
     DM_ALLOWED_ADMIN_DOMAINS = ['digital.cabinet-office.gov.uk', 'crowncommercial.gov.uk', 'user.marketplace.team',
                                 'notifications.service.gov.uk']
@@ -35,6 +39,48 @@ class Config:
     SQLALCHEMY_RECORD_QUERIES = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Comma-separated database URIs of read replicas to route main blueprint GET requests to (see app.read_replicas)
+    DM_API_READ_REPLICA_URIS = None
+
+    # Warm up the app (and freeze its objects out of garbage collection) before a pre-forking server starts workers
+    # (see app.preload)
+    DM_API_PRELOAD = False
+
+    # Audit event payloads (such as the JSON of a draft service update) of at least this many bytes are stored once
+    # each, compressed, in audit_event_payloads rather than in every event's data (see app.models.AuditEventPayload)
+    DM_API_AUDIT_PAYLOAD_MIN_BYTES = 0
+
+    # How long, in milliseconds, the database queries of main blueprint GET requests may run for unless the view
+    # says otherwise, and how long clients are told to wait before retrying one that timed out (see app.query_timeouts)
+    DM_API_GET_STATEMENT_TIMEOUT_MS = 30000
+    DM_API_QUERY_TIMEOUT_RETRY_AFTER_SECONDS = 30
+
+    # Drafts published per transaction by `POST /draft-services/<framework>/<lot>/publish`, and the processes that
+    # validate them (0 for one per CPU) - see app.service_utils.publish_submitted_drafts
+    DM_API_BULK_PUBLISH_CHUNK_SIZE = 500
+    DM_API_BULK_PUBLISH_VALIDATION_PROCESSES = 0
+
+    # Where responses to hot public GET requests are cached - "redis" (at DM_API_RESPONSE_CACHE_REDIS_URL), "simple"
+    # (in process) or "" for nowhere - how long for at most, and for how long after a change responses are still
+    # treated as stale (see app.response_cache)
+    DM_API_RESPONSE_CACHE_TYPE = ""
+    DM_API_RESPONSE_CACHE_REDIS_URL = ""
+    DM_API_RESPONSE_CACHE_TIMEOUT = 300
+    DM_API_RESPONSE_CACHE_GRACE_SECONDS = 2
+
+    # Users that `POST /users/bulk` will create at once, and the processes that hash their passwords (0 for one per CPU)
+    # - see app.user_utils.create_users
+    DM_API_BULK_CREATE_USERS_LIMIT = 1000
+    DM_API_BULK_USER_HASHING_PROCESSES = 0
+
+    # Users (and then contact information entries) whose personal data `POST /users/remove-dormant-personal-data`
+    # removes per transaction - see app.user_utils.remove_dormant_personal_data
+    DM_API_PERSONAL_DATA_RETENTION_CHUNK_SIZE = 1000
+
+    # Threads fetching the pages of search API results after the first at once - see
+    # app.search_utils.iter_search_result_pages
+    DM_API_SEARCH_API_FETCH_THREADS = 4
+
     # If you are changing failed login limit, remember to update NO_ACCOUNT_MESSAGE in user-frontend
     DM_FAILED_LOGIN_LIMIT = 5
 
@@ -87,6 +133,7 @@ class Test(Config):
     DM_API_BRIEF_RESPONSES_PAGE_SIZE = 5
 
     DM_API_PROJECTS_PAGE_SIZE = 5
+    DM_API_CHANGES_PAGE_SIZE = 5
 
 
 class Development(Config):
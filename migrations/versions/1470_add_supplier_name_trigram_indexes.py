@@ -0,0 +1,32 @@
+"""Add trigram indexes on supplier names
+
+Revision ID: 1470
+Revises: 1460
+Create Date: 2026-10-19 10:12:31.204117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '1470'
+down_revision = '1460'
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_suppliers_name_trgm
+                ON suppliers USING gin (name gin_trgm_ops);
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_suppliers_registered_name_trgm
+                ON suppliers USING gin (registered_name gin_trgm_ops);
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_suppliers_registered_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_suppliers_name_trgm")
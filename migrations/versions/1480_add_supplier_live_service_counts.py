@@ -0,0 +1,147 @@
+"""Add supplier_live_service_counts, maintained by triggers on services and frameworks
+
+Revision ID: 1480
+Revises: 1470
+Create Date: 2026-10-19 11:02:47.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1480'
+down_revision = '1470'
+
+
+def upgrade():
+    op.create_table(
+        'supplier_live_service_counts',
+        sa.Column('supplier_id', sa.BigInteger(), nullable=False),
+        sa.Column('framework_family', sa.String(), nullable=False),
+        sa.Column('published_service_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.supplier_id'], ),
+        sa.PrimaryKeyConstraint('supplier_id', 'framework_family', name=op.f('supplier_live_service_counts_pkey')),
+    )
+    op.create_index(
+        op.f('ix_supplier_live_service_counts_framework_family'),
+        'supplier_live_service_counts',
+        ['framework_family'],
+        unique=False,
+    )
+
+    # applies a batch of +1/-1 changes to the count for each (supplier, framework) pair, ignoring frameworks that
+    # aren't live and removing any counts that drop to zero
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_supplier_live_service_count_changes(
+            supplier_ids bigint[], framework_ids integer[], changes integer[]
+        ) RETURNS void LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO supplier_live_service_counts AS counts (
+                supplier_id, framework_family, published_service_count
+            )
+            SELECT c.supplier_id, frameworks.framework, sum(c.change)
+            FROM unnest(supplier_ids, framework_ids, changes) AS c(supplier_id, framework_id, change)
+            JOIN frameworks ON frameworks.id = c.framework_id AND frameworks.status = 'live'
+            GROUP BY c.supplier_id, frameworks.framework
+            HAVING sum(c.change) <> 0
+            ON CONFLICT (supplier_id, framework_family) DO UPDATE
+                SET published_service_count = counts.published_service_count + excluded.published_service_count;
+
+            DELETE FROM supplier_live_service_counts
+            WHERE supplier_id = ANY(supplier_ids) AND published_service_count <= 0;
+        END;
+        $$;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION update_supplier_live_service_counts_from_services() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            supplier_ids bigint[];
+            framework_ids integer[];
+            changes integer[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(supplier_id), array_agg(framework_id), array_agg(1)
+                INTO supplier_ids, framework_ids, changes
+                FROM new_services WHERE status = 'published';
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(supplier_id), array_agg(framework_id), array_agg(-1)
+                INTO supplier_ids, framework_ids, changes
+                FROM old_services WHERE status = 'published';
+            ELSE
+                SELECT array_agg(supplier_id), array_agg(framework_id), array_agg(change)
+                INTO supplier_ids, framework_ids, changes
+                FROM (
+                    SELECT supplier_id, framework_id, 1 AS change FROM new_services WHERE status = 'published'
+                    UNION ALL
+                    SELECT supplier_id, framework_id, -1 AS change FROM old_services WHERE status = 'published'
+                ) AS service_changes;
+            END IF;
+
+            IF supplier_ids IS NOT NULL THEN
+                PERFORM apply_supplier_live_service_count_changes(supplier_ids, framework_ids, changes);
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+    """)
+    op.execute("""
+        CREATE TRIGGER services_insert_supplier_live_service_counts
+            AFTER INSERT ON services REFERENCING NEW TABLE AS new_services
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_supplier_live_service_counts_from_services();
+        CREATE TRIGGER services_update_supplier_live_service_counts
+            AFTER UPDATE ON services REFERENCING OLD TABLE AS old_services NEW TABLE AS new_services
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_supplier_live_service_counts_from_services();
+        CREATE TRIGGER services_delete_supplier_live_service_counts
+            AFTER DELETE ON services REFERENCING OLD TABLE AS old_services
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_supplier_live_service_counts_from_services();
+    """)
+
+    # a framework going live or expiring changes which services count, so recount its whole family
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_supplier_live_service_counts_for_framework_family() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM supplier_live_service_counts WHERE framework_family = NEW.framework;
+
+            INSERT INTO supplier_live_service_counts (supplier_id, framework_family, published_service_count)
+            SELECT services.supplier_id, frameworks.framework, count(*)
+            FROM services JOIN frameworks ON frameworks.id = services.framework_id
+            WHERE frameworks.framework = NEW.framework
+                AND frameworks.status = 'live'
+                AND services.status = 'published'
+            GROUP BY services.supplier_id, frameworks.framework;
+
+            RETURN NULL;
+        END;
+        $$;
+    """)
+    op.execute("""
+        CREATE TRIGGER frameworks_status_supplier_live_service_counts
+            AFTER UPDATE OF status ON frameworks
+            FOR EACH ROW
+            WHEN (OLD.status IS DISTINCT FROM NEW.status AND 'live' IN (OLD.status, NEW.status))
+            EXECUTE PROCEDURE refresh_supplier_live_service_counts_for_framework_family();
+    """)
+
+    op.execute("""
+        INSERT INTO supplier_live_service_counts (supplier_id, framework_family, published_service_count)
+        SELECT services.supplier_id, frameworks.framework, count(*)
+        FROM services JOIN frameworks ON frameworks.id = services.framework_id
+        WHERE frameworks.status = 'live' AND services.status = 'published'
+        GROUP BY services.supplier_id, frameworks.framework;
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER frameworks_status_supplier_live_service_counts ON frameworks")
+    op.execute("DROP FUNCTION refresh_supplier_live_service_counts_for_framework_family()")
+    op.execute("DROP TRIGGER services_delete_supplier_live_service_counts ON services")
+    op.execute("DROP TRIGGER services_update_supplier_live_service_counts ON services")
+    op.execute("DROP TRIGGER services_insert_supplier_live_service_counts ON services")
+    op.execute("DROP FUNCTION update_supplier_live_service_counts_from_services()")
+    op.execute("DROP FUNCTION apply_supplier_live_service_count_changes(bigint[], integer[], integer[])")
+    op.drop_index(
+        op.f('ix_supplier_live_service_counts_framework_family'), table_name='supplier_live_service_counts'
+    )
+    op.drop_table('supplier_live_service_counts')
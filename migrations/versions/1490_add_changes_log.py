@@ -0,0 +1,76 @@
+"""Add changes, a log of changes to services, suppliers, briefs, brief responses and frameworks written by triggers
+
+Revision ID: 1490
+Revises: 1480
+Create Date: 2026-10-19 11:41:09.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1490'
+down_revision = '1480'
+
+# table name: (object type, column identifying the object externally)
+LOGGED_TABLES = {
+    'services': ('services', 'service_id'),
+    'suppliers': ('suppliers', 'supplier_id'),
+    'briefs': ('briefs', 'id'),
+    'brief_responses': ('brief-responses', 'id'),
+    'frameworks': ('frameworks', 'slug'),
+}
+
+
+def upgrade():
+    op.create_table(
+        'changes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column(
+            'transaction_id', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False
+        ),
+        sa.Column('object_type', sa.String(), nullable=False),
+        sa.Column('object_id', sa.String(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('changes_pkey')),
+    )
+    op.create_index('idx_changes_transaction_id_id', 'changes', ['transaction_id', 'id'], unique=False)
+
+    # TG_ARGV is (object type, id column); a whole statement's rows are logged with one insert
+    op.execute("""
+        CREATE OR REPLACE FUNCTION log_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            EXECUTE format(
+                'INSERT INTO changes (object_type, object_id, operation) '
+                'SELECT %L, changed.%I::text, %L FROM %I AS changed',
+                TG_ARGV[0],
+                TG_ARGV[1],
+                lower(TG_OP),
+                CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+            );
+            RETURN NULL;
+        END;
+        $$;
+    """)
+    for table, (object_type, id_column) in LOGGED_TABLES.items():
+        for operation, referencing in (
+            ('insert', 'NEW TABLE AS new_rows'),
+            ('update', 'NEW TABLE AS new_rows'),
+            ('delete', 'OLD TABLE AS old_rows'),
+        ):
+            op.execute(f"""
+                CREATE TRIGGER {table}_{operation}_log_changes
+                    AFTER {operation.upper()} ON {table} REFERENCING {referencing}
+                    FOR EACH STATEMENT EXECUTE PROCEDURE log_changes('{object_type}', '{id_column}');
+            """)
+
+
+def downgrade():
+    for table in reversed(list(LOGGED_TABLES)):
+        for operation in ('delete', 'update', 'insert'):
+            op.execute(f"DROP TRIGGER {table}_{operation}_log_changes ON {table}")
+    op.execute("DROP FUNCTION log_changes()")
+    op.drop_index('idx_changes_transaction_id_id', table_name='changes')
+    op.drop_table('changes')
@@ -0,0 +1,117 @@
+"""Add supplier_brief_eligibility, maintained by triggers on services
+
+Revision ID: 1500
+Revises: 1490
+Create Date: 2026-10-19 11:52:31.804472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1500'
+down_revision = '1490'
+
+# Rows for each published service on a lot that allows briefs: one with no role or location, and one for each role
+# (from a `<role>Locations` key) and/or location the service offers - mirroring `filter_services`, a role that's
+# present with no locations still gets a row.
+ELIGIBILITY_ROWS = """
+    SELECT DISTINCT s.id, s.supplier_id, s.framework_id, s.lot_id, entries.role, entries.location
+    FROM {services} AS s
+    JOIN lots ON lots.id = s.lot_id AND lots.one_service_limit
+    CROSS JOIN LATERAL (
+        SELECT NULL AS role, NULL AS location
+        UNION ALL
+        SELECT substring(fields.key FROM '^(.+)Locations$'), locations.location
+        FROM json_each(s.data) AS fields(key, value)
+        LEFT JOIN LATERAL json_array_elements_text(
+            CASE WHEN json_typeof(fields.value) = 'array' THEN fields.value ELSE '[]' END
+        ) AS locations(location) ON true
+        WHERE fields.key ~ '^(.+Locations|locations)$'
+            AND json_typeof(fields.value) <> 'null'
+            AND fields.value::text <> '""'
+    ) AS entries
+    WHERE s.status = 'published'
+"""
+
+
+def upgrade():
+    op.create_table(
+        'supplier_brief_eligibility',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('service_id', sa.Integer(), nullable=False),
+        sa.Column('supplier_id', sa.BigInteger(), nullable=False),
+        sa.Column('framework_id', sa.Integer(), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['service_id'], ['services.id'],
+            name=op.f('supplier_brief_eligibility_service_id_fkey'), ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('supplier_brief_eligibility_pkey')),
+    )
+    op.create_index(
+        op.f('ix_supplier_brief_eligibility_service_id'), 'supplier_brief_eligibility', ['service_id'], unique=False
+    )
+    op.create_index(
+        'idx_supplier_brief_eligibility_framework_lot_role',
+        'supplier_brief_eligibility',
+        ['framework_id', 'lot_id', 'role', 'supplier_id'],
+        unique=False,
+    )
+
+    # an update only needs the eligibility of services whose relevant columns changed recalculating
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION update_supplier_brief_eligibility_from_services() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO supplier_brief_eligibility (
+                    service_id, supplier_id, framework_id, lot_id, role, location
+                ) {ELIGIBILITY_ROWS.format(services='new_services')};
+            ELSIF TG_OP = 'UPDATE' THEN
+                WITH changed_services AS (
+                    SELECT new_services.* FROM new_services JOIN old_services ON old_services.id = new_services.id
+                    WHERE (
+                        new_services.status, new_services.supplier_id, new_services.framework_id,
+                        new_services.lot_id, new_services.data::text
+                    ) IS DISTINCT FROM (
+                        old_services.status, old_services.supplier_id, old_services.framework_id,
+                        old_services.lot_id, old_services.data::text
+                    )
+                ), deleted AS (
+                    DELETE FROM supplier_brief_eligibility WHERE service_id IN (SELECT id FROM changed_services)
+                )
+                INSERT INTO supplier_brief_eligibility (
+                    service_id, supplier_id, framework_id, lot_id, role, location
+                ) {ELIGIBILITY_ROWS.format(services='changed_services')};
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+    """)
+    # deleted services' rows go by the foreign key's cascade
+    op.execute("""
+        CREATE TRIGGER services_insert_supplier_brief_eligibility
+            AFTER INSERT ON services REFERENCING NEW TABLE AS new_services
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_supplier_brief_eligibility_from_services();
+        CREATE TRIGGER services_update_supplier_brief_eligibility
+            AFTER UPDATE ON services REFERENCING OLD TABLE AS old_services NEW TABLE AS new_services
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_supplier_brief_eligibility_from_services();
+    """)
+
+    op.execute(f"""
+        INSERT INTO supplier_brief_eligibility (service_id, supplier_id, framework_id, lot_id, role, location)
+        {ELIGIBILITY_ROWS.format(services='services')};
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER services_update_supplier_brief_eligibility ON services")
+    op.execute("DROP TRIGGER services_insert_supplier_brief_eligibility ON services")
+    op.execute("DROP FUNCTION update_supplier_brief_eligibility_from_services()")
+    op.drop_index('idx_supplier_brief_eligibility_framework_lot_role', table_name='supplier_brief_eligibility')
+    op.drop_index(op.f('ix_supplier_brief_eligibility_service_id'), table_name='supplier_brief_eligibility')
+    op.drop_table('supplier_brief_eligibility')
@@ -0,0 +1,30 @@
+"""Add audit_event_payloads, compressed audit event payloads stored once each by content hash
+
+Revision ID: 1510
+Revises: 1500
+Create Date: 2026-10-19 13:02:47.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1510'
+down_revision = '1500'
+
+
+def upgrade():
+    op.create_table(
+        'audit_event_payloads',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+        sa.PrimaryKeyConstraint('hash', name=op.f('audit_event_payloads_pkey')),
+    )
+    # already compressed, so there's nothing for postgres to gain by trying again
+    op.execute("ALTER TABLE audit_event_payloads ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade():
+    op.drop_table('audit_event_payloads')
@@ -0,0 +1,174 @@
+"""Add audit_review_queue, the earliest unacknowledged event of reviewed audit types for each object, maintained by
+triggers on audit_events
+
+Revision ID: 1520
+Revises: 1510
+Create Date: 2026-10-19 14:21:08.402913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1520'
+down_revision = '1510'
+
+# must match app.models.AuditReviewQueueEntry.REVIEWED_AUDIT_TYPES
+REVIEWED_AUDIT_TYPES_SQL = "('update_service')"
+
+
+def upgrade():
+    op.create_table(
+        'audit_review_queue',
+        sa.Column('audit_type', sa.String(), nullable=False),
+        sa.Column('object_type', sa.String(), nullable=False),
+        sa.Column('object_id', sa.BigInteger(), nullable=False),
+        sa.Column('earliest_audit_event_id', sa.Integer(), nullable=False),
+        sa.Column('earliest_created_at', sa.DateTime(), nullable=False),
+        sa.Column('pending_count', sa.Integer(), nullable=False),
+        # the queue entry is recalculated from the object's remaining events once the statement deleting it finishes
+        sa.ForeignKeyConstraint(
+            ['earliest_audit_event_id'],
+            ['audit_events.id'],
+            name=op.f('audit_review_queue_earliest_audit_event_id_fkey'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint(
+            'audit_type', 'object_type', 'object_id', name=op.f('audit_review_queue_pkey')
+        ),
+    )
+    op.create_index(
+        'idx_audit_review_queue_audit_type_earliest',
+        'audit_review_queue',
+        ['audit_type', 'earliest_created_at', 'earliest_audit_event_id'],
+        unique=False,
+    )
+
+    # recalculates the queue entries of the given (audit type, object) keys from their unacknowledged events
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_audit_review_queue(
+            audit_types varchar[], object_types varchar[], object_ids bigint[]
+        ) RETURNS void LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM audit_review_queue AS queue
+            USING unnest(audit_types, object_types, object_ids) AS k(audit_type, object_type, object_id)
+            WHERE queue.audit_type = k.audit_type
+                AND queue.object_type = k.object_type
+                AND queue.object_id = k.object_id;
+
+            INSERT INTO audit_review_queue (
+                audit_type, object_type, object_id, earliest_audit_event_id, earliest_created_at, pending_count
+            )
+            SELECT DISTINCT ON (e.type, e.object_type, e.object_id)
+                e.type, e.object_type, e.object_id, e.id, e.created_at,
+                count(*) OVER (PARTITION BY e.type, e.object_type, e.object_id)
+            FROM (
+                SELECT DISTINCT * FROM unnest(audit_types, object_types, object_ids)
+            ) AS k(audit_type, object_type, object_id)
+            JOIN audit_events AS e
+                ON e.type = k.audit_type AND e.object_type = k.object_type AND e.object_id = k.object_id
+            WHERE e.acknowledged = false
+            ORDER BY e.type, e.object_type, e.object_id, e.created_at, e.id;
+        END;
+        $$;
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION update_audit_review_queue_from_audit_events() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            audit_types varchar[];
+            object_types varchar[];
+            object_ids bigint[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                -- new events can only add to the queue, so are counted in without looking at existing ones
+                INSERT INTO audit_review_queue AS queue (
+                    audit_type, object_type, object_id, earliest_audit_event_id, earliest_created_at, pending_count
+                )
+                SELECT DISTINCT ON (type, object_type, object_id)
+                    type, object_type, object_id, id, created_at,
+                    count(*) OVER (PARTITION BY type, object_type, object_id)
+                FROM new_audit_events
+                WHERE acknowledged = false
+                    AND type IN {REVIEWED_AUDIT_TYPES_SQL}
+                    AND object_type IS NOT NULL
+                    AND object_id IS NOT NULL
+                ORDER BY type, object_type, object_id, created_at, id
+                ON CONFLICT (audit_type, object_type, object_id) DO UPDATE SET
+                    pending_count = queue.pending_count + excluded.pending_count,
+                    earliest_audit_event_id = CASE
+                        WHEN (excluded.earliest_created_at, excluded.earliest_audit_event_id)
+                            < (queue.earliest_created_at, queue.earliest_audit_event_id)
+                        THEN excluded.earliest_audit_event_id
+                        ELSE queue.earliest_audit_event_id
+                    END,
+                    earliest_created_at = least(queue.earliest_created_at, excluded.earliest_created_at);
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(type), array_agg(object_type), array_agg(object_id)
+                INTO audit_types, object_types, object_ids
+                FROM old_audit_events
+                WHERE acknowledged = false
+                    AND type IN {REVIEWED_AUDIT_TYPES_SQL}
+                    AND object_type IS NOT NULL
+                    AND object_id IS NOT NULL;
+            ELSE
+                -- only acknowledging (or un-acknowledging) an event, or moving it, changes anything. the entries of
+                -- both the keys it's moved from and to are recalculated
+                SELECT array_agg(k.type), array_agg(k.object_type), array_agg(k.object_id)
+                INTO audit_types, object_types, object_ids
+                FROM old_audit_events AS o
+                JOIN new_audit_events AS n ON n.id = o.id
+                CROSS JOIN LATERAL (
+                    VALUES (o.type, o.object_type, o.object_id), (n.type, n.object_type, n.object_id)
+                ) AS k(type, object_type, object_id)
+                WHERE (o.acknowledged, o.type, o.created_at, o.object_type, o.object_id)
+                        IS DISTINCT FROM (n.acknowledged, n.type, n.created_at, n.object_type, n.object_id)
+                    AND k.type IN {REVIEWED_AUDIT_TYPES_SQL}
+                    AND k.object_type IS NOT NULL
+                    AND k.object_id IS NOT NULL;
+            END IF;
+
+            IF audit_types IS NOT NULL THEN
+                PERFORM refresh_audit_review_queue(audit_types, object_types, object_ids);
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+    """)
+    op.execute("""
+        CREATE TRIGGER audit_events_insert_audit_review_queue
+            AFTER INSERT ON audit_events REFERENCING NEW TABLE AS new_audit_events
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_audit_review_queue_from_audit_events();
+        CREATE TRIGGER audit_events_update_audit_review_queue
+            AFTER UPDATE ON audit_events REFERENCING OLD TABLE AS old_audit_events NEW TABLE AS new_audit_events
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_audit_review_queue_from_audit_events();
+        CREATE TRIGGER audit_events_delete_audit_review_queue
+            AFTER DELETE ON audit_events REFERENCING OLD TABLE AS old_audit_events
+            FOR EACH STATEMENT EXECUTE PROCEDURE update_audit_review_queue_from_audit_events();
+    """)
+
+    op.execute(f"""
+        INSERT INTO audit_review_queue (
+            audit_type, object_type, object_id, earliest_audit_event_id, earliest_created_at, pending_count
+        )
+        SELECT DISTINCT ON (type, object_type, object_id)
+            type, object_type, object_id, id, created_at,
+            count(*) OVER (PARTITION BY type, object_type, object_id)
+        FROM audit_events
+        WHERE acknowledged = false
+            AND type IN {REVIEWED_AUDIT_TYPES_SQL}
+            AND object_type IS NOT NULL
+            AND object_id IS NOT NULL
+        ORDER BY type, object_type, object_id, created_at, id;
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER audit_events_delete_audit_review_queue ON audit_events")
+    op.execute("DROP TRIGGER audit_events_update_audit_review_queue ON audit_events")
+    op.execute("DROP TRIGGER audit_events_insert_audit_review_queue ON audit_events")
+    op.execute("DROP FUNCTION update_audit_review_queue_from_audit_events()")
+    op.execute("DROP FUNCTION refresh_audit_review_queue(varchar[], varchar[], bigint[])")
+    op.drop_index('idx_audit_review_queue_audit_type_earliest', table_name='audit_review_queue')
+    op.drop_table('audit_review_queue')
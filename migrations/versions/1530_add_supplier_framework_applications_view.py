@@ -0,0 +1,82 @@
+"""Add supplier_framework_applications, a view of the application status, result, agreement and agreed variations of
+each supplier's interest in a framework
+
+Revision ID: 1530
+Revises: 1520
+Create Date: 2026-10-19 15:02:37.118254
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '1530'
+down_revision = '1520'
+
+
+def upgrade():
+    # the rules the supplier and user exports used to apply to each row in turn. the current framework agreement is
+    # chosen as SupplierFramework.current_framework_agreement's is, and result, agreement and variations are only
+    # given once the framework has stopped taking applications
+    op.execute("""
+        CREATE VIEW supplier_framework_applications AS
+        SELECT
+            sf.supplier_id,
+            sf.framework_id,
+            CASE
+                WHEN sf.declaration IS NULL
+                    OR json_typeof(sf.declaration) = 'null'
+                    OR sf.declaration::jsonb = '{}'::jsonb
+                THEN 'unstarted'
+                ELSE sf.declaration->>'status'
+            END AS declaration_status,
+            CASE
+                WHEN sf.declaration->>'status' = 'complete'
+                    AND EXISTS (
+                        SELECT 1 FROM draft_services AS d
+                        WHERE d.supplier_id = sf.supplier_id
+                            AND d.framework_id = sf.framework_id
+                            AND d.status IN ('submitted', 'failed')
+                    )
+                    -- g-cloud-10 predates suppliers confirming their details for each application
+                    AND CASE
+                        WHEN f.slug = 'g-cloud-10' THEN s.company_details_confirmed
+                        ELSE sf.application_company_details_confirmed
+                    END
+                THEN 'application'
+                ELSE 'no_application'
+            END AS application_status,
+            CASE
+                WHEN f.status = 'open' THEN ''
+                WHEN sf.on_framework IS NULL THEN 'no result'
+                WHEN sf.on_framework THEN 'pass'
+                ELSE 'fail'
+            END AS application_result,
+            f.status <> 'open' AND cfa.signed_agreement_returned_at IS NOT NULL AS framework_agreement,
+            CASE
+                WHEN f.status = 'open' OR json_typeof(sf.agreed_variations) IS DISTINCT FROM 'object' THEN ''
+                ELSE (
+                    SELECT coalesce(string_agg(v.key, ', ' ORDER BY v.position), '')
+                    FROM json_object_keys(sf.agreed_variations) WITH ORDINALITY AS v(key, position)
+                )
+            END AS variations_agreed
+        FROM supplier_frameworks AS sf
+        JOIN suppliers AS s ON s.supplier_id = sf.supplier_id
+        JOIN frameworks AS f ON f.id = sf.framework_id
+        LEFT JOIN (
+            SELECT DISTINCT ON (supplier_id, framework_id) supplier_id, framework_id, signed_agreement_returned_at
+            FROM framework_agreements
+            WHERE countersigned_agreement_path IS NOT NULL
+                OR countersigned_agreement_returned_at IS NOT NULL
+                OR signed_agreement_put_on_hold_at IS NOT NULL
+                OR signed_agreement_returned_at IS NOT NULL
+            ORDER BY
+                supplier_id,
+                framework_id,
+                coalesce(countersigned_agreement_returned_at, signed_agreement_returned_at) DESC
+        ) AS cfa ON cfa.supplier_id = sf.supplier_id AND cfa.framework_id = sf.framework_id
+    """)
+
+
+def downgrade():
+    op.execute("DROP VIEW supplier_framework_applications")
@@ -6,9 +6,14 @@ The JSON user object lines can have the following fields:
 
 {"name": "A. Non", "password": "pass12345", "emailAddress": "email@email.com", "role": "supplier", "supplierId": 12345}
 
+Users are sent to the API in chunks of <chunk_size> (100 by default), and any the API couldn't create are printed with
+the reason why.
+
 Usage:
-    add-users.py <data_api_endpoint> <data_api_token> <users_path>
+    add-users.py <data_api_endpoint> <data_api_token> <users_path> [--chunk-size=<chunk_size>]
 """
+from itertools import islice
+
 from docopt import docopt
 from dmapiclient import DataAPIClient
 
@@ -21,17 +26,36 @@ def load_users(users_path):
             yield json.loads(line)
 
 
-def update_suppliers(data_api_endpoint, data_api_token, users_path):
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def add_users(data_api_endpoint, data_api_token, users_path, chunk_size):
     client = DataAPIClient(data_api_endpoint, data_api_token)
 
-    for user in load_users(users_path):
-        print("Adding {}".format(user))
-        client.create_user(user)
+    added = failed = 0
+    for users in chunks(load_users(users_path), chunk_size):
+        print("Adding {} users".format(len(users)))
+        result = client._post("/users/bulk", data={"users": users})
+
+        for failure in result["failedUsers"]:
+            print("Failed to add {}: {}".format(users[failure["index"]].get("emailAddress"), failure["error"]))
+        added += len(result["createdUsers"])
+        failed += len(result["failedUsers"])
+
+    print("Added {} users, {} failed".format(added, failed))
 
 
 if __name__ == '__main__':
     arguments = docopt(__doc__)
-    update_suppliers(
+    add_users(
         data_api_endpoint=arguments['<data_api_endpoint>'],
         data_api_token=arguments['<data_api_token>'],
-        users_path=arguments['<users_path>'])
+        users_path=arguments['<users_path>'],
+        chunk_size=int(arguments['--chunk-size'] or 100),
+    )
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Remove the personal data of users who haven't logged in for a number of years, and then of the contact information of
+suppliers left without any users who have personal data.
+
+Usage:
+    remove-dormant-personal-data.py [options] <data_api_endpoint> <data_api_token> <updated_by>
+
+Options:
+    --years=<years>     Remove the data of users who haven't logged in for this many years [default: 3]
+    --inactive-only     Leave users whose accounts are still active alone
+    --dry-run           Just print how many users and contact information entries would have been changed
+"""
+from datetime import date
+
+from docopt import docopt
+from dmapiclient import DataAPIClient
+from dmutils.formats import DATE_FORMAT
+
+
+def remove_dormant_personal_data(data_api_endpoint, data_api_token, updated_by, years, inactive_only, dry_run):
+    client = DataAPIClient(data_api_endpoint, data_api_token)
+
+    today = date.today()
+    try:
+        logged_in_before = today.replace(year=today.year - years)
+    except ValueError:
+        # the day before the anniversary of a leap day is close enough
+        logged_in_before = today.replace(year=today.year - years, day=28)
+
+    data = {"loggedInBefore": logged_in_before.strftime(DATE_FORMAT), "dryRun": dry_run}
+    if inactive_only:
+        data["active"] = False
+
+    result = client._post_with_updated_by("/users/remove-dormant-personal-data", data, user=updated_by)
+
+    message = "{} the personal data of {} users who haven't logged in since {}, and of {} contact information entries"
+    print(message.format(
+        "Would have removed" if result["dryRun"] else "Removed",
+        result["personalDataRemoved"]["users"],
+        data["loggedInBefore"],
+        result["personalDataRemoved"]["contactInformation"],
+    ))
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    remove_dormant_personal_data(
+        data_api_endpoint=arguments['<data_api_endpoint>'],
+        data_api_token=arguments['<data_api_token>'],
+        updated_by=arguments['<updated_by>'],
+        years=int(arguments['--years']),
+        inactive_only=arguments['--inactive-only'],
+        dry_run=arguments['--dry-run'],
+    )
@@ -8,8 +8,10 @@ import pytest
 
 from dmutils.formats import DATETIME_FORMAT
 
+from app import db
 from app.models import AuditEvent, User
 from tests.bases import BaseApplicationTest
+from tests.helpers import recorded_statements
 
 
 class TestNotifyCallback(BaseApplicationTest):
@@ -101,3 +103,38 @@ class TestNotifyCallback(BaseApplicationTest):
         assert len(logs.records) == 1
         assert logs.records[0].msg == "Notify failed to deliver my-notification-reference to " \
                                       "urpXHRZxYlyjcR9cAeiJkNpfSjZYuw-IOGMbo5x2HTM="
+
+    def test_batch_of_receipts_deactivates_and_audits_each_permanently_failing_user_once(
+        self, user_role_supplier, user_role_supplier_alt
+    ):
+        receipts = [
+            self.notify_data(to='test+1@digital.gov.uk', reference='first'),
+            self.notify_data(to='test+1@digital.gov.uk', reference='second'),
+            self.notify_data(to='test+2@digital.gov.uk', status='delivered'),
+            self.notify_data(to='nobody@digital.gov.uk'),
+        ]
+
+        with recorded_statements(db.engine, contains="WHERE users.email_address") as user_lookups:
+            response = self.client.post('/callbacks/notify', data=json.dumps(receipts), content_type='application/json')
+
+        assert response.status_code == 200
+        # every address is looked up at once
+        assert len(user_lookups) == 1
+        assert "IN" in user_lookups[0]
+
+        assert {user.email_address: user.active for user in User.query.all()} == {
+            'test+1@digital.gov.uk': False,
+            'test+2@digital.gov.uk': True,
+        }
+        audit_events = AuditEvent.query.filter(AuditEvent.type == 'update_user').all()
+        assert len(audit_events) == 1
+        assert audit_events[0].data['notify_callback_data'] == receipts[0]
+
+    @pytest.mark.parametrize("notify_data", (
+        [{'to': 'test+1@digital.gov.uk', 'status': 'delivered'}],
+        ['not-a-receipt'],
+    ))
+    def test_400_on_invalid_batch(self, notify_data):
+        response = self.client.post('/callbacks/notify', data=json.dumps(notify_data), content_type='application/json')
+
+        assert response.status_code == 400
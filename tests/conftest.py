@@ -39,6 +39,8 @@ def db_migration(request):
         with app.app_context():
             db.session.remove()
             db.engine.execute("drop sequence suppliers_supplier_id_seq cascade")
+            # views aren't in the metadata, but depend on tables that are
+            db.engine.execute("drop view supplier_framework_applications")
             db.drop_all()
             db.engine.execute("drop table alembic_version")
             insp = inspect(db.engine)
@@ -2,9 +2,14 @@ from __future__ import absolute_import
 
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 import pytest
+from sqlalchemy import event
 
 from app import db
 from app.models import (
@@ -51,6 +56,67 @@ def fixture_params(fixture_name, params):
     return pytest.mark.parametrize(fixture_name, [params], indirect=True)
 
 
+@contextmanager
+def recorded_statements(engine, contains=None):
+    """Record the SQL statements `engine` executes within the block (only those containing `contains`, if given)"""
+    statements = []
+
+    def record_statement(conn, cursor, statement, *args):
+        if contains is None or contains in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record_statement)
+
+
+class FakeSearchAPIClient:
+    """
+    Stands in for `app.search_api_client`, serving a search's results (`service_ids`) in pages of `page_size` the way
+    the search API does, each after `latency` seconds. Requests made are recorded in `requested_urls`, along with the
+    most made at once in `max_concurrent_requests`.
+    """
+    def __init__(self, service_ids, page_size=100, latency=0):
+        self.service_ids = list(service_ids)
+        self.page_size = page_size
+        self.latency = latency
+        self.requested_urls = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+
+    def _get(self, url):
+        with self._lock:
+            self.requested_urls.append(url)
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self._concurrent_requests -= 1
+
+        scheme, netloc, path, params, query, fragment = urlparse(url)
+        query_params = dict(parse_qsl(query))
+        page = int(query_params.get('page', 1))
+        page_service_ids = self.service_ids[(page - 1) * self.page_size:page * self.page_size]
+
+        result = {
+            'documents': [
+                {'id': service_id} if query_params.get('idOnly') else {'id': service_id, 'serviceName': 'A service'}
+                for service_id in page_service_ids
+            ],
+            'meta': {'total': len(self.service_ids)},
+            'links': {},
+        }
+        if page * self.page_size < len(self.service_ids):
+            next_query = urlencode(dict(query_params, page=page + 1))
+            result['links']['next'] = urlunparse((scheme, netloc, path, params, next_query, fragment))
+        return result
+
+
 class FixtureMixin(object):
 
     default_buyer_domain = 'digital.gov.uk'
@@ -1,4 +1,5 @@
 # -*- coding: UTF-8 -*-
+from collections import defaultdict
 from datetime import datetime
 from itertools import chain, repeat
 import mock
@@ -10,10 +11,10 @@ from freezegun import freeze_time
 from dmapiclient.audit import AuditTypes
 
 from app import db
-from app.models import AuditEvent
+from app.models import AuditEvent, AuditReviewQueueEntry
 from app.models import Supplier, Service
 from tests.bases import BaseApplicationTest
-from tests.helpers import FixtureMixin
+from tests.helpers import FixtureMixin, recorded_statements
 
 from dmtestutils.api_model_stubs import AuditEventStub
 
@@ -339,6 +340,21 @@ class TestSupplierUpdateAcknowledgement(BaseTestAuditEvents):
             ) in enumerate(chain(service_audit_event_params, supplier_audit_event_params))
         ]
 
+        # and the audit review queue has moved on to each service's earliest update still waiting to be acknowledged
+        unacknowledged = defaultdict(list)
+        for audit_event in AuditEvent.query.filter(
+            AuditEvent.type == "update_service",
+            AuditEvent.object_type == "Service",
+            AuditEvent.acknowledged == db.false(),
+        ):
+            unacknowledged[audit_event.object_id].append((audit_event.created_at, audit_event.id))
+        assert {
+            (entry.object_id, entry.earliest_audit_event_id, entry.pending_count)
+            for entry in AuditReviewQueueEntry.query.all()
+        } == {
+            (object_id, min(events)[1], len(events)) for object_id, events in unacknowledged.items()
+        }
+
     def test_acknowledge_including_previous_nonexistent_event(self):
         # would be unfair to not give them any events to start with
         self.setup_dummy_suppliers(3)
@@ -551,6 +567,24 @@ class TestAuditEvents(BaseTestAuditEvents):
                             {"earliest_for_each_object": "true", "audit-date": "2010-08-06"},
                             (),
                         ),
+                        (  # served from the audit review queue
+                            {
+                                "earliest_for_each_object": "true",
+                                "acknowledged": "false",
+                                "audit-type": "update_service",
+                            },
+                            (0, 5,),
+                        ),
+                        (
+                            {
+                                "earliest_for_each_object": "true",
+                                "acknowledged": "false",
+                                "audit-type": "update_service",
+                                "object-type": "services",
+                                "latest_first": "true",
+                            },
+                            (5, 0,),
+                        ),
                     ),
                 ),
                 (
@@ -1119,6 +1153,41 @@ class TestAuditEvents(BaseTestAuditEvents):
         assert len(new_data['auditEvents']) == 1
         assert new_data['auditEvents'][0]['id'] == data['auditEvents'][1]['id']
 
+    def test_should_include_user_names_if_requested(self):
+        self.setup_dummy_user(id=1, role='buyer')
+        self.add_audit_event(user='test+1@digital.gov.uk')
+        self.add_audit_event(user='no-such-user@example.com')
+
+        response = self.client.get('/audit-events?include_user=true')
+        data = json.loads(response.get_data())
+
+        assert response.status_code == 200
+        assert [event.get('userName') for event in data['auditEvents']] == ['my name', None]
+
+    def test_user_names_are_looked_up_with_a_single_query(self):
+        for user_id in range(1, 5):
+            self.setup_dummy_user(id=user_id, role='buyer')
+            self.add_audit_event(user='test+{}@digital.gov.uk'.format(user_id))
+
+        with recorded_statements(db.engine, contains='FROM users') as user_queries:
+            response = self.client.get('/audit-events?include_user=true')
+
+        assert response.status_code == 200
+        assert len(json.loads(response.get_data())['auditEvents']) == 4
+        assert len(user_queries) == 1
+
+    def test_user_names_are_not_looked_up_unless_asked_for(self):
+        for user_id in range(1, 3):
+            self.setup_dummy_user(id=user_id, role='buyer')
+            self.add_audit_event(user='test+{}@digital.gov.uk'.format(user_id))
+
+        with recorded_statements(db.engine, contains='FROM users') as user_queries:
+            response = self.client.get('/audit-events')
+
+        assert response.status_code == 200
+        assert len(json.loads(response.get_data())['auditEvents']) == 2
+        assert user_queries == []
+
     def test_audit_event_serialize_keys_match_api_stub_keys(self):
         # Ensures our dmtestutils.api_model_stubs are kept up to date
         audit_event_id = self.add_audit_event(type=AuditTypes.update_service)
@@ -9,6 +9,7 @@ from tests.helpers import COMPLETE_DIGITAL_SPECIALISTS_BRIEF, FixtureMixin, get_
 from tests.bases import BaseApplicationTest
 
 from dmapiclient.audit import AuditTypes
+from dmutils.dates import get_publishing_dates
 from app import db
 from app.models import Framework, BriefResponse, Brief, Lot
 
@@ -693,6 +694,19 @@ class TestListBrief(FrameworkSetupAndTeardown):
         assert data['links']['next'] == 'http://127.0.0.1:5000/briefs?page=2'
         assert data['links']['last'] == 'http://127.0.0.1:5000/briefs?page=2'
 
+    @freeze_time("2016-03-03 12:00:00")
+    def test_list_briefs_works_out_publishing_dates_once_per_distinct_timeline(self):
+        self.setup_dummy_briefs(3, status="live")
+        self.setup_dummy_briefs(2, status="live", brief_start=4, data=dict(
+            COMPLETE_DIGITAL_SPECIALISTS_BRIEF, requirementsLength="1 week"
+        ))
+
+        with mock.patch("app.models.main.get_publishing_dates", wraps=get_publishing_dates) as get_dates:
+            res = self.client.get('/briefs')
+
+        assert res.status_code == 200
+        assert get_dates.call_count == 2
+
     def test_list_briefs_pagination_page_two(self):
         self.setup_dummy_briefs(7)
 
@@ -1375,6 +1389,44 @@ class TestSupplierIsEligibleForBrief(BaseApplicationTest, FixtureMixin):
         assert response.status_code == 200
         assert data["services"]
 
+    def test_eligible_suppliers_for_specialist_brief(self):
+        self.setup_services()
+        self.setup_dummy_briefs(1, status="live")
+
+        response = self.client.get("/briefs/1/eligible-suppliers")
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data(as_text=True)) == {"eligibleSuppliers": [0, 1]}
+
+    @pytest.mark.parametrize("location, supplier_ids", ((None, [0]), ("Wales", [0]), ("Scotland", [0]), ("Mars", [])))
+    def test_eligible_suppliers_for_outcomes_brief(self, location, supplier_ids):
+        self.setup_services()
+        self.setup_dummy_user(id=1)
+        self.setup_dummy_brief(id=1, status="live", user_id=1, data={"location": "London"}, lot_slug="digital-outcomes")
+
+        response = self.client.get(
+            "/briefs/1/eligible-suppliers", query_string={"location": location} if location else {}
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data(as_text=True)) == {"eligibleSuppliers": supplier_ids}
+
+    def test_eligible_suppliers_can_be_limited_to_a_specialist_location(self):
+        self.setup_services()
+        self.setup_dummy_briefs(1, status="live")
+
+        response = self.client.get("/briefs/1/eligible-suppliers?location=London")
+
+        assert json.loads(response.get_data(as_text=True)) == {"eligibleSuppliers": [0]}
+
+    def test_no_eligible_suppliers_for_draft_brief(self):
+        self.setup_services()
+        self.setup_dummy_briefs(1, status="draft")
+
+        response = self.client.get("/briefs/1/eligible-suppliers")
+
+        assert response.status_code == 404
+
 
 class TestAwardPendingBriefResponse(FrameworkSetupAndTeardown):
 
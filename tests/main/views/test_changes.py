@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from app import db
+from app.models import BriefResponse, Change, Service, Supplier
+from tests.bases import BaseApplicationTest
+from tests.helpers import FixtureMixin
+
+
+class TestListChanges(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        super(TestListChanges, self).setup()
+        # tearing down earlier tests' data is itself logged
+        Change.query.delete()
+        db.session.commit()
+
+    def list_changes(self, **args):
+        res = self.client.get('/changes', query_string=args)
+        assert res.status_code == 200
+        return json.loads(res.get_data(as_text=True))
+
+    @staticmethod
+    def summarise(changes):
+        return [(change['objectType'], change['objectId'], change['operation']) for change in changes]
+
+    def test_no_changes(self):
+        data = self.list_changes()
+
+        assert data['changes'] == []
+        assert data['links']['next'] == 'http://127.0.0.1:5000/changes'
+
+    def test_inserts_updates_and_deletes_are_listed_in_order(self):
+        self.setup_dummy_suppliers(1)
+        self.setup_dummy_service('1234567890', supplier_id=0)
+        Service.query.filter(Service.service_id == '1234567890').update({'status': 'disabled'})
+        db.session.commit()
+        Service.query.filter(Service.service_id == '1234567890').delete()
+        db.session.commit()
+
+        data = self.list_changes()
+
+        assert self.summarise(data['changes']) == [
+            ('suppliers', '0', 'insert'),
+            ('services', '1234567890', 'insert'),
+            ('services', '1234567890', 'update'),
+            ('services', '1234567890', 'delete'),
+        ]
+        assert data['changes'][0]['id'] < data['changes'][-1]['id']
+        assert data['changes'][0]['createdAt']
+
+    def test_briefs_brief_responses_and_frameworks_are_logged(self):
+        self.setup_dummy_suppliers(1)
+        self.setup_dummy_user(id=1)
+        brief = self.setup_dummy_brief(id=123, status='live', data={})
+        db.session.add(BriefResponse(brief_id=brief.id, supplier_id=0, data={}))
+        db.session.execute("UPDATE frameworks SET clarification_questions_open = true WHERE slug = 'g-cloud-6'")
+        db.session.commit()
+
+        object_types = {(change[0], change[2]) for change in self.summarise(self.list_changes()['changes'])}
+
+        assert {
+            ('briefs', 'insert'), ('brief-responses', 'insert'), ('frameworks', 'update')
+        } <= object_types
+
+    def test_changes_are_paged_through_with_since(self):
+        self.setup_dummy_suppliers(3)
+
+        first_page = self.list_changes(limit=2)
+        assert self.summarise(first_page['changes']) == [('suppliers', '0', 'insert'), ('suppliers', '1', 'insert')]
+        assert first_page['links']['next'] == 'http://127.0.0.1:5000/changes?limit=2&since={}'.format(
+            first_page['changes'][-1]['id']
+        )
+
+        second_page = self.client.get(first_page['links']['next'])
+        second_page = json.loads(second_page.get_data(as_text=True))
+        assert self.summarise(second_page['changes']) == [('suppliers', '2', 'insert')]
+
+        last_page = json.loads(self.client.get(second_page['links']['next']).get_data(as_text=True))
+        assert last_page['changes'] == []
+        assert last_page['links']['next'] == second_page['links']['next']
+
+    def test_limit_defaults_to_page_size(self):
+        self.setup_dummy_suppliers(7)
+
+        assert len(self.list_changes()['changes']) == self.app.config['DM_API_CHANGES_PAGE_SIZE']
+
+    def test_unknown_since_returns_no_changes(self):
+        self.setup_dummy_suppliers(1)
+        last_id = self.list_changes()['changes'][-1]['id']
+
+        data = self.list_changes(since=last_id + 100)
+
+        assert data['changes'] == []
+        assert data['links']['next'] == 'http://127.0.0.1:5000/changes?since={}'.format(last_id + 100)
+
+    def test_changes_from_transactions_in_progress_hold_back_later_ones(self):
+        with db.engine.connect() as connection:
+            transaction = connection.begin()
+            # the long-running transaction is given its id before the other one starts...
+            connection.execute("SELECT txid_current()")
+
+            self.setup_dummy_suppliers(1)
+            # ...so although this change has already committed, it can't be listed yet: the earlier transaction's
+            # changes will come before it
+            assert self.list_changes()['changes'] == []
+
+            connection.execute(Supplier.__table__.insert().values(supplier_id=1, name='Supplier 1'))
+            transaction.commit()
+
+        data = self.list_changes()
+
+        assert self.summarise(data['changes']) == [('suppliers', '1', 'insert'), ('suppliers', '0', 'insert')]
+        assert data['changes'][0]['id'] > data['changes'][1]['id']
+
+    @pytest.mark.parametrize('args', ({'since': 'one'}, {'limit': 'ten'}, {'limit': 0}, {'limit': 6}))
+    def test_invalid_arguments(self, args):
+        res = self.client.get('/changes', query_string=args)
+
+        assert res.status_code == 400
@@ -31,6 +31,7 @@ from ...helpers import (
     DIRECT_AWARD_FROZEN_TIME,
     DIRECT_AWARD_FROZEN_TIME_DATETIME,
     load_example_listing,
+    FakeSearchAPIClient,
     FixtureMixin
 )
 
@@ -954,18 +955,17 @@ class TestDirectAwardLockProject(DirectAwardSetupAndTeardown, FixtureMixin):
 
         assert res.status_code == 404
 
-    @mock.patch('app.main.views.direct_award.search_api_client')
-    def test_lock_project_success(self, search_api_client):
+    def test_lock_project_success(self):
         self._create_service_and_update()
         service_id = "1234567890123458"
-        search_api_client.search_services_from_url_iter.return_value = [{"id": service_id}]
 
-        res = self.client.post(
-            '/direct-award/projects/{}/lock'.format(self.project_external_id),
-            data=json.dumps({
-                'updated_by': 'example',
-            }),
-            content_type='application/json')
+        with mock.patch('app.search_utils.search_api_client', FakeSearchAPIClient([service_id])):
+            res = self.client.post(
+                '/direct-award/projects/{}/lock'.format(self.project_external_id),
+                data=json.dumps({
+                    'updated_by': 'example',
+                }),
+                content_type='application/json')
         data = json.loads(res.get_data(as_text=True))
 
         assert res.status_code == 200
@@ -986,6 +986,33 @@ class TestDirectAwardLockProject(DirectAwardSetupAndTeardown, FixtureMixin):
         assert search_result_entry.count() == 1
         assert search_result_entry.all()[0].archived_service_id == archived_services[0].id
 
+    def test_lock_project_saves_the_latest_archived_service_from_every_page_of_results(self):
+        self.setup_dummy_suppliers(3)
+        for _ in range(2):
+            self.setup_dummy_services(250, model=ArchivedService)
+        service_ids = [str(2000000000 + i) for i in range(250)]
+        search_api_client = FakeSearchAPIClient(service_ids + ["not-archived"])
+
+        with mock.patch('app.search_utils.search_api_client', search_api_client):
+            res = self.client.post(
+                '/direct-award/projects/{}/lock'.format(self.project_external_id),
+                data=json.dumps({'updated_by': 'example'}),
+                content_type='application/json')
+
+        assert res.status_code == 200
+        assert len(search_api_client.requested_urls) == 3
+        latest_archived_service_ids = {
+            archived_service_id for archived_service_id, in db.session.query(ArchivedService.id).order_by(
+                ArchivedService.service_id, desc(ArchivedService.id)
+            ).distinct(ArchivedService.service_id)
+        }
+        assert len(latest_archived_service_ids) == 250
+        assert {
+            entry.archived_service_id for entry in DirectAwardSearchResultEntry.query.filter(
+                DirectAwardSearchResultEntry.search_id == self.search_id
+            )
+        } == latest_archived_service_ids
+
     def _create_service_and_update(self):
         with mock.patch('app.main.views.services.index_service'):
             service = load_example_listing("G6-SaaS")
@@ -3,7 +3,9 @@ from tests.bases import BaseApplicationTest, JSONUpdateTestMixin
 from datetime import datetime
 from flask import json
 import mock
-from app.models import AuditEvent, Supplier, ContactInformation, Service, Framework, DraftService
+from app.models import (
+    ArchivedService, AuditEvent, AuditEventPayload, Supplier, ContactInformation, Service, Framework, DraftService,
+)
 from app import db
 from sqlalchemy import desc
 from sqlalchemy.exc import IntegrityError
@@ -1437,6 +1439,36 @@ class TestDraftServices(DraftsHelpersMixin):
         draft_service_audit_events = res.json["auditEvents"]
         assert all_audit_events == draft_service_audit_events
 
+    def test_edits_store_large_audit_payloads_once(self):
+        self.app.config['DM_API_AUDIT_PAYLOAD_MIN_BYTES'] = 20
+        res = self.client.put(
+            '/draft-services/copy-from/{}'.format(self.service_id),
+            data=json.dumps(self.updater_json),
+            content_type='application/json')
+        draft_id = res.json['services']['id']
+        for _ in range(2):
+            update = self.client.post(
+                '/draft-services/{}'.format(draft_id),
+                data=json.dumps({'updated_by': 'joeblogs', 'services': {'serviceName': 'new service name'}}),
+                content_type='application/json')
+            assert update.status_code == 200
+
+        audit_events = AuditEvent.query.filter(AuditEvent.type == 'update_draft_service').all()
+        assert len(audit_events) == 2
+        assert audit_events[0].data == audit_events[1].data == {
+            'draftId': draft_id,
+            'serviceId': self.service_id,
+            'supplierId': 1,
+            'payloadHashes': {'updateJson': mock.ANY},
+        }
+        assert AuditEventPayload.query.count() == 1
+
+        res = self.client.get(f"/audit-events?data-draft-service-id={draft_id}&audit-type=update_draft_service")
+        assert [event['data']['updateJson'] for event in res.json['auditEvents']] == [
+            {'serviceName': 'new service name'}, {'serviceName': 'new service name'}
+        ]
+        assert 'payloadHashes' not in res.json['auditEvents'][0]['data']
+
     def test_should_be_a_400_if_no_service_block_in_update(self):
         self.client.put(
             '/draft-services/copy-from/{}'.format(self.service_id),
@@ -1675,6 +1707,131 @@ class TestDraftServices(DraftsHelpersMixin):
         assert audit_event['type'] == 'create_draft_service'
 
 
+class TestPublishSubmittedDraftServices(DraftsHelpersMixin):
+    def setup(self):
+        super().setup()
+        self.app.config['DM_API_BULK_PUBLISH_VALIDATION_PROCESSES'] = 1
+
+        g7_complete = load_example_listing("G7-SCS")
+        g7_complete.pop('id')
+        self.draft_data = g7_complete
+
+    def setup_draft(self, status='submitted', lot='scs', **data):
+        framework = Framework.find_by_slug('g-cloud-7')
+        lot = framework.get_lot(lot)
+        draft = DraftService(
+            framework=framework,
+            lot=lot,
+            lot_one_service_limit=lot.one_service_limit,
+            supplier_id=1,
+            data={**self.draft_data, **data},
+            status=status,
+        )
+        db.session.add(draft)
+        db.session.commit()
+        return draft.id
+
+    def g7_services(self):
+        return Service.query.filter(Service.framework.has(Framework.slug == 'g-cloud-7'))
+
+    def publish_submitted_drafts(self, framework_slug='g-cloud-7', lot_slug='scs', **kwargs):
+        return self.client.post(
+            f'/draft-services/{framework_slug}/{lot_slug}/publish',
+            data=json.dumps(kwargs or self.updater_json),
+            content_type='application/json',
+        )
+
+    @pytest.mark.parametrize('processes', (1, 2))
+    def test_publishes_submitted_drafts_on_the_lot(self, processes):
+        self.app.config['DM_API_BULK_PUBLISH_VALIDATION_PROCESSES'] = processes
+        self.app.config['DM_API_BULK_PUBLISH_CHUNK_SIZE'] = 2
+        draft_ids = [self.setup_draft(serviceName=f'Service {i}') for i in range(2)]
+        draft_ids.append(self.setup_draft(serviceName='Service 2', copiedFromServiceId='1234567890123456'))
+        self.setup_draft(status='not-submitted')
+        self.setup_draft(lot='saas')
+
+        res = self.publish_submitted_drafts()
+
+        assert res.status_code == 200
+        assert res.json == {'publishedCount': 3, 'failedDrafts': []}
+
+        drafts = DraftService.query.filter(DraftService.id.in_(draft_ids)).order_by(DraftService.id).all()
+        services = {service.service_id: service for service in self.g7_services()}
+        assert len({draft.service_id for draft in drafts}) == 3
+        for i, draft in enumerate(drafts):
+            service = services[draft.service_id]
+            assert (service.status, service.supplier_id, service.lot.slug) == ('published', 1, 'scs')
+            assert service.data['serviceName'] == f'Service {i}'
+            assert service.data.get('copiedFromServiceId') == ('1234567890123456' if i == 2 else None)
+
+            archived_service = ArchivedService.query.filter(ArchivedService.service_id == draft.service_id).one()
+            audit_event = AuditEvent.query.filter(
+                AuditEvent.type == 'publish_draft_service', AuditEvent.object_id == service.id
+            ).one()
+            assert audit_event.user == 'joeblogs'
+            assert audit_event.data == {
+                'draftId': draft.id,
+                'serviceId': draft.service_id,
+                'oldArchivedServiceId': None,
+                'newArchivedServiceId': archived_service.id,
+                'supplierName': 'Supplier 1',
+                'supplierId': 1,
+            }
+
+    def test_invalid_drafts_are_left_unpublished(self):
+        valid_draft_id = self.setup_draft()
+        invalid_draft_id = self.setup_draft(serviceName='')
+
+        res = self.publish_submitted_drafts()
+
+        assert res.status_code == 200
+        assert res.json == {
+            'publishedCount': 1,
+            'failedDrafts': [{'draftId': invalid_draft_id, 'errors': {'serviceName': 'answer_required'}}],
+        }
+        assert DraftService.query.get(valid_draft_id).service_id is not None
+        assert DraftService.query.get(invalid_draft_id).service_id is None
+
+    def test_published_drafts_are_not_published_again(self):
+        self.setup_draft()
+        assert self.publish_submitted_drafts().json['publishedCount'] == 1
+
+        res = self.publish_submitted_drafts()
+
+        assert res.json == {'publishedCount': 0, 'failedDrafts': []}
+        assert self.g7_services().count() == 1
+
+    @mock.patch('app.service_utils.allocate_service_ids')
+    def test_service_id_collisions_are_retried(self, allocate_service_ids):
+        self.setup_draft()
+        allocate_service_ids.side_effect = [[self.service_id], ['1234567890']]
+
+        res = self.publish_submitted_drafts()
+
+        assert res.json['publishedCount'] == 1
+        assert Service.query.filter(Service.service_id == '1234567890').count() == 1
+
+    @mock.patch('app.service_utils.index_service')
+    def test_services_are_indexed_if_the_framework_is_live(self, index_service):
+        self.setup_draft()
+        Framework.query.filter_by(slug='g-cloud-7').update(dict(status='live'))
+        db.session.commit()
+
+        indexed_service_ids = []
+        index_service.side_effect = lambda service, **kwargs: indexed_service_ids.append(service.service_id)
+
+        self.publish_submitted_drafts()
+
+        assert indexed_service_ids == [self.g7_services().one().service_id]
+
+    def test_unknown_frameworks_and_lots_are_not_found(self):
+        assert self.publish_submitted_drafts(framework_slug='z-cloud').status_code == 404
+        assert self.publish_submitted_drafts(lot_slug='digital-specialists').status_code == 404
+
+    def test_updated_by_is_required(self):
+        assert self.publish_submitted_drafts(other='thing').status_code == 400
+
+
 class TestListDraftServiceByFramework(DraftsHelpersMixin):
 
     def test_list_drafts_for_framework_paginates_results(self):
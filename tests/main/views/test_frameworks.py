@@ -9,7 +9,9 @@ from freezegun import freeze_time
 from sqlalchemy.exc import IntegrityError
 
 from tests.bases import BaseApplicationTest, JSONUpdateTestMixin
-from app.models import db, Framework, SupplierFramework, DraftService, User, FrameworkLot, AuditEvent, Brief
+from app.models import (
+    db, Framework, FrameworkAgreement, SupplierFramework, DraftService, User, FrameworkLot, AuditEvent, Brief
+)
 from tests.helpers import FixtureMixin
 from app.main.views.frameworks import FRAMEWORK_UPDATE_WHITELISTED_ATTRIBUTES_MAP
 
@@ -647,9 +649,21 @@ class TestFrameworkStats(BaseApplicationTest, FixtureMixin):
         self.setup_supplier_data()
         self.setup_framework_data('g-cloud-7')
         self.setup_framework_data('digital-outcomes-and-specialists')
+        db.session.query(SupplierFramework).filter(
+            SupplierFramework.framework.has(Framework.slug == 'g-cloud-7'),
+            SupplierFramework.supplier_id.in_([1, 2, 4]),
+        ).update({SupplierFramework.application_company_details_confirmed: True}, synchronize_session=False)
+        db.session.commit()
+
+        # other tests leave g-cloud-7 open, in which case there are no results yet
+        result = '' if Framework.find_by_slug('g-cloud-7').status == 'open' else 'no result'
 
         response = self.client.get('/frameworks/g-cloud-7/stats')
         assert json.loads(response.get_data()) == {
+            u'applications': [
+                {u'count': 1, u'application_status': u'application', u'application_result': result},
+                {u'count': 19, u'application_status': u'no_application', u'application_result': result},
+            ],
             u'services': [
                 {u'count': 1, u'status': u'not-submitted',
                  u'declaration_made': False, u'lot': u'iaas'},
@@ -702,6 +716,7 @@ class TestFrameworkStats(BaseApplicationTest, FixtureMixin):
         self.setup_data('g-cloud-6')
         response = self.client.get('/frameworks/g-cloud-7/stats')
         assert json.loads(response.get_data()) == {
+            u'applications': [],
             u'interested_suppliers': [],
             u'services': [],
             u'supplier_users': [
@@ -962,6 +977,8 @@ class TestGetFrameworkSuppliers(BaseApplicationTest, FixtureMixin):
         self._subtest_list_suppliers_by_multiple_statuses_2()
         self._subtest_list_suppliers_by_multiple_statuses_and_agreement_returned_true()
         self._subtest_list_suppliers_by_multiple_statuses_and_agreement_returned_false()
+        self._subtest_list_suppliers_with_declaration_fields()
+        self._subtest_list_suppliers_with_invalid_declaration_fields()
 
     def _subtest_list_suppliers_related_to_a_framework(self):
         # One G7 supplier
@@ -986,6 +1003,30 @@ class TestGetFrameworkSuppliers(BaseApplicationTest, FixtureMixin):
         )
         assert all(sf['declaration'] for sf in data['supplierFrameworks'])
 
+    def _subtest_list_suppliers_with_declaration_fields(self):
+        full_response = self.client.get('/frameworks/g-cloud-8/suppliers?status=signed,approved')
+        response = self.client.get(
+            '/frameworks/g-cloud-8/suppliers?status=signed,approved&declaration_fields=status,notAnAnswer'
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.get_data())
+        assert data == {
+            "meta": {"total": 3},
+            "supplierFrameworks": [
+                dict(sf, declaration={"status": "complete", "notAnAnswer": None})
+                for sf in json.loads(full_response.get_data())["supplierFrameworks"]
+            ],
+        }
+
+    def _subtest_list_suppliers_with_invalid_declaration_fields(self):
+        for declaration_fields in ('', ',', ','.join(str(i) for i in range(51))):
+            response = self.client.get(
+                '/frameworks/g-cloud-8/suppliers', query_string={'declaration_fields': declaration_fields}
+            )
+
+            assert response.status_code == 400
+
     def _subtest_list_suppliers_by_agreement_returned_true(self):
         response = self.client.get(
             '/frameworks/g-cloud-8/suppliers?with_users=false&agreement_returned=true'
@@ -1108,12 +1149,140 @@ class TestGetFrameworkInterest(BaseApplicationTest, FixtureMixin):
         data = json.loads(response.get_data())
         assert data['interestedSuppliers'] == [0, 1, 2, 3, 4]
 
+    def test_declaration_fields_of_interested_suppliers_are_returned(self):
+        SupplierFramework.query.filter(SupplierFramework.supplier_id == 1).update(
+            {"declaration": {"status": "started", "nameOfOrganisation": "Supplier 1", "otherAnswer": True}}
+        )
+        SupplierFramework.query.filter(SupplierFramework.supplier_id == 2).update({"declaration": {}})
+        db.session.commit()
+
+        response = self.client.get('/frameworks/g-cloud-7/interest?declaration_fields=status,nameOfOrganisation')
+
+        assert response.status_code == 200
+        data = json.loads(response.get_data())
+        assert data['interestedSuppliers'] == [0, 1, 2, 3, 4]
+        assert data['declarations'] == {
+            "0": None,
+            "1": {"status": "started", "nameOfOrganisation": "Supplier 1"},
+            "2": {"status": None, "nameOfOrganisation": None},
+            "3": None,
+            "4": None,
+        }
+
     def test_a_404_is_raised_if_it_does_not_exist(self):
         response = self.client.get('/frameworks/biscuits-for-gov/interest')
 
         assert response.status_code == 404
 
 
+class TestGetFrameworkApplications(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        """Sets up applications to a pending framework as follows:
+
+        Supplier 0 has applied, passed, returned their agreement and agreed to variations 1 and 2
+        Supplier 1 has applied with a failed service, and failed
+        Supplier 2 has a complete declaration and a submitted service, but hasn't confirmed their company details
+        Supplier 3 has a started declaration and a submitted service
+        Supplier 4 has only registered interest
+        """
+        super().setup()
+        self.setup_dummy_suppliers(5)
+        self.setup_dummy_framework('sausage-cloud-101', 'g-cloud', id=101, status='pending')
+        lot = Framework.query.get(101).lots[0]
+
+        for supplier_id, declaration, draft_status, confirmed, on_framework in (
+            (0, {'status': 'complete'}, 'submitted', True, True),
+            (1, {'status': 'complete'}, 'failed', True, False),
+            (2, {'status': 'complete'}, 'submitted', False, None),
+            (3, {'status': 'started'}, 'submitted', True, None),
+            (4, {}, None, None, None),
+        ):
+            db.session.add(SupplierFramework(
+                supplier_id=supplier_id,
+                framework_id=101,
+                declaration=declaration,
+                application_company_details_confirmed=confirmed,
+                on_framework=on_framework,
+                agreed_variations={'1': {'agreedUserId': 1}, '2': {'agreedUserId': 1}} if supplier_id == 0 else {},
+            ))
+            if draft_status:
+                db.session.add(DraftService(
+                    lot=lot,
+                    framework_id=101,
+                    supplier_id=supplier_id,
+                    data={},
+                    status=draft_status,
+                    lot_one_service_limit=lot.one_service_limit,
+                ))
+        db.session.flush()
+        db.session.add(FrameworkAgreement(
+            supplier_id=0,
+            framework_id=101,
+            signed_agreement_returned_at=datetime.datetime.utcnow(),
+        ))
+        db.session.commit()
+
+    def get_applications(self, query_string=''):
+        response = self.client.get(f'/frameworks/sausage-cloud-101/applications{query_string}')
+
+        assert response.status_code == 200
+        return json.loads(response.get_data())['applications']
+
+    def test_applications_are_returned(self):
+        applications = self.get_applications()
+
+        assert [
+            (
+                application['supplierId'],
+                application['declarationStatus'],
+                application['applicationStatus'],
+                application['applicationResult'],
+                application['frameworkAgreement'],
+                application['variationsAgreed'],
+            )
+            for application in applications
+        ] == [
+            (0, 'complete', 'application', 'pass', True, '1, 2'),
+            (1, 'complete', 'application', 'fail', False, ''),
+            (2, 'complete', 'no_application', 'no result', False, ''),
+            (3, 'started', 'no_application', 'no result', False, ''),
+            (4, 'unstarted', 'no_application', 'no result', False, ''),
+        ]
+        assert applications[0]['supplierName'] == 'Supplier 0'
+        assert applications[0]['frameworkSlug'] == 'sausage-cloud-101'
+
+    def test_results_and_agreements_are_blank_while_the_framework_is_open(self):
+        self.set_framework_status('sausage-cloud-101', 'open')
+
+        application = self.get_applications()[0]
+
+        assert application['applicationStatus'] == 'application'
+        assert (application['applicationResult'], application['frameworkAgreement'], application['variationsAgreed']) \
+            == ('', False, '')
+
+    @pytest.mark.parametrize('query_string, supplier_ids', (
+        ('?application_status=application', [0, 1]),
+        ('?application_status=application&application_result=fail', [1]),
+        ('?application_result=pass,no%20result', [0, 2, 3, 4]),
+        ('?declaration_status=started,unstarted', [3, 4]),
+        ('?framework_agreement=true', [0]),
+        ('?framework_agreement=false', [1, 2, 3, 4]),
+    ))
+    def test_applications_can_be_filtered(self, query_string, supplier_ids):
+        assert [application['supplierId'] for application in self.get_applications(query_string)] == supplier_ids
+
+    def test_framework_agreement_filter_must_be_a_boolean(self):
+        response = self.client.get('/frameworks/sausage-cloud-101/applications?framework_agreement=maybe')
+
+        assert response.status_code == 400
+        assert json.loads(response.get_data())['error'] == "'framework_agreement' must be a boolean"
+
+    def test_a_404_is_raised_if_it_does_not_exist(self):
+        response = self.client.get('/frameworks/biscuits-for-gov/applications')
+
+        assert response.status_code == 404
+
+
 class TestTransitionDosFramework(BaseApplicationTest, FixtureMixin):
     def _setup_for_succesful_call(self):
         self.setup_dummy_framework(
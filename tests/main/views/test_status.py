@@ -1,3 +1,4 @@
+from app.models import Framework
 from tests.bases import BaseApplicationTest
 from sqlalchemy.exc import SQLAlchemyError
 import mock
@@ -33,6 +34,19 @@ class TestStatus(BaseApplicationTest):
         json_data = json.loads(status_response.get_data().decode('utf-8'))
         assert "{}".format(json_data['search_api_status']['status']) == "ok"
 
+    def test_status_reports_statement_cache(self):
+        Framework.find_by_slug('g-cloud-6')
+        initial_stats = json.loads(self.client.get('/_status').get_data())['statement_cache']
+
+        Framework.find_by_slug('g-cloud-7')
+
+        stats = json.loads(self.client.get('/_status').get_data())['statement_cache']
+        # the status check's own queries are cached too
+        assert stats['hits'] > initial_stats['hits'] + 1
+        assert stats['misses'] == initial_stats['misses']
+        assert 0 < stats['size'] <= stats['capacity']
+        assert 0 < stats['hit_ratio'] <= 1
+
     def test_status_error_in_upstream_api(self):
         self._search_api_client.get_status.return_value = {
             'status': 'error',
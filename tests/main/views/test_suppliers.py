@@ -10,7 +10,9 @@ from app.models import Supplier, ContactInformation, AuditEvent, \
 from mock import mock
 from sqlalchemy.exc import DataError, IntegrityError
 from tests.bases import BaseApplicationTest, JSONTestMixin, JSONUpdateTestMixin
-from tests.helpers import fixture_params, FixtureMixin, load_example_listing, PutDeclarationAndDetailsAndServicesMixin
+from tests.helpers import (
+    fixture_params, FixtureMixin, load_example_listing, PutDeclarationAndDetailsAndServicesMixin, recorded_statements
+)
 
 
 class TestGetSupplier(BaseApplicationTest, FixtureMixin):
@@ -148,6 +150,42 @@ class TestListSuppliers(BaseApplicationTest, FixtureMixin):
             'X suppliers', 'Y suppliers', 'Y suppliers X', 'Y suppliers Y'
         ]
 
+    def test_search_ranks_suppliers_by_similarity_of_name_or_registered_name(self):
+        db.session.add(Supplier(supplier_id=1004, name='Widget Co', registered_name='Acme Widgets Ltd'))
+        db.session.add(Supplier(supplier_id=1005, name='Acme Widgets', registered_name=None))
+        db.session.add(Supplier(supplier_id=1006, name='Acme Gadgets', registered_name=None))
+        db.session.commit()
+
+        response = self.client.get('/suppliers?search=acme widgets')
+
+        data = json.loads(response.get_data())
+        assert response.status_code == 200
+        assert [s['id'] for s in data['suppliers']] == [1005, 1004, 1006]
+
+    def test_search_tolerates_typos(self):
+        response = self.client.get('/suppliers?search=suplier')
+
+        data = json.loads(response.get_data())
+        assert response.status_code == 200
+        assert len(data['suppliers']) == 5
+        assert data['meta']['total'] == 7
+
+    def test_search_excludes_suppliers_below_similarity_threshold(self):
+        response = self.client.get('/suppliers?search=canada')
+
+        data = json.loads(response.get_data())
+        assert response.status_code == 200
+        assert data['suppliers'] == []
+
+    def test_search_can_be_combined_with_prefix(self):
+        self.setup_additional_dummy_suppliers(2, 'T')
+
+        response = self.client.get('/suppliers?search=suppliers&prefix=t')
+
+        data = json.loads(response.get_data())
+        assert response.status_code == 200
+        assert [s['id'] for s in data['suppliers']] == [1000, 1001]
+
     def test_query_string_prefix_returns_paginated_page_one(self):
         response = self.client.get('/suppliers?prefix=s')
         data = json.loads(response.get_data())
@@ -237,6 +275,23 @@ class TestListSuppliersOnFramework(BaseApplicationTest, FixtureMixin):
         assert len(data['suppliers']) == 1
         assert data['suppliers'][0]['name'] == 'Active'
 
+    def test_should_return_suppliers_once_however_many_services_they_have(self):
+        self.setup_dummy_service(service_id='1000000005', supplier_id=1)
+
+        response = self.client.get('/suppliers?framework=g-cloud')
+        data = json.loads(response.get_data())
+
+        assert [supplier['id'] for supplier in data['suppliers']] == [1]
+
+    def test_should_reflect_services_being_published(self):
+        Service.query.filter(Service.service_id == '1000000003').one().status = 'published'
+        db.session.commit()
+
+        response = self.client.get('/suppliers?framework=g-cloud')
+        data = json.loads(response.get_data())
+
+        assert [supplier['name'] for supplier in data['suppliers']] == ['Active', 'Unpublished Service']
+
     def test_should_return_no_suppliers_no_framework(self):
         response = self.client.get('/suppliers?framework=bad')
         data = json.loads(response.get_data())
@@ -1539,7 +1594,7 @@ class TestSetSupplierDeclarations(BaseApplicationTest, FixtureMixin):
         assert response_data["declaration"] == SupplierFramework.find_by_supplier_and_framework(
             0,
             'test-open',
-        ).one().declaration
+        ).declaration
 
         assert response_data["declaration"] == expected_result_decl
 
@@ -1835,6 +1890,95 @@ class TestGetSupplierFrameworks(BaseApplicationTest):
         assert response.status_code == 404
 
 
+class TestGetSupplierDashboard(BaseApplicationTest):
+    def setup(self):
+        super(TestGetSupplierDashboard, self).setup()
+
+        db.session.add_all([
+            Supplier(supplier_id=1, name=u"Supplier 1"),
+            Supplier(supplier_id=2, name=u"Supplier 2"),
+            SupplierFramework(supplier_id=1, framework_id=1, declaration={}, on_framework=True),
+            SupplierFramework(supplier_id=1, framework_id=4, declaration={"status": "started"}, on_framework=None),
+            Service(framework_id=1, lot_id=1, service_id="1000000000", supplier_id=1, data={}, status='published'),
+            Service(framework_id=1, lot_id=2, service_id="1000000001", supplier_id=1, data={}, status='published'),
+            Service(framework_id=1, lot_id=2, service_id="1000000002", supplier_id=1, data={}, status='disabled'),
+            Service(framework_id=2, lot_id=2, service_id="1000000003", supplier_id=1, data={}, status='published'),
+            Service(framework_id=1, lot_id=1, service_id="2000000000", supplier_id=2, data={}, status='published'),
+            DraftService(
+                framework_id=4, lot_id=1, supplier_id=1, data={}, status='not-submitted',
+                lot_one_service_limit=False,
+            ),
+            DraftService(
+                framework_id=4, lot_id=2, supplier_id=1, data={}, status='submitted', lot_one_service_limit=False,
+            ),
+            DraftService(
+                framework_id=4, lot_id=3, supplier_id=1, data={}, status='submitted', lot_one_service_limit=False,
+            ),
+            DraftService(
+                framework_id=1, lot_id=1, supplier_id=1, data={}, status='published', lot_one_service_limit=False,
+            ),
+        ])
+        db.session.commit()
+
+    def test_supplier_dashboard(self):
+        response = self.client.get('/suppliers/1/dashboard')
+        assert response.status_code == 200
+
+        data = json.loads(response.get_data())
+        assert data['suppliers']['id'] == 1
+        assert data['suppliers']['service_counts'] == {'G-Cloud 6': 2}
+        assert data['frameworks'] == ['g-cloud-6', 'g-cloud-7']
+        assert [
+            (
+                interest['frameworkSlug'], interest['onFramework'], interest['declaration'],
+                interest['drafts_count'], interest['complete_drafts_count'], interest['services_count'],
+            )
+            for interest in data['frameworkInterest']
+        ] == [
+            ('g-cloud-6', True, {}, 0, 0, 2),
+            ('g-cloud-7', None, {'status': 'started'}, 1, 2, 0),
+        ]
+
+    def test_supplier_dashboard_matches_the_separate_endpoints(self):
+        dashboard = json.loads(self.client.get('/suppliers/1/dashboard').get_data())
+
+        supplier = json.loads(self.client.get('/suppliers/1').get_data())
+        interests = json.loads(self.client.get('/suppliers/1/frameworks/interest').get_data())
+        frameworks_info = json.loads(self.client.get('/suppliers/1/frameworks').get_data())
+
+        assert dashboard['suppliers'] == supplier['suppliers']
+        assert dashboard['frameworks'] == sorted(interests['frameworks'])
+        assert dashboard['frameworkInterest'][1] == [
+            interest for interest in frameworks_info['frameworkInterest'] if interest['frameworkSlug'] == 'g-cloud-7'
+        ][0]
+
+    def test_supplier_dashboard_uses_a_fixed_number_of_queries(self):
+        for framework_id in (2, 3, 5):
+            db.session.add(SupplierFramework(supplier_id=1, framework_id=framework_id, declaration={}))
+        db.session.commit()
+
+        with recorded_statements(db.engine) as statements:
+            response = self.client.get('/suppliers/1/dashboard')
+
+        assert response.status_code == 200
+        assert len(json.loads(response.get_data())['frameworkInterest']) == 5
+        # (not counting the request's query timeouts being set)
+        assert len([statement for statement in statements if 'set_config' not in statement]) == 3
+
+    def test_supplier_with_no_frameworks(self):
+        response = self.client.get('/suppliers/2/dashboard')
+        assert response.status_code == 200
+
+        data = json.loads(response.get_data())
+        assert data['suppliers']['service_counts'] == {'G-Cloud 6': 1}
+        assert data['frameworkInterest'] == []
+        assert data['frameworks'] == []
+
+    def test_supplier_that_doesnt_exist(self):
+        response = self.client.get('/suppliers/3/dashboard')
+        assert response.status_code == 404
+
+
 class TestRegisterFrameworkInterest(BaseApplicationTest, FixtureMixin, JSONUpdateTestMixin):
     method = "put"
     endpoint = "/suppliers/1/frameworks/digital-outcomes-and-specialists"
@@ -1962,7 +2106,7 @@ class TestSupplierFrameworkResponse(BaseApplicationTest):
     def test_get_supplier_framework_does_not_return_draft_framework_agreement(self, supplier_framework):
         supplier_framework_object = SupplierFramework.find_by_supplier_and_framework(
             supplier_framework['supplierId'], supplier_framework['frameworkSlug']
-        ).first()
+        )
 
         framework_agreement = FrameworkAgreement(
             supplier_framework=supplier_framework_object,
@@ -2012,7 +2156,7 @@ class TestSupplierFrameworkResponse(BaseApplicationTest):
     def test_get_supplier_framework_returns_signed_framework_agreement(self, supplier_framework):
         supplier_framework_object = SupplierFramework.find_by_supplier_and_framework(
             supplier_framework['supplierId'], supplier_framework['frameworkSlug']
-        ).first()
+        )
 
         framework_agreement = FrameworkAgreement(
             supplier_framework=supplier_framework_object,
@@ -2069,7 +2213,7 @@ class TestSupplierFrameworkResponse(BaseApplicationTest):
     def test_get_supplier_framework_returns_countersigned_framework_agreement(self, supplier_framework, supplier):
         supplier_framework_object = SupplierFramework.find_by_supplier_and_framework(
             supplier_framework['supplierId'], supplier_framework['frameworkSlug']
-        ).first()
+        )
 
         framework_agreement = FrameworkAgreement(
             supplier_framework=supplier_framework_object,
@@ -2949,6 +3093,27 @@ class TestSuppliersExport(BaseApplicationTest, FixtureMixin, PutDeclarationAndDe
         data = json.loads(self._return_suppliers_export_after_setting_framework_status().get_data())["suppliers"]
         assert data[0]['declaration_status'] == 'complete'
 
+    def test_response_with_declaration_fields(self):
+        self._setup_supplier_on_framework()
+        self._put_complete_declaration()
+        self._set_framework_status('pending')
+
+        response = self.client.get(
+            '/suppliers/export/{}?declaration_fields=status,nameOfOrganisation'.format(self.framework_slug)
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.get_data())["suppliers"]
+        assert data[0]['declaration_status'] == 'complete'
+        assert data[0]['declaration'] == {'status': 'complete', 'nameOfOrganisation': None}
+
+    def test_response_without_declaration_fields_has_no_declaration(self):
+        self._setup_supplier_on_framework()
+        self._put_complete_declaration()
+        data = json.loads(self._return_suppliers_export_after_setting_framework_status().get_data())["suppliers"]
+
+        assert 'declaration' not in data[0]
+
     def test_response_complete_declaration_one_draft(self):
         self._setup_supplier_on_framework()
         self._post_company_details_confirmed()
@@ -1,4 +1,5 @@
 import itertools
+import re
 from datetime import datetime
 from logging import Logger
 import mock
@@ -9,7 +10,7 @@ from flask import json
 from sqlalchemy.exc import DataError, IntegrityError
 
 from app import db, encryption
-from app.models import User, Supplier, BuyerEmailDomain, AuditEvent
+from app.models import User, Supplier, BuyerEmailDomain, AuditEvent, ContactInformation
 from tests.bases import BaseApplicationTest, JSONTestMixin, JSONUpdateTestMixin, WSGIApplicationWithEnvironment
 from tests.helpers import FixtureMixin, PutDeclarationAndDetailsAndServicesMixin
 
@@ -789,6 +790,125 @@ class TestUsersPost(BaseApplicationTest, JSONTestMixin, FixtureMixin):
         assert "Unable to commit" in json.loads(response.get_data())["error"]
 
 
+class TestUsersBulkPost(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        super().setup()
+        self.setup_default_buyer_domain()
+        self.setup_dummy_suppliers(2)
+        self.app.config['DM_API_BULK_USER_HASHING_PROCESSES'] = 1
+
+    def post_users(self, users):
+        return self.client.post('/users/bulk', data=json.dumps({'users': users}), content_type='application/json')
+
+    def buyer(self, email_address, **kwargs):
+        return dict({
+            'emailAddress': email_address, 'password': '1234567890', 'role': 'buyer', 'name': 'joe bloggs'
+        }, **kwargs)
+
+    def test_can_create_users(self):
+        response = self.post_users([
+            self.buyer('JoeBlogs@digital.gov.uk', phoneNumber='01234 567890'),
+            self.buyer('someone@example.com', role='supplier', supplierId=1, password='hashed-elsewhere', hashpw=False),
+        ])
+
+        assert response.status_code == 200
+        data = json.loads(response.get_data())
+        assert data['failedUsers'] == []
+        assert [(user['index'], user['emailAddress']) for user in data['createdUsers']] == [
+            (0, 'joeblogs@digital.gov.uk'), (1, 'someone@example.com'),
+        ]
+
+        buyer, supplier = (User.query.get(user['id']) for user in data['createdUsers'])
+        assert (buyer.role, buyer.phone_number, buyer.active, buyer.failed_login_count) == (
+            'buyer', '01234 567890', True, 0,
+        )
+        assert encryption.checkpw('1234567890', buyer.password)
+        assert (supplier.supplier_id, supplier.password) == (1, 'hashed-elsewhere')
+
+        audit_events = AuditEvent.query.filter(AuditEvent.type == 'create_user').order_by(AuditEvent.id).all()
+        assert [(event.object_id, event.user, event.data) for event in audit_events] == [
+            (buyer.id, 'joeblogs@digital.gov.uk', {'qualifyingBuyerEmailDomain': 'digital.gov.uk'}),
+            (supplier.id, 'someone@example.com', {'supplierId': 1}),
+        ]
+
+    def test_users_that_cannot_be_created_are_reported_and_the_rest_created(self):
+        self.setup_dummy_user(id=1)
+        existing_email_address = User.query.get(1).email_address
+
+        response = self.post_users([
+            self.buyer('one@digital.gov.uk'),
+            self.buyer('two@digital.gov.uk', password='short'),
+            self.buyer(existing_email_address.upper()),
+            self.buyer('One@digital.gov.uk'),
+            self.buyer('someone@example.com'),
+            self.buyer('supplier@example.com', role='supplier', supplierId=999),
+            self.buyer('another@digital.gov.uk', supplierId=1),
+            self.buyer('admin@example.com', role='admin'),
+            'not a user',
+            self.buyer('supplier@example.com', role='supplier', supplierId=1),
+        ])
+
+        assert response.status_code == 200
+        data = json.loads(response.get_data())
+        assert [(user['index'], user['emailAddress']) for user in data['createdUsers']] == [
+            (0, 'one@digital.gov.uk'), (9, 'supplier@example.com'),
+        ]
+        assert data['failedUsers'] == [
+            {'index': 1, 'error': "JSON was not a valid format. 'short' is too short"},
+            {'index': 2, 'error': "User already exists"},
+            {'index': 3, 'error': "User already exists"},
+            {'index': 4, 'error': "invalid_buyer_domain"},
+            {'index': 5, 'error': "Invalid supplier id"},
+            {'index': 6, 'error': "'supplierId' is only valid for users with 'supplier' role, not 'buyer'"},
+            {'index': 7, 'error': "invalid_admin_domain"},
+            {'index': 8, 'error': "JSON was not a valid format."},
+        ]
+        assert AuditEvent.query.filter(AuditEvent.type == 'create_user').count() == 2
+
+    def test_users_created_by_someone_else_in_the_meantime_are_reported(self):
+        def create_conflicting_user(passwords):
+            db.session.execute(User.__table__.insert().values(
+                email_address='two@digital.gov.uk', name='someone else', role='buyer', password='x', active=True,
+                password_changed_at=datetime.utcnow(),
+            ))
+            return passwords
+
+        with mock.patch('app.user_utils._hash_passwords', side_effect=create_conflicting_user):
+            response = self.post_users([self.buyer('one@digital.gov.uk'), self.buyer('two@digital.gov.uk')])
+
+        data = json.loads(response.get_data())
+        assert [user['index'] for user in data['createdUsers']] == [0]
+        assert data['failedUsers'] == [{'index': 1, 'error': "User already exists"}]
+        assert User.query.filter(User.email_address == 'two@digital.gov.uk').one().name == 'someone else'
+
+    def test_passwords_can_be_hashed_by_a_pool_of_processes(self):
+        self.app.config['DM_API_BULK_USER_HASHING_PROCESSES'] = 2
+
+        response = self.post_users([
+            self.buyer(f'user{i}@digital.gov.uk', password=f'password{i:04}') for i in range(4)
+        ])
+
+        data = json.loads(response.get_data())
+        assert len(data['createdUsers']) == 4
+        for i, user in enumerate(data['createdUsers']):
+            assert encryption.checkpw(f'password{i:04}', User.query.get(user['id']).password)
+
+    def test_too_many_users_at_once_is_a_400(self):
+        self.app.config['DM_API_BULK_CREATE_USERS_LIMIT'] = 1
+
+        response = self.post_users([self.buyer('one@digital.gov.uk'), self.buyer('two@digital.gov.uk')])
+
+        assert response.status_code == 400
+        assert json.loads(response.get_data())['error'] == "Too many users: at most 1 can be created at once"
+        assert not User.query.count()
+
+    def test_users_must_be_a_list(self):
+        response = self.post_users(self.buyer('one@digital.gov.uk'))
+
+        assert response.status_code == 400
+        assert json.loads(response.get_data())['error'] == "'users' must be a list"
+
+
 class TestUsersUpdate(BaseApplicationTest, JSONUpdateTestMixin, FixtureMixin):
     method = "post"
     endpoint = "/users/123"
@@ -1798,6 +1918,134 @@ class TestUsersRemovePersonalData(BaseUserTest):
         assert data['error'] == "Could not remove personal data from user with: ID {}".format(user.id)
 
 
+class TestUsersRemoveDormantPersonalData(BaseUserTest, FixtureMixin):
+    def setup(self):
+        super().setup()
+        self.setup_default_buyer_domain()
+        self.setup_dummy_suppliers(3)
+
+        self.dormant_user_ids = [
+            self._add_user('buyer@digital.gov.uk', 'buyer', logged_in_at=datetime(2019, 1, 1)),
+            self._add_user(
+                'admin@digital.cabinet-office.gov.uk', 'admin', logged_in_at=datetime(2019, 1, 1), active=False
+            ),
+            self._add_user('never@digital.gov.uk', 'buyer', created_at=datetime(2019, 1, 1)),
+            self._add_user('one@example.com', 'supplier', logged_in_at=datetime(2019, 1, 1), supplier_id=1),
+            self._add_user('two@example.com', 'supplier', logged_in_at=datetime(2019, 1, 1), supplier_id=2),
+        ]
+        self.recent_user_ids = [
+            self._add_user('recent@digital.gov.uk', 'buyer', logged_in_at=datetime(2021, 1, 1)),
+            self._add_user('new@digital.gov.uk', 'buyer', created_at=datetime(2021, 1, 1)),
+            self._add_user('also-two@example.com', 'supplier', logged_in_at=datetime(2021, 1, 1), supplier_id=2),
+        ]
+
+    def _add_user(
+        self, email_address, role, logged_in_at=None, created_at=datetime(2018, 1, 1), active=True, supplier_id=None
+    ):
+        user = User(
+            email_address=email_address,
+            name='name',
+            phone_number='555-555-555',
+            role=role,
+            password=encryption.hashpw('password'),
+            active=active,
+            failed_login_count=1,
+            created_at=created_at,
+            updated_at=created_at,
+            password_changed_at=created_at,
+            logged_in_at=logged_in_at,
+            supplier_id=supplier_id,
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+    def _remove_dormant_personal_data(self, **kwargs):
+        return self.client.post(
+            '/users/remove-dormant-personal-data',
+            data=json.dumps(dict({'updated_by': 'test@example.com', 'loggedInBefore': '2020-01-01'}, **kwargs)),
+            content_type='application/json',
+        )
+
+    def _audit_events(self):
+        return AuditEvent.query.filter(AuditEvent.type.in_(('update_user', 'contact_update'))).order_by(AuditEvent.id)
+
+    def _removed_ids(self, model):
+        return {id for id, in db.session.query(model.id).filter(model.personal_data_removed).order_by(model.id)}
+
+    def test_dry_run_counts_what_would_be_removed(self):
+        response = self._remove_dormant_personal_data(dryRun=True)
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data()) == {
+            'dryRun': True,
+            'personalDataRemoved': {'users': 5, 'contactInformation': 1},
+        }
+        assert not self._removed_ids(User) and not self._removed_ids(ContactInformation)
+        assert not self._audit_events().count()
+
+    def test_removes_personal_data_of_dormant_users_and_contacts(self):
+        response = self._remove_dormant_personal_data()
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data()) == {
+            'dryRun': False,
+            'personalDataRemoved': {'users': 5, 'contactInformation': 1},
+        }
+
+        assert self._removed_ids(User) == set(self.dormant_user_ids)
+        buyer, admin = User.query.get(self.dormant_user_ids[0]), User.query.get(self.dormant_user_ids[1])
+        supplier = User.query.get(self.dormant_user_ids[3])
+        for user in (buyer, admin, supplier):
+            assert (user.name, user.phone_number, user.active, user.failed_login_count) == (
+                '<removed>', '<removed>', False, 0
+            )
+            assert not encryption.checkpw('password', user.password)
+        assert re.fullmatch(r'<removed><[0-9a-f-]{36}>@user\.marketplace\.team', buyer.email_address)
+        assert re.fullmatch(r'<removed><[0-9a-f-]{36}>@digital\.cabinet-office\.gov\.uk', admin.email_address)
+        assert re.fullmatch(r'<removed>@[0-9a-f-]{36}\.com', supplier.email_address)
+
+        # supplier 2 still has a user who's logged in recently, and supplier 0 has never had any
+        contact = ContactInformation.query.filter(ContactInformation.personal_data_removed).one()
+        assert contact.supplier_id == 1
+        assert (contact.contact_name, contact.address1, contact.city, contact.postcode) == ('<removed>',) * 4
+        assert re.fullmatch(r'<removed>@[0-9a-f-]{36}\.com', contact.email)
+
+        audit_events = self._audit_events().all()
+        assert [(event.type, event.user, event.object_type, event.object_id) for event in audit_events] == [
+            ('update_user', 'test@example.com', 'User', user_id) for user_id in self.dormant_user_ids
+        ] + [('contact_update', 'test@example.com', 'Supplier', contact.supplier.id)]
+
+    def test_removes_personal_data_in_chunks_once_only(self):
+        self.app.config['DM_API_PERSONAL_DATA_RETENTION_CHUNK_SIZE'] = 2
+
+        assert json.loads(self._remove_dormant_personal_data().get_data())['personalDataRemoved'] == {
+            'users': 5, 'contactInformation': 1,
+        }
+        assert json.loads(self._remove_dormant_personal_data().get_data())['personalDataRemoved'] == {
+            'users': 0, 'contactInformation': 0,
+        }
+        assert self._removed_ids(User) == set(self.dormant_user_ids)
+        assert self._audit_events().count() == 6
+
+    def test_can_remove_personal_data_of_inactive_dormant_users_only(self):
+        response = self._remove_dormant_personal_data(active=False)
+
+        assert json.loads(response.get_data())['personalDataRemoved'] == {'users': 1, 'contactInformation': 0}
+        assert self._removed_ids(User) == {self.dormant_user_ids[1]}
+
+    @pytest.mark.parametrize('payload', (
+        {'loggedInBefore': '01/01/2020'},
+        {'loggedInBefore': None},
+        {'dryRun': 'yes'},
+    ))
+    def test_bad_requests_change_nothing(self, payload):
+        response = self._remove_dormant_personal_data(**payload)
+
+        assert response.status_code == 400
+        assert not self._removed_ids(User)
+
+
 class TestUsersExport(BaseUserTest, FixtureMixin, PutDeclarationAndDetailsAndServicesMixin):
     framework_slug = None
     updater_json = None
@@ -1,12 +1,16 @@
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 
 import mock
 import pytest
+from dmapiclient.audit import AuditTypes
 from freezegun import freeze_time
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.models import (
+    AuditEvent, AuditEventPayload, AuditReviewQueueEntry,
     User, Lot, Framework,
     Supplier, SupplierFramework, FrameworkAgreement,
     Brief, BriefResponse,
@@ -14,11 +18,22 @@ from app.models import (
     BriefClarificationQuestion,
     ArchivedService, DraftService, Service,
     FrameworkLot,
-    ContactInformation
+    SupplierLiveServiceCount,
+    SupplierBriefEligibility,
+    ContactInformation,
+    UserResolver,
+    ReadOnlyJSONDict,
+    get_user_resolver,
+    load_json_read_only,
+    reset_user_resolver,
 )
+from app.utils import serialize_results
 from tests.bases import BaseApplicationTest
-from tests.helpers import FixtureMixin
+from tests.helpers import FixtureMixin, recorded_statements
 
+from sqlalchemy_json import NestedMutableDict
+from sqlalchemy_json.track import TrackedDict
+from dmutils.dates import get_publishing_dates
 from dmtestutils.api_model_stubs import (
     ArchivedServiceStub,
     BriefStub,
@@ -62,6 +77,63 @@ class TestJSONFieldsAreMutable(BaseApplicationTest):
         assert Lot.query.get(test_object.id).data == {'test': {'with': {'nested': 'update'}}}
 
 
+class TestJSONFieldsForReadOnlyRequests(BaseApplicationTest):
+
+    def setup(self):
+        super().setup()
+        lot = Lot(slug='test-lot', name='Test Lot', data={'test': {'with': {'nested': 'data'}}, 'list': [{}]})
+        db.session.add(lot)
+        db.session.commit()
+        self.lot_id = lot.id
+        db.session.expunge_all()
+
+    @contextmanager
+    def request_context(self, method):
+        with self.app.app_context(), self.app.test_request_context(method=method):
+            load_json_read_only()
+            yield
+
+    def test_json_loaded_for_get_requests_is_not_wrapped_in_proxies(self):
+        with self.request_context('GET'):
+            lot = Lot.query.get(self.lot_id)
+
+            assert type(lot.data) is ReadOnlyJSONDict
+            assert type(lot.data['test']) is dict
+            assert type(lot.data['list']) is list
+            assert lot.data == {'test': {'with': {'nested': 'data'}}, 'list': [{}]}
+
+    def test_json_loaded_for_other_requests_is_tracked(self):
+        with self.request_context('POST'):
+            lot = Lot.query.get(self.lot_id)
+
+            assert type(lot.data) is NestedMutableDict
+            assert type(lot.data['test']) is TrackedDict
+
+    def test_json_loaded_outside_requests_is_tracked(self):
+        assert type(Lot.query.get(self.lot_id).data) is NestedMutableDict
+
+    def test_top_level_changes_to_json_loaded_for_get_requests_are_saved(self):
+        with self.request_context('GET'):
+            lot = Lot.query.get(self.lot_id)
+            lot.data['test'] = 'update'
+            lot.data.update({'new': 'key'})
+            db.session.commit()
+
+        assert Lot.query.get(self.lot_id).data == {'test': 'update', 'list': [{}], 'new': 'key'}
+
+    def test_json_assigned_after_loading_for_a_get_request_is_tracked(self):
+        with self.request_context('GET'):
+            lot = Lot.query.get(self.lot_id)
+            lot.data = {'test': {'with': {'nested': 'update'}}}
+            db.session.flush()
+
+            assert type(lot.data) is NestedMutableDict
+            lot.data['test']['with']['nested'] = 'another update'
+            db.session.commit()
+
+        assert Lot.query.get(self.lot_id).data == {'test': {'with': {'nested': 'another update'}}}
+
+
 class TestUser(BaseApplicationTest, FixtureMixin):
     def test_should_not_return_password_on_user(self):
         self.setup_default_buyer_domain()
@@ -325,6 +397,54 @@ class TestUser(BaseApplicationTest, FixtureMixin):
         assert str(e.value) == 'Cannot update an object once personal data has been removed'
 
 
+class TestUserResolver(BaseApplicationTest, FixtureMixin):
+
+    def setup(self):
+        super().setup()
+        for user_id in (1, 2, 3):
+            self.setup_dummy_user(id=user_id, role='buyer')
+
+        self._recording = ExitStack()
+        self.user_queries = self._recording.enter_context(recorded_statements(db.engine, contains='FROM users'))
+
+    def teardown(self):
+        self._recording.close()
+        super().teardown()
+
+    def test_loads_all_added_users_in_one_query(self):
+        resolver = UserResolver()
+        resolver.add(user_ids=(1, '2'), email_addresses=('test+3@digital.gov.uk',))
+
+        assert resolver.get_by_id(1).id == 1
+        assert resolver.get_by_id(2).id == 2
+        assert resolver.get_by_email_address('test+3@digital.gov.uk').id == 3
+        assert resolver.get_by_id(3).id == 3
+        assert len(self.user_queries) == 1
+
+    def test_remembers_missing_users(self):
+        resolver = UserResolver()
+
+        assert resolver.get_by_id(999) is None
+        assert resolver.get_by_email_address('nobody@example.com') is None
+        assert resolver.get_by_id(999) is None
+        assert resolver.get_by_email_address('nobody@example.com') is None
+        assert len(self.user_queries) == 2
+
+    def test_ignores_ids_which_are_not_integers(self):
+        resolver = UserResolver()
+
+        assert resolver.get_by_id('banana') is None
+        assert resolver.get_by_id(None) is None
+        assert self.user_queries == []
+
+    def test_get_user_resolver_returns_the_same_resolver_until_reset(self):
+        resolver = get_user_resolver()
+        assert get_user_resolver() is resolver
+
+        reset_user_resolver()
+        assert get_user_resolver() is not resolver
+
+
 class TestContactInformation(BaseApplicationTest):
 
     def setup(self):
@@ -395,6 +515,29 @@ class TestContactInformation(BaseApplicationTest):
 
 class TestFrameworks(BaseApplicationTest):
 
+    def test_find_by_slug(self):
+        framework = Framework.find_by_slug('g-cloud-6')
+
+        assert framework.slug == 'g-cloud-6'
+        # each lot only once, despite the joined eager load
+        assert len({lot.id for lot in framework.lots}) == len(framework.lots) > 1
+        assert Framework.find_by_slug('g-cloud-5000') is None
+
+    def test_find_by_slug_reuses_its_compiled_statement(self):
+        Framework.find_by_slug('g-cloud-6')
+        executions = []
+
+        def record_cache_hit(conn, cursor, statement, parameters, context, executemany):
+            executions.append(context.cache_hit)
+
+        event.listen(db.engine, 'after_cursor_execute', record_cache_hit)
+        try:
+            assert Framework.find_by_slug('g-cloud-7').slug == 'g-cloud-7'
+        finally:
+            event.remove(db.engine, 'after_cursor_execute', record_cache_hit)
+
+        assert executions == [db.engine.dialect.CACHE_HIT]
+
     def test_framework_should_not_accept_invalid_status(self):
         with pytest.raises(ValidationError):
             f = Framework(
@@ -651,6 +794,50 @@ class TestBriefs(BaseApplicationTest, FixtureMixin):
         assert brief.clarification_questions_closed_at == datetime(2016, 3, 7, 23, 59, 59)
         assert brief.clarification_questions_published_by == datetime(2016, 3, 9, 23, 59, 59)
 
+    def test_publishing_dates_are_worked_out_once_until_published_at_or_requirements_length_change(self):
+        brief = Brief(data={}, framework=self.framework, lot=self.lot, published_at=datetime(2016, 3, 3, 12, 30))
+
+        with mock.patch("app.models.main.get_publishing_dates", wraps=get_publishing_dates) as get_dates:
+            brief.status
+            brief.applications_closed_at
+            brief.clarification_questions_closed_at
+            brief.clarification_questions_published_by
+            assert get_dates.call_count == 1
+
+            # only the day counts
+            brief.published_at = datetime(2016, 3, 3, 18, 0)
+            assert brief.applications_closed_at == datetime(2016, 3, 17, 23, 59, 59)
+            assert get_dates.call_count == 1
+
+            brief.published_at = datetime(2016, 3, 4, 12, 30)
+            assert brief.applications_closed_at == datetime(2016, 3, 18, 23, 59, 59)
+            assert get_dates.call_count == 2
+
+            brief.data['requirementsLength'] = '1 week'
+            assert brief.applications_closed_at == datetime(2016, 3, 11, 23, 59, 59)
+            assert get_dates.call_count == 3
+
+    def test_load_publishing_dates_works_out_each_distinct_timeline_once(self):
+        briefs = [
+            Brief(data={}, framework=self.framework, lot=self.lot, published_at=datetime(2016, 3, 3, 9)),
+            Brief(data={}, framework=self.framework, lot=self.lot, published_at=datetime(2016, 3, 3, 17)),
+            Brief(data={'requirementsLength': '1 week'}, framework=self.framework, lot=self.lot,
+                  published_at=datetime(2016, 3, 3, 9)),
+            Brief(data={}, framework=self.framework, lot=self.lot),
+        ]
+
+        with mock.patch("app.models.main.get_publishing_dates", wraps=get_publishing_dates) as get_dates:
+            Brief.load_publishing_dates(briefs)
+            assert get_dates.call_count == 2
+
+            assert [brief.applications_closed_at for brief in briefs] == [
+                datetime(2016, 3, 17, 23, 59, 59),
+                datetime(2016, 3, 17, 23, 59, 59),
+                datetime(2016, 3, 10, 23, 59, 59),
+                None,
+            ]
+            assert get_dates.call_count == 2
+
     def test_buyer_users_can_be_added_to_a_brief(self):
         self.setup_dummy_user(role='buyer')
 
@@ -1710,6 +1897,50 @@ class TestBriefResponses(BaseApplicationTest, FixtureMixin):
             url_for.side_effect = lambda *args, **kwargs: (args, kwargs)
             assert sorted(brief_response.serialize().keys()) == sorted(BriefResponseStub().response().keys())
 
+    @pytest.mark.parametrize('published_at', (datetime(2016, 3, 3, 12, 30, 1, 3), None))
+    def test_brief_summary_has_the_brief_response_fields_of_the_serialized_brief(self, published_at):
+        brief = self._create_brief(published_at=published_at)
+        db.session.add(brief)
+        db.session.commit()
+
+        serialized_brief = brief.serialize()
+
+        assert brief.serialize_summary() == {
+            key: serialized_brief[key]
+            for key in ('id', 'title', 'status', 'applicationsClosedAt', 'framework') if key in serialized_brief
+        }
+
+    def test_responses_to_the_same_brief_share_one_summary_when_serialized_together(self):
+        other_brief = self._create_brief()
+        brief_responses = [
+            BriefResponse(data={}, brief=brief, supplier=self.supplier)
+            for brief in (self.brief, self.brief, other_brief, self.brief)
+        ]
+        db.session.add_all(brief_responses)
+        db.session.commit()
+
+        serialize_summary = Brief.serialize_summary
+        with mock.patch.object(Brief, 'serialize_summary', autospec=True, side_effect=serialize_summary) as summary:
+            serialized = serialize_results(brief_responses)
+
+        assert summary.call_count == 2
+        assert [response['brief']['id'] for response in serialized] == [
+            self.brief.id, self.brief.id, other_brief.id, self.brief.id
+        ]
+        # each response has its own copy to change
+        assert serialized[0]['brief'] is not serialized[1]['brief']
+
+    def test_prepared_brief_summary_is_only_used_once(self):
+        brief_response = BriefResponse(data={}, brief=self.brief, supplier=self.supplier)
+        db.session.add(brief_response)
+        db.session.commit()
+        BriefResponse.prepare_to_serialize([brief_response])
+        assert brief_response.serialize()['brief']['status'] == 'closed'
+
+        self.brief.withdrawn_at = datetime.utcnow()
+
+        assert brief_response.serialize()['brief']['status'] == 'withdrawn'
+
 
 class TestBriefClarificationQuestion(BaseApplicationTest):
     def setup(self):
@@ -2162,6 +2393,134 @@ class TestServices(BaseApplicationTest, FixtureMixin):
         assert model.serialize() == stub.response()
 
 
+class TestSupplierLiveServiceCounts(BaseApplicationTest, FixtureMixin):
+
+    def setup(self):
+        super().setup()
+        self.framework_id = self.setup_dummy_framework("g-cloud-11", "g-cloud", "G-Cloud 11", id=111, status="live")
+        self.setup_dummy_suppliers(2)
+
+    def _counts(self):
+        return {
+            (count.supplier_id, count.framework_family): count.published_service_count
+            for count in SupplierLiveServiceCount.query.all()
+        }
+
+    def _setup_service(self, service_id, supplier_id=0, status="published", framework_id=None):
+        self.setup_dummy_service(
+            service_id=service_id,
+            supplier_id=supplier_id,
+            status=status,
+            lot_id=9,  # cloud-hosting
+            framework_id=framework_id or self.framework_id,
+        )
+
+    def test_published_services_on_live_frameworks_are_counted_per_framework_family(self):
+        self._setup_service("1000000000")
+        self._setup_service("1000000001")
+        self._setup_service("1000000002", supplier_id=1)
+        self._setup_service("1000000003", supplier_id=1, status="enabled")
+        self.setup_dummy_service(service_id="1000000004", supplier_id=1)  # G-Cloud 6
+
+        assert self._counts() == {(0, "g-cloud"): 2, (1, "g-cloud"): 2}
+
+    def test_service_status_changes_update_counts(self):
+        self._setup_service("1000000000")
+        self._setup_service("1000000001", status="enabled")
+
+        Service.query.filter(Service.service_id == "1000000001").one().status = "published"
+        db.session.commit()
+        assert self._counts() == {(0, "g-cloud"): 2}
+
+        Service.query.filter(Service.supplier_id == 0).update({"status": "disabled"}, synchronize_session=False)
+        db.session.commit()
+        assert self._counts() == {}
+
+    def test_deleting_services_updates_counts(self):
+        self._setup_service("1000000000")
+        self._setup_service("1000000001")
+
+        Service.query.filter(Service.service_id == "1000000000").delete()
+        db.session.commit()
+
+        assert self._counts() == {(0, "g-cloud"): 1}
+
+    def test_services_on_frameworks_which_are_not_live_are_not_counted(self):
+        self.setup_dummy_framework("g-cloud-12", "g-cloud", "G-Cloud 12", id=112, status="standstill")
+        self._setup_service("1000000000", framework_id=112)
+
+        assert self._counts() == {}
+
+    def test_framework_status_transitions_recount_framework_family(self):
+        self.setup_dummy_framework("g-cloud-12", "g-cloud", "G-Cloud 12", id=112, status="standstill")
+        self._setup_service("1000000000")
+        self._setup_service("1000000001", framework_id=112)
+        self._setup_service("1000000002", supplier_id=1, framework_id=112)
+
+        self.set_framework_status("g-cloud-12", "live")
+        assert self._counts() == {(0, "g-cloud"): 2, (1, "g-cloud"): 1}
+
+        self.set_framework_status("g-cloud-11", "expired")
+        assert self._counts() == {(0, "g-cloud"): 1, (1, "g-cloud"): 1}
+
+
+class TestSupplierBriefEligibility(BaseApplicationTest, FixtureMixin):
+
+    def setup(self):
+        super().setup()
+        self.setup_dummy_suppliers(1)
+
+    def _eligibility(self):
+        return {
+            (row.supplier_id, row.lot_id, row.role, row.location) for row in SupplierBriefEligibility.query.all()
+        }
+
+    def test_published_services_on_lots_allowing_briefs_have_rows_for_each_role_and_location(self):
+        self.setup_dummy_service("1000000000", supplier_id=0, framework_id=5, lot_id=5, data={
+            "locations": ["London", "Wales"], "serviceName": "Outcomes",
+        })
+        self.setup_dummy_service("1000000001", supplier_id=0, framework_id=5, lot_id=6, data={
+            "developerLocations": ["London", "London"], "designerLocations": [], "testerLocations": None,
+        })
+        self.setup_dummy_service("1000000002", supplier_id=0, framework_id=5, lot_id=7, status="enabled")
+        self.setup_dummy_service("1000000003", supplier_id=0, framework_id=1, lot_id=1)  # G-Cloud SaaS
+
+        assert self._eligibility() == {
+            (0, 5, None, None),
+            (0, 5, None, "London"),
+            (0, 5, None, "Wales"),
+            (0, 6, None, None),
+            (0, 6, "developer", "London"),
+            (0, 6, "designer", None),
+        }
+
+    def test_service_changes_update_rows(self):
+        self.setup_dummy_service("1000000000", supplier_id=0, framework_id=5, lot_id=6, data={
+            "developerLocations": ["London"],
+        })
+
+        service = Service.query.filter(Service.service_id == "1000000000").one()
+        service.data = {"designerLocations": ["Wales"]}
+        db.session.commit()
+        assert self._eligibility() == {(0, 6, None, None), (0, 6, "designer", "Wales")}
+
+        Service.query.filter(Service.supplier_id == 0).update({"status": "disabled"}, synchronize_session=False)
+        db.session.commit()
+        assert self._eligibility() == set()
+
+        Service.query.filter(Service.supplier_id == 0).update({"status": "published"}, synchronize_session=False)
+        db.session.commit()
+        assert self._eligibility() == {(0, 6, None, None), (0, 6, "designer", "Wales")}
+
+    def test_deleting_services_removes_rows(self):
+        self.setup_dummy_service("1000000000", supplier_id=0, framework_id=5, lot_id=5)
+
+        Service.query.filter(Service.service_id == "1000000000").delete()
+        db.session.commit()
+
+        assert self._eligibility() == set()
+
+
 class TestDraftService(BaseApplicationTest, FixtureMixin):
     def setup(self):
         super().setup()
@@ -2361,6 +2720,126 @@ class TestSupplierFrameworks(BaseApplicationTest, FixtureMixin):
         supplier_framework_stub = SupplierFrameworkStub()
         assert sorted(supplier_framework.serialize().keys()) == sorted(supplier_framework_stub.response().keys())
 
+    def test_find_by_supplier_and_framework(self):
+        self.setup_dummy_suppliers(2)
+        db.session.add(SupplierFramework(supplier_id=0, framework_id=1, declaration={'status': 'started'}))
+        db.session.commit()
+        framework_slug = Framework.query.get(1).slug
+
+        lazy_supplier_framework = SupplierFramework.find_by_supplier_and_framework(
+            0, framework_slug, lazyload_relationships=True
+        )
+        assert 'framework' not in lazy_supplier_framework.__dict__
+        assert 'framework' in SupplierFramework.find_by_supplier_and_framework(0, framework_slug).__dict__
+        assert SupplierFramework.find_by_supplier_and_framework(0, framework_slug).declaration == {'status': 'started'}
+        assert SupplierFramework.find_by_supplier_and_framework(0, framework_slug, for_update=True).supplier_id == 0
+        assert SupplierFramework.find_by_supplier_and_framework(1, framework_slug) is None
+        assert SupplierFramework.find_by_supplier_and_framework(0, 'not-a-framework') is None
+
+
+class TestAuditEvents(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        super().setup()
+        self.app.config['DM_API_AUDIT_PAYLOAD_MIN_BYTES'] = 30
+        self.setup_dummy_suppliers(1)
+        self.supplier = Supplier.query.filter(Supplier.supplier_id == 0).one()
+
+    def _create_audit_event(self, data, payload_keys=('update',)):
+        audit_event = AuditEvent(AuditTypes.supplier_update, 'user', data, self.supplier, payload_keys=payload_keys)
+        db.session.add(audit_event)
+        db.session.commit()
+
+        return audit_event
+
+    def test_large_payloads_are_stored_once_by_hash(self):
+        update = {'description': 'A description long enough to be stored separately'}
+        audit_events = [self._create_audit_event({'supplierId': 0, 'update': update}) for _ in range(2)]
+
+        payload = AuditEventPayload.query.one()
+        assert audit_events[0].data == audit_events[1].data == {
+            'supplierId': 0, 'payloadHashes': {'update': payload.hash},
+        }
+        assert audit_events[0].get_data() == {'supplierId': 0, 'update': update}
+
+    def test_small_payloads_and_other_keys_are_kept_in_data(self):
+        data = {'supplierId': 0, 'update': {'name': 'Short'}, 'other': {'x': 'Not one of the payload keys at all'}}
+
+        assert self._create_audit_event(data).data == data
+        assert AuditEventPayload.query.count() == 0
+
+    def test_payloads_are_kept_in_data_unless_configured(self):
+        self.app.config['DM_API_AUDIT_PAYLOAD_MIN_BYTES'] = 0
+        data = {'supplierId': 0, 'update': {'description': 'A description long enough to be stored separately'}}
+
+        assert self._create_audit_event(data).data == data
+        assert AuditEventPayload.query.count() == 0
+
+    def test_serialized_audit_events_include_their_payloads(self):
+        updates = [{'description': 'A description long enough to be stored separately, {}'.format(i)} for i in range(3)]
+        audit_events = [self._create_audit_event({'supplierId': 0, 'update': update}) for update in updates]
+        audit_events.append(self._create_audit_event({'supplierId': 0}))
+        db.session.expire_all()
+
+        with recorded_statements(db.engine, contains='FROM audit_event_payloads') as payload_queries:
+            with self.app.test_request_context():
+                serialized = serialize_results(audit_events)
+
+        assert [audit_event['data'] for audit_event in serialized] == [
+            *({'supplierId': 0, 'update': update} for update in updates), {'supplierId': 0}
+        ]
+        assert len(payload_queries) == 1
+
+
+class TestAuditReviewQueue(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        super().setup()
+        self.setup_dummy_suppliers(2)
+        self.setup_dummy_services(2, supplier_id=1)
+        self.services = Service.query.order_by(Service.id).all()
+
+    def _create_audit_event(self, service, created_at, audit_type=AuditTypes.update_service):
+        audit_event = AuditEvent(audit_type, 'user', {}, service)
+        audit_event.created_at = created_at
+        db.session.add(audit_event)
+        db.session.commit()
+
+        return audit_event
+
+    def _queue(self):
+        return {
+            (entry.object_id, entry.earliest_audit_event_id): entry.pending_count
+            for entry in AuditReviewQueueEntry.query.all()
+        }
+
+    def test_each_objects_earliest_unacknowledged_event_is_queued(self):
+        self._create_audit_event(self.services[0], datetime(2020, 1, 2))
+        earlier = self._create_audit_event(self.services[0], datetime(2020, 1, 1))
+        other = self._create_audit_event(self.services[1], datetime(2020, 1, 3))
+        self._create_audit_event(self.services[1], datetime(2020, 1, 1), audit_type=AuditTypes.update_service_status)
+
+        assert self._queue() == {(self.services[0].id, earlier.id): 2, (self.services[1].id, other.id): 1}
+
+    def test_acknowledging_events_moves_or_clears_their_objects_entry(self):
+        first = self._create_audit_event(self.services[0], datetime(2020, 1, 1))
+        second = self._create_audit_event(self.services[0], datetime(2020, 1, 2))
+
+        first.acknowledged = True
+        db.session.commit()
+        assert self._queue() == {(self.services[0].id, second.id): 1}
+
+        AuditEvent.query.update({'acknowledged': True}, synchronize_session=False)
+        db.session.commit()
+        assert self._queue() == {}
+
+    def test_deleting_events_updates_their_objects_entry(self):
+        first = self._create_audit_event(self.services[0], datetime(2020, 1, 1))
+        second = self._create_audit_event(self.services[0], datetime(2020, 1, 2))
+
+        AuditEvent.query.filter(AuditEvent.id == first.id).delete()
+        db.session.commit()
+
+        assert self._queue() == {(self.services[0].id, second.id): 1}
+
 
 class TestLot(BaseApplicationTest):
 
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from benchmarks import data
+from benchmarks.run import run_benchmarks, select_scenarios
+from tests.bases import BaseApplicationTest
+
+
+def test_get_volumes_scales_and_keeps_at_least_one_of_everything():
+    volumes = data.get_volumes(0.0001)
+
+    assert volumes["services"] == 20
+    assert volumes["briefs"] == 5
+    assert volumes["buyers"] == 1
+
+
+def test_select_scenarios_by_name_or_group():
+    assert [scenario.name for scenario in select_scenarios(["suppliers-search", "auth"])] == [
+        "suppliers-search", "auth-valid-password", "auth-unknown-user",
+    ]
+
+
+def test_select_scenarios_raises_if_none_match():
+    with pytest.raises(ValueError):
+        select_scenarios(["not-a-scenario"])
+
+
+class TestBenchmarks(BaseApplicationTest):
+    def _count_rows(self):
+        return {
+            table: db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ("suppliers", "services", "briefs", "audit_events")
+        }
+
+    def test_generate_fills_the_database(self):
+        counts_before = self._count_rows()
+        with db.engine.begin() as connection:
+            volumes = data.generate(connection, scale=0.0005)
+
+        counts_after = self._count_rows()
+        assert {table: counts_after[table] - counts_before[table] for table in counts_after} == {
+            "suppliers": volumes["suppliers"],
+            "services": volumes["services"],
+            "briefs": volumes["briefs"],
+            "audit_events": volumes["audit_events"],
+        }
+
+    def test_generate_refuses_to_fill_a_database_with_data_in(self):
+        with db.engine.begin() as connection:
+            data.generate(connection, scale=0.0005)
+
+        with pytest.raises(ValueError):
+            with db.engine.begin() as connection:
+                data.generate(connection, scale=0.0005)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(self.app, names=["list", "auth", "validation"], iterations=2, warmup=0,
+                                 generate=True, scale=0.0005)
+
+        assert results["rowCounts"]["suppliers"] == 5
+        assert [result.get("error") for result in results["scenarios"]] == [None] * len(results["scenarios"])
+        assert {result["group"] for result in results["scenarios"]} == {"list", "auth", "validation"}
+        for result in results["scenarios"]:
+            assert result["iterations"] == 2
+            assert result["queries"] > 0
+            assert result["timingsMs"]["min"] <= result["timingsMs"]["median"] <= result["timingsMs"]["max"]
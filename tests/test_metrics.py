@@ -1,5 +1,6 @@
 import re
 
+from app.models import Framework
 from tests.bases import BaseApplicationTest
 
 
@@ -22,6 +23,27 @@ class TestMetrics(BaseApplicationTest):
         ) in results
 
 
+class TestStatementCacheMetrics(BaseApplicationTest):
+
+    def test_statement_cache_lookups_are_counted(self):
+        Framework.find_by_slug('g-cloud-6')
+        initial_results = load_prometheus_metrics(self.client.get('/_metrics').data)
+        initial_hits = int(initial_results.get(b'sql_statement_cache_lookups_total{result="hit"}', 0))
+
+        Framework.find_by_slug('g-cloud-7')
+
+        results = load_prometheus_metrics(self.client.get('/_metrics').data)
+        assert int(results[b'sql_statement_cache_lookups_total{result="hit"}']) > initial_hits
+        assert any(name.startswith(b'sql_statement_cache_size{') for name in results)
+
+    def test_engines_without_a_statement_cache_have_an_empty_one(self):
+        from app.metrics import get_statement_cache_stats  # imported once the metrics path is configured
+
+        stats = get_statement_cache_stats(object())
+
+        assert stats['size'] == stats['capacity'] == 0
+
+
 class TestMetricsPageRegistersPageViews(BaseApplicationTest):
 
     def test_metrics_page_registers_page_views(self):
@@ -0,0 +1,75 @@
+import gc
+import os
+
+import mock
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import Framework, User
+from app.preload import preload
+from app.validation import _SCHEMAS, _get_enforcing_validator, get_validator
+from tests.bases import BaseApplicationTest
+
+
+class TestPreload(BaseApplicationTest):
+    def teardown(self):
+        gc.unfreeze()
+        super().teardown()
+
+    def test_preload_freezes_objects_out_of_garbage_collection(self):
+        preload(self.app)
+
+        assert gc.get_freeze_count() > 0
+
+    def test_preload_empties_the_database_pool(self):
+        preload(self.app)
+
+        assert db.engine.pool.checkedin() == 0
+
+    def test_preload_builds_every_schemas_validator(self):
+        _get_enforcing_validator.cache_clear()
+
+        preload(self.app)
+
+        assert _get_enforcing_validator.cache_info().currsize == len(_SCHEMAS)
+        hits = _get_enforcing_validator.cache_info().hits
+        assert get_validator('services-update') is get_validator('services-update')
+        assert _get_enforcing_validator.cache_info().hits == hits + 2
+
+    def test_preload_compiles_the_common_lookups(self):
+        from app.metrics import _statement_cache_lookups  # imported once the metrics path is configured
+
+        with self.app.app_context():
+            db.engine._compiled_cache.clear()
+
+        preload(self.app)
+
+        with self.app.app_context():
+            hits = _statement_cache_lookups['hit']
+            Framework.find_by_slug('g-cloud-7')
+            User.find_by_email_address('buyer@example.com')
+            assert _statement_cache_lookups['hit'] == hits + 2
+
+    def test_preload_survives_the_database_being_unavailable(self):
+        with mock.patch.object(Framework, 'find_by_slug') as find_by_slug:
+            find_by_slug.side_effect = OperationalError('SELECT', {}, Exception('no database'))
+            preload(self.app)
+
+        assert gc.get_freeze_count() > 0
+
+    def test_forked_workers_get_their_own_database_connections(self):
+        preload(self.app)
+        with self.app.app_context():
+            parent_connection = db.engine.raw_connection()
+            parent_connection.close()
+        assert db.engine.pool.checkedin() == 1
+
+        pid = os.fork()
+        if pid == 0:
+            # the child mustn't run anything else of pytest's, so reports back through its exit status
+            os._exit(0 if db.engine.pool.checkedin() == 0 else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        # and the parent's connection is still its own
+        assert db.engine.pool.checkedin() == 1
@@ -0,0 +1,91 @@
+import json
+
+import mock
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.query_timeouts import handle_query_timeout, query_timeouts, set_default_query_timeouts
+from tests.bases import BaseApplicationTest
+from tests.test_metrics import load_prometheus_metrics
+
+
+def get_query_timeouts():
+    return tuple(db.session.execute(text(
+        "SELECT current_setting('statement_timeout'), current_setting('lock_timeout')"
+    )).one())
+
+
+class TestQueryTimeouts(BaseApplicationTest):
+    def setup(self):
+        super().setup()
+        db.session.close()
+
+    def test_get_requests_get_the_default_statement_timeout(self):
+        with self.app.test_request_context('/frameworks', method='GET'):
+            set_default_query_timeouts()
+            assert get_query_timeouts() == ('30s', '0')
+
+    def test_other_requests_have_no_timeouts(self):
+        with self.app.test_request_context('/frameworks', method='POST'):
+            set_default_query_timeouts()
+            assert get_query_timeouts() == ('0', '0')
+
+    def test_decorator_overrides_the_default(self):
+        with self.app.test_request_context('/frameworks', method='GET'):
+            set_default_query_timeouts()
+            assert query_timeouts(lock_timeout=500)(get_query_timeouts)() == ('30s', '500ms')
+            db.session.commit()
+            assert query_timeouts(statement_timeout=120000)(get_query_timeouts)() == ('2min', '500ms')
+
+    def test_decorator_applies_to_a_transaction_already_begun(self):
+        with self.app.test_request_context('/frameworks', method='POST'):
+            get_query_timeouts()
+            assert query_timeouts(statement_timeout=1000)(get_query_timeouts)() == ('1s', '0')
+
+    def test_timeouts_apply_to_each_transaction_of_the_request_only(self):
+        with self.app.test_request_context('/frameworks', method='POST'):
+            decorated = query_timeouts(statement_timeout=1000, lock_timeout=100)(lambda: db.session.commit())
+            decorated()
+            assert get_query_timeouts() == ('1s', '100ms')
+
+        db.session.commit()
+        with self.app.test_request_context('/frameworks', method='POST'):
+            set_default_query_timeouts()
+            assert get_query_timeouts() == ('0', '0')
+
+    def test_slow_queries_are_cancelled_with_a_504(self):
+        self.app.config['DM_API_GET_STATEMENT_TIMEOUT_MS'] = 50
+
+        with mock.patch('app.main.views.frameworks.Framework.find_by_slug') as find_by_slug:
+            find_by_slug.side_effect = lambda slug: db.session.execute(text("SELECT pg_sleep(1)"))
+            response = self.client.get('/frameworks/g-cloud-6')
+
+        assert response.status_code == 504
+        assert response.headers['Retry-After'] == '30'
+        assert json.loads(response.get_data())['error'] == "The request's database queries took too long."
+
+        results = load_prometheus_metrics(self.client.get('/_metrics').data)
+        assert int(results[b'sql_query_timeouts_total{endpoint="main.get_framework",timeout="statement"}']) >= 1
+
+    def test_waiting_too_long_for_a_lock_is_a_503(self):
+        def lock_framework():
+            return db.session.execute(text("SELECT * FROM frameworks WHERE slug = 'g-cloud-6' FOR UPDATE")).all()
+
+        self.app.add_url_rule('/lock-framework', 'lock_framework', query_timeouts(lock_timeout=50)(lock_framework))
+
+        with db.engine.connect() as connection:
+            with connection.begin():
+                connection.execute(text("SELECT * FROM frameworks WHERE slug = 'g-cloud-6' FOR UPDATE"))
+                response = self.client.get('/lock-framework')
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '30'
+
+    def test_other_operational_errors_are_not_handled(self):
+        error = OperationalError("SELECT 1", {}, Exception("server closed the connection unexpectedly"))
+
+        with self.app.test_request_context('/frameworks'):
+            with pytest.raises(OperationalError):
+                handle_query_timeout(error)
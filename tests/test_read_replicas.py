@@ -0,0 +1,102 @@
+import json
+import os
+
+import mock
+from flask import g
+
+from app import db
+from app.read_replicas import route_reads_to_replica
+from config import Test
+from tests.bases import BaseApplicationTest
+from tests.helpers import recorded_statements
+
+
+class TestWithoutReadReplicas(BaseApplicationTest):
+    def test_no_replica_binds_configured(self):
+        assert not self.app.config['SQLALCHEMY_BINDS']
+
+    def test_get_requests_use_primary(self):
+        with self.app.test_request_context('/frameworks', method='GET'):
+            route_reads_to_replica()
+            assert g.get('read_replica_bind') is None
+            assert db.session.get_bind() is db.engine
+
+    def test_writes_do_not_report_primary_lsn(self):
+        response = self.client.post(
+            '/audit-events',
+            data=json.dumps({'auditEvents': {'type': 'contact_update', 'user': 'Lsn Tester', 'data': {}}}),
+            content_type='application/json',
+        )
+
+        assert response.status_code == 201
+        assert 'DM-Primary-LSN' not in response.headers
+
+
+class TestReadReplicas(BaseApplicationTest):
+    def setup(self):
+        # our "replica" is just the test database itself, which is good enough to exercise the routing
+        with mock.patch.dict(os.environ, {'DM_API_READ_REPLICA_URIS': Test.SQLALCHEMY_DATABASE_URI}):
+            super().setup()
+        self._search_api_client_patch = mock.patch('app.status.views.search_api_client', autospec=True)
+        self._search_api_client = self._search_api_client_patch.start()
+        self._search_api_client.get_status.return_value = {'status': 'ok'}
+
+    def teardown(self):
+        self._search_api_client_patch.stop()
+        db.get_engine(self.app, bind='replica-0').dispose()
+        super().teardown()
+
+    def test_replica_registered_as_bind(self):
+        assert self.app.config['SQLALCHEMY_BINDS'] == {'replica-0': Test.SQLALCHEMY_DATABASE_URI}
+
+    def test_get_request_reads_from_replica(self):
+        with self.app.test_request_context('/frameworks', method='GET'):
+            route_reads_to_replica()
+            assert g.read_replica_bind == 'replica-0'
+            assert db.session.get_bind() is db.get_engine(self.app, bind='replica-0')
+
+    def test_post_request_uses_primary(self):
+        with self.app.test_request_context('/frameworks', method='POST'):
+            route_reads_to_replica()
+            assert g.get('read_replica_bind') is None
+            assert db.session.get_bind() is db.engine
+
+    def test_read_primary_header_uses_primary(self):
+        with self.app.test_request_context('/frameworks', method='GET', headers={'DM-Read-Primary': 'true'}):
+            route_reads_to_replica()
+            assert g.get('read_replica_bind') is None
+
+    def test_min_lsn_header_uses_primary_if_replica_has_not_replayed_it(self):
+        # the test database isn't in recovery, so has no replay position and can never have "caught up"
+        with self.app.test_request_context('/frameworks', method='GET', headers={'DM-Min-LSN': '0/0'}):
+            route_reads_to_replica()
+            assert g.get('read_replica_bind') is None
+
+    def test_invalid_min_lsn_header_uses_primary(self):
+        with self.app.test_request_context('/frameworks', method='GET', headers={'DM-Min-LSN': 'not-an-lsn'}):
+            route_reads_to_replica()
+            assert g.get('read_replica_bind') is None
+
+    def test_get_view_queries_run_on_replica(self):
+        replica_engine = db.get_engine(self.app, bind='replica-0')
+        with recorded_statements(replica_engine, contains='FROM frameworks') as replica_statements:
+            response = self.client.get('/frameworks')
+
+        assert response.status_code == 200
+        assert replica_statements
+
+    def test_writes_report_primary_lsn(self):
+        response = self.client.post(
+            '/audit-events',
+            data=json.dumps({'auditEvents': {'type': 'contact_update', 'user': 'Lsn Tester', 'data': {}}}),
+            content_type='application/json',
+        )
+
+        assert response.status_code == 201
+        assert '/' in response.headers['DM-Primary-LSN']
+
+    def test_status_reports_replication_lag(self):
+        response = self.client.get('/_status')
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data())['replication_lag_seconds'] == {'replica-0': None}
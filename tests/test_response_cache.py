@@ -0,0 +1,163 @@
+import gzip
+import json
+
+from flask import jsonify
+import mock
+
+from app import db
+from app.models import Framework, Supplier
+from app.response_cache import add_response_cache_tags, cached_response, get_response_cache
+from tests.bases import BaseApplicationTest
+from tests.helpers import FixtureMixin
+from tests.test_metrics import load_prometheus_metrics
+
+
+class TestResponseCache(BaseApplicationTest, FixtureMixin):
+    def setup(self):
+        super().setup()
+        self.app.config['DM_API_RESPONSE_CACHE_TYPE'] = 'simple'
+        self.app.config['DM_API_RESPONSE_CACHE_GRACE_SECONDS'] = 0
+
+    def get_framework(self, slug):
+        with mock.patch(
+            'app.main.views.frameworks.Framework.find_by_slug', wraps=Framework.find_by_slug
+        ) as find_by_slug:
+            response = self.client.get(f'/frameworks/{slug}')
+
+        return response, find_by_slug.called
+
+    def update_framework(self, slug, **changes):
+        framework = Framework.find_by_slug(slug)
+        for name, value in changes.items():
+            setattr(framework, name, value)
+        db.session.commit()
+
+    def test_responses_are_served_from_the_cache(self):
+        first_response, first_called = self.get_framework('g-cloud-6')
+        second_response, second_called = self.get_framework('g-cloud-6')
+
+        assert first_response.status_code == second_response.status_code == 200
+        assert first_called and not second_called
+        assert second_response.get_data() == first_response.get_data()
+        assert second_response.content_type == 'application/json'
+
+    def test_hits_and_misses_are_counted(self):
+        def get_lookups():
+            results = load_prometheus_metrics(self.client.get('/_metrics').data)
+            return {
+                result: int(results.get(
+                    f'response_cache_lookups_total{{endpoint="main.get_framework",result="{result}"}}'.encode(), 0
+                ))
+                for result in ('hit', 'miss', 'stale')
+            }
+
+        initial_lookups = get_lookups()
+        self.get_framework('g-cloud-6')
+        self.get_framework('g-cloud-6')
+        self.update_framework('g-cloud-6', framework_agreement_details={'frameworkAgreementVersion': 'v1.0'})
+        self.get_framework('g-cloud-6')
+
+        lookups = get_lookups()
+        assert {result: lookups[result] - initial_lookups[result] for result in lookups} == {
+            'hit': 1, 'miss': 1, 'stale': 1,
+        }
+
+    def test_responses_are_not_cached_when_the_cache_is_switched_off(self):
+        self.app.config['DM_API_RESPONSE_CACHE_TYPE'] = ''
+
+        self.get_framework('g-cloud-6')
+        assert self.get_framework('g-cloud-6')[1]
+        assert get_response_cache() is None
+
+    def test_each_request_is_cached_separately(self):
+        self.get_framework('g-cloud-6')
+        response, called = self.get_framework('g-cloud-7')
+
+        assert called
+        assert json.loads(response.get_data())['frameworks']['slug'] == 'g-cloud-7'
+
+    def test_unsuccessful_responses_are_not_cached(self):
+        assert self.get_framework('not-a-framework')[0].status_code == 404
+        assert self.get_framework('not-a-framework')[1]
+
+    def test_changing_an_object_invalidates_the_responses_built_from_it(self):
+        self.get_framework('g-cloud-6')
+        self.get_framework('g-cloud-7')
+        self.update_framework('g-cloud-6', framework_agreement_details={'frameworkAgreementVersion': 'v1.0'})
+
+        response, called = self.get_framework('g-cloud-6')
+        assert called
+        assert json.loads(response.get_data())['frameworks']['frameworkAgreementVersion'] == 'v1.0'
+        assert not self.get_framework('g-cloud-7')[1]
+
+    def test_changes_that_are_rolled_back_invalidate_nothing(self):
+        self.get_framework('g-cloud-6')
+        framework = Framework.find_by_slug('g-cloud-6')
+        framework.framework_agreement_details = {'frameworkAgreementVersion': 'v1.0'}
+        db.session.flush()
+        db.session.rollback()
+
+        assert not self.get_framework('g-cloud-6')[1]
+
+    def test_responses_begun_soon_after_a_change_are_not_trusted(self):
+        self.app.config['DM_API_RESPONSE_CACHE_GRACE_SECONDS'] = 60
+        self.update_framework('g-cloud-6', framework_agreement_details={'frameworkAgreementVersion': 'v1.0'})
+
+        self.get_framework('g-cloud-6')
+        assert self.get_framework('g-cloud-6')[1]
+
+    def test_services_are_invalidated_by_changes_to_their_supplier(self):
+        self.setup_dummy_suppliers(2)
+        self.setup_dummy_service('1234567890123456', supplier_id=1)
+        assert self.client.get('/services/1234567890123456').status_code == 200
+
+        supplier = Supplier.query.filter(Supplier.supplier_id == 1).one()
+        supplier.name = 'A New Name'
+        db.session.commit()
+
+        response = self.client.get('/services/1234567890123456')
+        assert json.loads(response.get_data())['services']['supplierName'] == 'A New Name'
+
+    def test_only_live_brief_listings_without_users_are_cached(self):
+        self.setup_dummy_briefs(2, status='live')
+
+        with mock.patch(
+            'app.main.views.briefs.paginated_result_response', wraps=lambda **kwargs: jsonify(briefs=[])
+        ) as paginated_result_response:
+            for query_string in ('status=live', 'status=live', 'status=closed', 'status=live&with_users=true'):
+                self.client.get(f'/briefs?{query_string}')
+
+        assert [call[1]['request_args'].to_dict() for call in paginated_result_response.call_args_list] == [
+            {'status': 'live'}, {'status': 'closed'}, {'status': 'live', 'with_users': 'true'},
+        ]
+
+    def test_compression_safe_responses_are_stored_compressed(self):
+        data = {'things': ['thing {}'.format(i) for i in range(2000)]}
+
+        @cached_response()
+        def get_things():
+            add_response_cache_tags('thing')
+            return jsonify(data), 200, {'X-Compression-Safe': '1'}
+
+        self.app.add_url_rule('/things', 'get_things', get_things)
+
+        for _ in range(2):
+            response = self.client.get('/things', headers={'Accept-Encoding': 'gzip'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert json.loads(gzip.decompress(response.get_data())) == data
+
+            response = self.client.get('/things')
+            assert 'Content-Encoding' not in response.headers
+            assert json.loads(response.get_data()) == data
+
+    def test_requests_are_served_while_redis_is_unavailable(self):
+        self.app.config['DM_API_RESPONSE_CACHE_TYPE'] = 'redis'
+        self.app.config['DM_API_RESPONSE_CACHE_REDIS_URL'] = 'redis://localhost:1'
+
+        with mock.patch.object(self.app.logger, 'warning') as warning:
+            assert self.get_framework('g-cloud-6')[0].status_code == 200
+        assert warning.call_args[0][0].startswith('Failed to read response cache')
+
+        with mock.patch.object(self.app.logger, 'error') as error:
+            self.update_framework('g-cloud-6', framework_agreement_details={'frameworkAgreementVersion': 'v1.0'})
+        assert error.call_args[0][0].startswith('Failed to invalidate response cache')
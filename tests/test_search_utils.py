@@ -0,0 +1,81 @@
+import time
+
+import mock
+import pytest
+
+from app.search_utils import iter_search_result_pages
+from tests.bases import BaseApplicationTest
+from tests.helpers import DIRECT_AWARD_SEARCH_URL, FakeSearchAPIClient
+
+
+class TestIterSearchResultPages(BaseApplicationTest):
+    def iter_pages(self, search_api_client, search_api_url=DIRECT_AWARD_SEARCH_URL, **kwargs):
+        with mock.patch('app.search_utils.search_api_client', search_api_client):
+            return list(iter_search_result_pages(search_api_url, **kwargs))
+
+    @pytest.mark.parametrize('service_count', (0, 1, 99, 100, 101, 1000, 1050))
+    def test_every_service_is_found_once(self, service_count):
+        service_ids = [str(i) for i in range(service_count)]
+
+        pages = self.iter_pages(FakeSearchAPIClient(service_ids), id_only=True)
+
+        assert sorted(service['id'] for page in pages for service in page) == sorted(service_ids)
+        assert len(pages) == max(1, -(-service_count // 100))
+
+    def test_the_search_url_is_kept_for_every_page(self):
+        search_api_client = FakeSearchAPIClient(range(250))
+
+        self.iter_pages(search_api_client, id_only=True)
+
+        assert sorted(search_api_client.requested_urls) == [
+            DIRECT_AWARD_SEARCH_URL + '&idOnly=True',
+            DIRECT_AWARD_SEARCH_URL + '&idOnly=True&page=2',
+            DIRECT_AWARD_SEARCH_URL + '&idOnly=True&page=3',
+        ]
+
+    def test_whole_services_are_found_unless_only_ids_are_asked_for(self):
+        pages = self.iter_pages(FakeSearchAPIClient(['1']))
+
+        assert pages == [[{'id': '1', 'serviceName': 'A service'}]]
+
+    def test_pages_after_the_first_are_fetched_at_once_by_a_bounded_pool(self):
+        self.app.config['DM_API_SEARCH_API_FETCH_THREADS'] = 3
+        search_api_client = FakeSearchAPIClient(range(1000), latency=0.05)
+
+        start = time.perf_counter()
+        self.iter_pages(search_api_client, id_only=True)
+        elapsed = time.perf_counter() - start
+
+        assert search_api_client.max_concurrent_requests == 3
+        # the first page, then three rounds of the other nine, rather than ten pages one after another
+        assert elapsed < 0.05 * 10 * 0.75
+
+    def test_pages_added_while_fetching_are_followed(self):
+        search_api_client = FakeSearchAPIClient(range(250))
+        get_page = search_api_client._get
+
+        def get_page_of_growing_results(url):
+            result = get_page(url)
+            if len(search_api_client.requested_urls) == 1:
+                # the first page has been counted - two more pages of results turn up
+                search_api_client.service_ids.extend(range(250, 450))
+                result['meta']['total'] = 250
+            return result
+
+        with mock.patch.object(search_api_client, '_get', get_page_of_growing_results):
+            pages = self.iter_pages(search_api_client, id_only=True)
+
+        assert sorted(service['id'] for page in pages for service in page) == list(range(450))
+
+    def test_errors_fetching_a_page_are_raised(self):
+        search_api_client = FakeSearchAPIClient(range(500))
+        get_page = search_api_client._get
+
+        def get_page_or_fail(url):
+            if url.endswith('page=4'):
+                raise ValueError('Search API unavailable')
+            return get_page(url)
+
+        with mock.patch.object(search_api_client, '_get', get_page_or_fail):
+            with pytest.raises(ValueError):
+                self.iter_pages(search_api_client, id_only=True)
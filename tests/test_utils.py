@@ -1,5 +1,6 @@
 import datetime
 import json
+import os
 import mock
 import pytest
 
@@ -17,6 +18,7 @@ from app.utils import (
     link,
     list_result_response,
     paginated_result_response,
+    process_pool_map,
     purge_nulls_from_data,
     single_result_response,
     strip_whitespace_from_data,
@@ -361,3 +363,17 @@ class TestSqlCompareDateString:
     def test_it_should_raise_value_error_if_date_string_is_not_valid(self, invalid_date_string):
         with pytest.raises(ValueError):
             compare_sql_datetime_with_string(mock.MagicMock(), invalid_date_string)
+
+
+@pytest.mark.parametrize('processes', (1, 2))
+def test_process_pool_map(processes):
+    with process_pool_map(processes) as map_:
+        assert map_(abs, [-1, 2, -3]) == [1, 2, 3]
+        process_ids = set(map_(_get_process_id, range(20)))
+
+    # with one process, there's no pool
+    assert (process_ids == {os.getpid()}) == (processes == 1)
+
+
+def _get_process_id(_):
+    return os.getpid()
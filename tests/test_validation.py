@@ -14,6 +14,7 @@ from app.validation import (
     is_valid_date,
     is_valid_acknowledged_state,
     get_validation_errors,
+    get_field_validation_errors,
     is_valid_email_address,
     is_valid_string,
     min_price_less_than_max_price,
@@ -765,6 +766,95 @@ def test_dos4_dependent_questions(required_fields, input_data, expected_errors):
     ) == expected_errors
 
 
+@pytest.mark.parametrize("schema_name,listing,update,page_questions", (
+    ("services-g-cloud-7-scs", "G7-SCS", {"serviceName": "An example service"}, ["serviceName", "serviceSummary"]),
+    ("services-g-cloud-7-scs", "G7-SCS", {"serviceName": "a" * 101}, ["serviceName"]),
+    ("services-g-cloud-7-scs", "G7-SCS", {"serviceName": None}, ["serviceName", "serviceSummary"]),
+    ("services-g-cloud-7-scs", "G7-SCS", {"newKey": 1}, []),
+    ("services-g-cloud-7-scs", "G7-SCS", {"serviceTypes": ["Fortnightly"]}, ["serviceTypes"]),
+    # min/max prices are checked against each other even when only one of them changes
+    ("services-g-cloud-7-scs", "G7-SCS", {"priceMin": "100"}, ["priceMin"]),
+    ("services-g-cloud-7-scs", "G7-SCS", {"priceMax": "1"}, ["priceMax"]),
+    ("services-g-cloud-7-scs", "G7-SCS", {"priceMin": "1", "priceMax": "a"}, ["priceMin", "priceMax"]),
+    # cross-field rules involving a question are checked when only one side of them changes
+    (
+        "services-g-cloud-12-cloud-hosting",
+        {"emailOrTicketingSupport": "no"},
+        {"emailOrTicketingSupport": "yes"},
+        ["emailOrTicketingSupport"],
+    ),
+    (
+        "services-g-cloud-12-cloud-hosting",
+        {
+            "serviceName": "A hosting service",
+            "emailOrTicketingSupport": "yes",
+            "emailOrTicketingSupportResponseTimes": "Quickly",
+            "emailOrTicketingSupportPriority": False,
+        },
+        {"emailOrTicketingSupport": "no"},
+        ["emailOrTicketingSupport"],
+    ),
+    (
+        "services-g-cloud-12-cloud-hosting",
+        {
+            "emailOrTicketingSupport": "yes",
+            "emailOrTicketingSupportResponseTimes": "Quickly",
+            "emailOrTicketingSupportPriority": False,
+        },
+        {"emailOrTicketingSupportResponseTimes": None},
+        ["emailOrTicketingSupportResponseTimes"],
+    ),
+    (
+        "services-digital-outcomes-and-specialists-4-digital-specialists",
+        {"designerLocations": ["London"], "designerPriceMin": "100", "designerAccessibleApplications": True},
+        {"designerPriceMax": "90"},
+        ["designerLocations", "designerPriceMin", "designerPriceMax", "designerAccessibleApplications"],
+    ),
+    (
+        "services-digital-outcomes-and-specialists-4-digital-specialists",
+        {},
+        {"designerPriceMax": "900"},
+        ["designerPriceMax"],
+    ),
+))
+def test_field_validation_errors_are_the_same_as_full_validation(schema_name, listing, update, page_questions):
+    if isinstance(listing, str):
+        data = drop_api_exported_fields_so_that_api_import_will_validate(load_example_listing(listing))
+    else:
+        data = dict(listing)
+    assert not get_validation_errors(schema_name, data, enforce_required=False)
+
+    data.update(update)
+    data = {key: value for key, value in data.items() if value is not None}
+
+    assert get_field_validation_errors(
+        schema_name, data, fields=set(update) | set(page_questions), required_fields=page_questions,
+    ) == get_validation_errors(
+        schema_name, data, enforce_required=False, required_fields=page_questions,
+    )
+
+
+def test_field_validation_only_checks_fields_and_the_questions_they_are_related_to():
+    data = load_example_listing("G7-SCS")
+    data = drop_api_exported_fields_so_that_api_import_will_validate(data)
+    data.update({"serviceSummary": "", "priceMin": "100"})
+
+    assert get_field_validation_errors(
+        "services-g-cloud-7-scs", data, fields=["priceMin"], required_fields=["priceMin"],
+    ) == {"priceMax": "max_less_than_min"}
+
+
+def test_field_validators_are_cached_by_schema_and_fields():
+    from app.validation import _get_field_validator
+
+    validator = _get_field_validator("services-g-cloud-7-scs", frozenset(["priceMin"]), frozenset(["priceMin"]))
+    assert {key for key, value in validator.schema["properties"].items() if value} == {"priceMin", "priceMax"}
+    assert validator.schema["required"] == ["priceMin"]
+    assert _get_field_validator(
+        "services-g-cloud-7-scs", frozenset(["priceMin"]), frozenset(["priceMin"])
+    ) is validator
+
+
 def test_api_type_is_optional():
     data = load_example_listing("G6-PaaS")
     del data["apiType"]